@@ -1,40 +1,65 @@
+import logging
 import os
+import queue
 import threading
+import time
 import tkinter as tk
+from collections import deque
 from tkinter import ttk, messagebox
-import sys
 
-# Custom imports from other application parts
-from astro import seek, convert, transmit
-from recorder import AudioRecorder
-from client import Client
-from tts import say
+# Custom application parts (astro, devices, recorder, client, tts) pull in Skyfield, Astropy,
+# pandas, sounddevice and the Piper voice. They are imported by the background loader of
+# RecorderApp after the window is shown, see _load_backend().
 
 # directory for saving the temporary recording files. directory is emptied when application is closed
 AUDIO_DIR = os.path.join(os.path.dirname(__file__), "tmp")
 
-# transmission URL for the arduino webserver
-TRANSMIT_URL = "http://192.168.48.149/"
+# interval in ms in which buffered log messages are written to the logging section
+LOG_FLUSH_MS = 100
+# maximum number of lines kept in the logging section, older lines are dropped
+LOG_MAX_LINES = 1000
 
+logger = logging.getLogger(__name__)
 
-class Logger:
-    """Class for logging output of commands and function calls."""
-    def __init__(self, text_widget: tk.Text):
+
+class TextHandler(logging.Handler):
+    """
+    Logging handler for the logging section of the UI. Records from any thread are only
+    collected in a buffer, the Tk main loop flushes them to the Text widget in batches on a
+    fixed timer. The widget is capped to the last 'max_lines' lines.
+    """
+    def __init__(self, text_widget: tk.Text, flush_ms: int = LOG_FLUSH_MS, max_lines: int = LOG_MAX_LINES):
+        super().__init__()
         self.text_widget = text_widget
-        self._lock = threading.Lock()
+        self.flush_ms = flush_ms
+        self.max_lines = max_lines
+        # lines beyond max_lines would be trimmed from the widget anyway
+        self._buffer: deque[str] = deque(maxlen=max_lines)
+        self._buffer_lock = threading.Lock()
+        self.text_widget.after(self.flush_ms, self._flush_to_widget)
 
-    def write(self, msg: str):
-        if not msg:
+    def emit(self, record: logging.LogRecord):
+        try:
+            msg = self.format(record)
+        except Exception:
+            self.handleError(record)
             return
-        with self._lock:
-            self.text_widget.after(0, self._append, msg)
-
-    def flush(self):
-        pass
+        with self._buffer_lock:
+            self._buffer.append(msg)
 
-    def _append(self, msg: str):
-        self.text_widget.insert(tk.END, msg)
-        self.text_widget.see(tk.END)
+    def _flush_to_widget(self):
+        """Runs in the Tk main loop only."""
+        with self._buffer_lock:
+            lines = list(self._buffer)
+            self._buffer.clear()
+        if lines:
+            self.text_widget.insert(tk.END, "\n".join(lines) + "\n")
+            # Text always holds a trailing newline, so the last line index is one too high
+            excess = int(self.text_widget.index("end-1c").split(".")[0]) - 1 - self.max_lines
+            if excess > 0:
+                self.text_widget.delete("1.0", f"{excess + 1}.0")
+            self.text_widget.see(tk.END)
+        self.text_widget.after(self.flush_ms, self._flush_to_widget)
 
 
 class RecorderApp:
@@ -43,9 +68,13 @@ class RecorderApp:
         self.root = root
         root.title("StarSeeker Recorder")
 
-        # core components
-        self.recorder = AudioRecorder(AUDIO_DIR)
-        self.client = Client()
+        # core components, created by the background loader
+        self.recorder = None
+        self.client = None
+        self.speculator = None
+        self.partial = None
+        self.backend_ready = threading.Event()
+        self.backend_error: Exception | None = None
 
         self.output_file: str | None = None
 
@@ -57,14 +86,14 @@ class RecorderApp:
 
         btns = ttk.Frame(self.frame)
         btns.grid(row=0, column=0, sticky="w")
-        self.btn_start = ttk.Button(btns, text="Start Recording", command=self.start_recording)
+        self.btn_start = ttk.Button(btns, text="Start Recording", command=self.start_recording, state=tk.DISABLED)
         self.btn_stop = ttk.Button(btns, text="Stop", command=self.stop_recording, state=tk.DISABLED)
         self.btn_process = ttk.Button(btns, text="Transcribe & Analyze", command=self.process_audio, state=tk.DISABLED)
         self.btn_start.grid(row=0, column=0, padx=5)
         self.btn_stop.grid(row=0, column=1, padx=5)
         self.btn_process.grid(row=0, column=2, padx=5)
 
-        self.file_label_var = tk.StringVar(value="No recording yet")
+        self.file_label_var = tk.StringVar(value="Loading...")
         ttk.Label(self.frame, textvariable=self.file_label_var).grid(
             row=1, column=0, sticky="w", pady=(8, 4)
         )
@@ -73,36 +102,91 @@ class RecorderApp:
         self.log.grid(row=2, column=0, sticky="nsew")
         self.frame.rowconfigure(2, weight=1)
         self.frame.columnconfigure(0, weight=1)
-        self.logger = Logger(self.log)
 
-        self._orig_stdout = sys.stdout
-        sys.stdout = self
+        self.log_handler = TextHandler(self.log)
+        logging.getLogger().addHandler(self.log_handler)
 
-    def write(self, msg: str):
-        """Function to write a message into the logging section."""
-        self.logger.write(msg)
-        try:
-            self._orig_stdout.write(msg)
-        except (OSError, AttributeError, ValueError):
-            pass
+        # UI updates requested by worker threads, executed by the Tk main loop
+        self._ui_calls: queue.SimpleQueue = queue.SimpleQueue()
+        self.root.after(LOG_FLUSH_MS, self._run_ui_calls)
+
+        threading.Thread(target=self._load_backend, daemon=True).start()
 
-    def flush(self):
-        """Function to flush the logging section."""
+    def _load_backend(self):
+        """
+        Import and initialize the heavy application parts while the window is already shown.
+        Recording is enabled as soon as the recorder is ready, processing waits for the rest.
+        """
         try:
-            self._orig_stdout.flush()
-        except (OSError, AttributeError, ValueError):
-            pass
+            start = time.perf_counter()
+            logger.info("Loading audio recorder...")
+            from recorder import AudioRecorder
+            self.recorder = AudioRecorder(AUDIO_DIR)
+            if self.recorder.warm:
+                # the stream keeps running, so recording starts without waiting for the device
+                self.recorder.open()
+            self._call_in_ui(self.btn_start.config, state=tk.NORMAL)
+            self._call_in_ui(self.file_label_var.set, "No recording yet")
+
+            logger.info("Loading speech recognition and name index...")
+            from client import Client
+            from speculate import Speculator
+            self.client = Client()
+            self.speculator = Speculator(self.client)
+
+            logger.info("Loading voice output...")
+            import tts
+            tts.warm()
+
+            logger.info("Loading ephemeris and star catalog...")
+            import astro
+            import devices
+            devices.registry()
+
+            import workers
+            if workers.pool() is not None:
+                logger.info("Starting worker processes...")
+                workers.pool().warm()
+
+            logger.info(f"Ready after {time.perf_counter() - start:.1f} s.")
+        except Exception as e:
+            self.backend_error = e
+            logger.exception(f"Loading failed: {e}")
+            self._call_in_ui(messagebox.showerror, "Loading failed", str(e))
+        finally:
+            self.backend_ready.set()
+
+    def _call_in_ui(self, func, *args, **kwargs):
+        """Schedule 'func' to run in the Tk main loop. Safe to call from any thread."""
+        self._ui_calls.put((func, args, kwargs))
+
+    def _run_ui_calls(self):
+        while True:
+            try:
+                func, args, kwargs = self._ui_calls.get_nowait()
+            except queue.Empty:
+                break
+            func(*args, **kwargs)
+        self.root.after(LOG_FLUSH_MS, self._run_ui_calls)
 
     # Button functionality
 
     def start_recording(self):
         self.recorder.start()
+        # partial transcripts move the pointers while the visitor is still speaking
+        if self.backend_ready.is_set() and self.backend_error is None:
+            from speculate import PartialTranscriber
+            self.partial = PartialTranscriber(self.recorder, self.speculator)
+            self.partial.start()
         self.btn_start.config(state=tk.DISABLED)
         self.btn_stop.config(state=tk.NORMAL)
         self.btn_process.config(state=tk.DISABLED)
 
     def stop_recording(self):
         output = self.recorder.stop()
+        if self.partial is not None:
+            self.partial.stop()
+            self.partial = None
         self.output_file = output
         self.btn_start.config(state=tk.NORMAL)
         self.btn_stop.config(state=tk.DISABLED)
@@ -122,25 +206,63 @@ class RecorderApp:
 
     def _process_worker(self):
         try:
-            text = self.client.transcribe(self.output_file)
-            skyobj, skytyp = self.client.query_object(text)
-
-            ra, dec = seek(skyobj, skytyp)
-            azimuth, altitude, con_az, con_alt = convert(ra, dec)
-            print(f"Altitude: {altitude}    Azimuth: {azimuth}")
-            print(f"Converted altitude: {con_alt}    Converted azimuth: {con_az}")
-            if altitude < 0:
-                print("Object is below the horizon")
-                say(f"Das {skyobj} ist aktuell unter dem Horizont, versuch es nachher nochmal.")
-            else:
-                say(f"Ich zeige dir jetzt {skyobj}")
-                res_status = transmit(TRANSMIT_URL, con_alt, con_az)
-                if res_status == 200:
-                    print(f"Information transmitted to {TRANSMIT_URL}")
+            if not self.backend_ready.is_set():
+                logger.info("Waiting for the application to finish loading...")
+                self.backend_ready.wait()
+            if self.backend_error is not None:
+                raise RuntimeError(f"Application failed to load: {self.backend_error}")
+            # already imported by the background loader at this point
+            from skyfield.units import Angle
+
+            from astro import seek, convert, OBSERVER_LAT, OBSERVER_LON, OBSERVER_HEIGHT
+            import capture
+            import devices
+            import slew
+            from tts import say
+            import workers
+
+            # recorded into a replay bundle if STARSEEKER_CAPTURE is set
+            with capture.session("app"):
+                capture.audio(self.output_file)
+                text = self.client.transcribe(self.output_file)
+                # the speculation on partial transcripts may have positioned the pointers already
+                skyobj, skytyp, on_target = self.speculator.finish(text)
+
+                pool = workers.pool()
+                if pool is not None:
+                    # computed in a worker process, so the Tk main loop keeps the GIL
+                    result = pool.pointing(skyobj, skytyp, OBSERVER_LAT, OBSERVER_LON, OBSERVER_HEIGHT).result()
+                    ra, dec = Angle(hours=result["ra_hours"]), Angle(degrees=result["dec_degrees"])
+                    azimuth, altitude = result["azimuth"], result["altitude"]
+                    con_az, con_alt = result["converted_azimuth"], result["converted_altitude"]
+                else:
+                    ra, dec = seek(skyobj, skytyp)
+                    azimuth, altitude, con_az, con_alt = convert(ra, dec)
+                logger.info(f"Altitude: {altitude}    Azimuth: {azimuth}")
+                logger.info(f"Converted altitude: {con_alt}    Converted azimuth: {con_az}")
+                capture.note("pointing", object=skyobj, type=skytyp, ra_hours=ra.hours, dec_degrees=dec.degrees,
+                             azimuth=azimuth, altitude=altitude, converted_azimuth=con_az, converted_altitude=con_alt)
+                arrival = time.monotonic()
+                if altitude < 0:
+                    logger.info("Object is below the horizon")
+                    say(self._below_horizon_message(skyobj, skytyp))
                 else:
-                    print("Transmission failed!")
-            print("Done.")
-            say("Tadaa.")
+                    # every pointer on the field gets the target for its own location, the boards
+                    # slew on their own while the announcement plays
+                    if not on_target:
+                        if skytyp.lower() == "satellite":
+                            # a fixed position is outdated within seconds, the boards follow its track
+                            results = devices.registry().follow(skyobj)
+                        else:
+                            results = devices.registry().fan_out(ra, dec)
+                        slew_time = slew.time_to_target(results)
+                        logger.info(f"Pointers on target in {slew_time:.1f} s")
+                        arrival += slew_time
+                    say(f"Ich zeige dir jetzt {skyobj}")
+                logger.info("Done.")
+                # "Tadaa." as the last pointer arrives
+                time.sleep(max(0.0, arrival - time.monotonic()))
+                say("Tadaa.")
 
             # clean up wav files
             for f in os.listdir(AUDIO_DIR):
@@ -148,13 +270,32 @@ class RecorderApp:
                     os.remove(os.path.join(AUDIO_DIR, f))
 
         except Exception as e:
-            print(f"Error: {e}")
-            messagebox.showerror("Processing failed", str(e))
+            logger.exception(f"Error: {e}")
+            self._call_in_ui(messagebox.showerror, "Processing failed", str(e))
         finally:
-            self.btn_process.config(state=tk.NORMAL)
+            self._call_in_ui(self.btn_process.config, state=tk.NORMAL)
+
+    @staticmethod
+    def _below_horizon_message(skyobj: str, skytyp: str) -> str:
+        """Tell the visitor when the object can be seen, using the planner of astro.py."""
+        from astro import plan
+
+        fallback = f"Das {skyobj} ist aktuell unter dem Horizont, versuch es nachher nochmal."
+        try:
+            info = plan(skyobj, skytyp)
+        except Exception as e:
+            logger.warning(f"Planning failed: {e}")
+            return fallback
+        logger.info(f"Plan: {info}")
+        if info["window_start"] is not None:
+            return f"Das {skyobj} ist aktuell unter dem Horizont. Ab {info['window_start']:%H:%M} Uhr kann ich es dir zeigen."
+        if info["rise"] is not None:
+            return f"Das {skyobj} ist aktuell unter dem Horizont und geht um {info['rise']:%H:%M} Uhr auf."
+        return f"Das {skyobj} ist heute Nacht leider nicht zu sehen."
 
 
 def main():
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     root = tk.Tk()
     app = RecorderApp(root)
     root.mainloop()
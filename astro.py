@@ -1,6 +1,12 @@
-from datetime import datetime, timezone
+import logging
+import os
+import threading
+from datetime import datetime, timedelta, timezone
 
-from skyfield.api import load, Star
+import numpy as np
+
+from skyfield import almanac
+from skyfield.api import load, Star, wgs84
 from skyfield.data import hipparcos
 
 from astropy.coordinates import SkyCoord, EarthLocation, AltAz
@@ -9,190 +15,347 @@ from astropy import units as u
 
 import requests
 
+from ephemeris import load_ephemeris
+from metrics import timed, incr
+import memo
+import mount
+import names
+import satellites
+
+logger = logging.getLogger(__name__)
+
+# transmission URL for the arduino webserver
+TRANSMIT_URL = "http://192.168.48.149/"
+
+# Default observer location: department of computer science and media
+# at the University of Applied Sciences Brandenburg
+OBSERVER_LAT = 52.41094790018972
+OBSERVER_LON = 12.538302555315548
+OBSERVER_HEIGHT = 36.0
+
+# minimum altitude in degrees at which the pointer is considered to show an object
+MIN_ALTITUDE = 10.0
+
+# Memoization of seek() and convert(). Results are reused while the target moves by less
+# than half a servo step: the sky turns by 1 degree in about 4 minutes, a low satellite
+# like the ISS by up to about 1 degree per second. STARSEEKER_CACHE_BUCKET overrides both.
+SIDEREAL_RATE = 360.0 / 86164.0905
+SATELLITE_RATE = 1.2
+SKY_BUCKET = float(os.environ.get("STARSEEKER_CACHE_BUCKET", 0)) or 0.5 * mount.SERVO_STEP / SIDEREAL_RATE
+SATELLITE_BUCKET = float(os.environ.get("STARSEEKER_CACHE_BUCKET", 0)) or 0.5 * mount.SERVO_STEP / SATELLITE_RATE
+_seek_cache = memo.TimeBucketCache("seek", SKY_BUCKET)
+_convert_cache = memo.TimeBucketCache("convert", SKY_BUCKET)
+
 # Load ephemeris and timescale. Downloaded if not found in project dir.
-eph = load("de421.bsp")
+# STARSEEKER_EPHEMERIS_YEARS=N loads a trimmed excerpt instead, see ephemeris.py.
+eph = load_ephemeris()
 ts = load.timescale()
 
 # Load Hipparcos star catalog. Downloaded if not found in project dir.
 with load.open(hipparcos.URL) as f:
     df = hipparcos.load_dataframe(f)
 
+# Bright star subset for sky surveys, prefiltered once so that visible_now() can observe
+# all of them in one vectorized Skyfield call. Rows without a position are dropped.
+BRIGHT_MAG_LIMIT = 6.0
+bright_df = df[(df["magnitude"] <= BRIGHT_MAG_LIMIT) & df["ra_degrees"].notnull()]
+bright_stars = Star.from_dataframe(bright_df)
+bright_hip = bright_df.index.to_numpy()
+bright_mag = bright_df["magnitude"].to_numpy()
+
+# Mapping common names to skyfield astronomic designations
+PLANET_MAP = {
+    "mercury": "mercury",
+    "venus": "venus",
+    "mars": "mars",
+    "jupiter": "jupiter barycenter",
+    "saturn": "saturn barycenter",
+    "uranus": "uranus barycenter",
+    "neptune": "neptune barycenter",
+    "pluto": "pluto barycenter",
+    "sun": "sun",
+}
+
+# Typical apparent magnitudes of solar system bodies, good enough to rank them among the stars
+BODY_MAGNITUDES = {
+    "mercury": 0.0,
+    "venus": -4.2,
+    "mars": 0.7,
+    "jupiter": -2.4,
+    "saturn": 0.6,
+    "uranus": 5.7,
+    "neptune": 7.8,
+    "pluto": 14.4,
+    "moon": -12.7,
+}
 
-def seek(skyobject: str, objtype: str):
+
+def target_key(skyobject: str, objtype: str) -> tuple[str, str | int]:
     """
-    Resolve 'skyobject' of type 'objtype' into apparent RA/Dec as seen from Earth now.
-    Returns (ra, dec) as Skyfield Angle objects for further conversion.
+    Resolve 'skyobject' of type 'objtype' into a plain, picklable key: ("star", HIP id),
+    ("body", ephemeris segment) or ("satellite", name). Used by resolve_target() and to
+    hand targets to worker processes, see workers.py.
     """
-
     # convert objtype for comparisons
     objtype = objtype.lower()
 
-    # create earth object for apparent tracking
-    earth = eph["earth"]
-    t = ts.now()
-
-    starchart = {
-        "acamar": 13847,
-        "achernar": 7588,
-        "acrux": 60718,
-        "adhara": 33579,
-        "agena": 68702,
-        "albireo": 95947,
-        "alcor": 65477,
-        "alcyone": 17702,
-        "aldebaran": 21421,
-        "alderamin": 105199,
-        "algenib": 1067,
-        "algieba": 50583,
-        "algol": 14576,
-        "alhena": 31681,
-        "alioth": 62956,
-        "alkaid": 67301,
-        "almaak": 9640,
-        "alnair": 109268,
-        "alnath": 25428,
-        "alnilam": 26311,
-        "alnitak": 26727,
-        "alphard": 46390,
-        "alphekka": 76267,
-        "alpheratz": 677,
-        "alshain": 98036,
-        "altair": 97649,
-        "ankaa": 2081,
-        "antares": 80763,
-        "arcturus": 69673,
-        "arneb": 25985,
-        "babcock's star": 112247,
-        "barnard's star": 87937,
-        "bellatrix": 25336,
-        "betelgeuse": 27989,
-        "campbell's star": 96295,
-        "canopus": 30438,
-        "capella": 24608,
-        "caph": 746,
-        "castor": 36850,
-        "cor caroli": 63125,
-        "cyg x-1": 98298,
-        "deneb": 102098,
-        "denebola": 57632,
-        "diphda": 3419,
-        "dubhe": 54061,
-        "enif": 107315,
-        "etamin": 87833,
-        "fomalhaut": 113368,
-        "groombridge 1830": 57939,
-        "hadar": 68702,
-        "hamal": 9884,
-        "izar": 72105,
-        "kapteyn's star": 24186,
-        "kaus australis": 90185,
-        "kocab": 72607,
-        "kruger 60": 110893,
-        "luyten's star": 36208,
-        "markab": 113963,
-        "megrez": 59774,
-        "menkar": 14135,
-        "merak": 53910,
-        "mintaka": 25930,
-        "mira": 10826,
-        "mirach": 5447,
-        "mirphak": 15863,
-        "mizar": 65378,
-        "nihal": 25606,
-        "nunki": 92855,
-        "phad": 58001,
-        "pleione": 17851,
-        "polaris": 11767,
-        "pollux": 37826,
-        "procyon": 37279,
-        "proxima": 70890,
-        "rasalgethi": 84345,
-        "rasalhague": 86032,
-        "red rectangle": 30089,
-        "regulus": 49669,
-        "rigel": 24436,
-        "rigil kent": 71683,
-        "sadalmelik": 109074,
-        "saiph": 27366,
-        "scheat": 113881,
-        "shaula": 85927,
-        "shedir": 3179,
-        "sheliak": 92420,
-        "sirius": 32349,
-        "spica": 65474,
-        "tarazed": 97278,
-        "thuban": 68756,
-        "unukalhai": 77070,
-        "van maanen 2": 3829,
-        "vega": 91262,
-        "vindemiatrix": 63608,
-        "zaurak": 18543,
-    }
-
     # Special cases for Sun since not listed by Hipparcos ID
     if objtype == "star" and skyobject.lower() != "sun":
-        hip_id = 0
-        if skyobject.lower() in starchart:
-            hip_id = starchart[skyobject.lower()]
-        star_data = df.loc[hip_id]
-        skyo = Star.from_dataframe(star_data)
-        apparent = earth.at(t).observe(skyo).apparent()
+        entry, score = names.index().resolve(skyobject)
+        if entry.hip is None or entry.hip not in df.index:
+            raise ValueError(f"Unknown star: {skyobject}")
+        if score < 1.0:
+            logger.info(f"Resolved '{skyobject}' to {entry.name} (score {score:.2f})")
+        return "star", int(entry.hip)
 
     # Mapping common names to skyfield astronomic designations
     elif objtype == "planet" or skyobject.lower() == "sun":
-        planet_map = {
-            "mercury": "mercury",
-            "venus": "venus",
-            "mars": "mars",
-            "jupiter": "jupiter barycenter",
-            "saturn": "saturn barycenter",
-            "uranus": "uranus barycenter",
-            "neptune": "neptune barycenter",
-            "pluto": "pluto barycenter",
-            "sun": "sun",
-        }
-        key = planet_map.get(skyobject.lower())
+        key = PLANET_MAP.get(skyobject.lower())
+        if key is None:
+            # German or otherwise spelled names, e.g. 'Merkur'
+            entry = names.index().lookup(skyobject)
+            key = PLANET_MAP.get(entry.name.lower()) if entry is not None else None
         if key is None:
             raise ValueError(f"Unknown planet: {skyobject}")
-        skyo = eph[key]
-        apparent = earth.at(t).observe(skyo).apparent()
+        return "body", key
 
     # Only Earth's moon can be found with this
     elif objtype == "moon":
-        skyo = eph["moon"]
-        apparent = earth.at(t).observe(skyo).apparent()
+        return "body", "moon"
 
-    # TODO: Possibly remove this since we have not used it so far
+    # Satellites come from the cached TLE store
     elif objtype == "satellite":
-        stations_url = (
-            "https://celestrak.org/NORAD/elements/gp.php?GROUP=stations&FORMAT=tle"
-        )
-        satellites = load.tle_file(stations_url, reload=True)
-        by_name = {sat.name.lower(): sat for sat in satellites}
-        skyo = by_name.get(skyobject.lower())
-        if skyo is None:
-            raise ValueError(f"Unknown satellite: {skyobject}")
-        apparent = (skyo - earth).at(t).apparent()
+        return "satellite", skyobject
 
     else:
         raise ValueError(f"Unknown object type: {objtype}")
 
+
+def resolve_target(skyobject: str, objtype: str, ephemeris=None):
+    """
+    Map 'skyobject' of type 'objtype' onto a Skyfield body: a Star from the Hipparcos catalog,
+    a segment of the ephemeris or an EarthSatellite from the TLE store.
+    """
+    kernel = eph if ephemeris is None else ephemeris
+    kind, key = target_key(skyobject, objtype)
+    if kind == "star":
+        return Star.from_dataframe(df.loc[key])
+    if kind == "body":
+        return kernel[key]
+    return satellites.catalog().get(key)
+
+
+@timed("seek")
+def seek(skyobject: str, objtype: str, ephemeris=None):
+    """
+    Resolve 'skyobject' of type 'objtype' into apparent RA/Dec as seen from Earth now.
+    Returns (ra, dec) as Skyfield Angle objects for further conversion.
+    'ephemeris' replaces the module wide kernel, e.g. a trimmed or higher precision one.
+    """
+    kernel = eph if ephemeris is None else ephemeris
+    satellite = objtype.lower() == "satellite"
+    key = (skyobject.lower(), objtype.lower(), id(kernel), OBSERVER_LAT, OBSERVER_LON, OBSERVER_HEIGHT)
+    ra, dec = _seek_cache.get_or_compute(key, lambda: _seek(skyobject, objtype, kernel),
+                                         SATELLITE_BUCKET if satellite else None)
+    logger.info(f"RA: {ra}, Dec: {dec}")
+    return ra, dec
+
+
+def _seek(skyobject: str, objtype: str, kernel):
+    skyo = resolve_target(skyobject, objtype, kernel)
+
+    # create earth object for apparent tracking
+    earth = kernel["earth"]
+    t = ts.now()
+
+    # The position of satellites is taken topocentric,
+    # since the parallax of a low orbit is far too large for geocentric coordinates.
+    if objtype.lower() == "satellite":
+        observer = wgs84.latlon(OBSERVER_LAT, OBSERVER_LON, elevation_m=OBSERVER_HEIGHT)
+        apparent = (skyo - observer).at(t)
+    else:
+        apparent = earth.at(t).observe(skyo).apparent()
+
     # Calculate apparent positions (as visible in the sky) instead of astronomic positions
     ra, dec, distance = apparent.radec()
-    print(f"RA: {ra}, Dec: {dec}")
     return ra, dec
 
 
+@timed("visible")
+def visible_now(min_altitude: float = 10.0,
+                max_magnitude: float = 3.0,
+                limit: int | None = None,
+                include_planets: bool = True,
+                lat_deg: float = OBSERVER_LAT,
+                lon_deg: float = OBSERVER_LON,
+                height_m: float = OBSERVER_HEIGHT) -> list[dict]:
+    """
+    List all objects currently above 'min_altitude' degrees and brighter than 'max_magnitude'
+    for the given observer, brightest first and optionally limited to 'limit' entries.
+    Stars are taken from the prefiltered bright Hipparcos subset and computed in a single
+    vectorized pass. Planets and the moon are added if 'include_planets' is set.
+    """
+    t = ts.now()
+    observer = (eph["earth"] + wgs84.latlon(lat_deg, lon_deg, elevation_m=height_m)).at(t)
+
+    results = []
+    if max_magnitude > BRIGHT_MAG_LIMIT:
+        logger.warning(f"Stars are only available down to magnitude {BRIGHT_MAG_LIMIT}")
+    alt, az, _ = observer.observe(bright_stars).apparent().altaz()
+    mask = (alt.degrees >= min_altitude) & (bright_mag <= max_magnitude)
+    for hip, mag, a, z in zip(bright_hip[mask], bright_mag[mask], alt.degrees[mask], az.degrees[mask]):
+        results.append({"object": names.index().for_hip(int(hip)).name, "type": "Star", "hip": int(hip),
+                        "magnitude": float(mag), "altitude": float(a), "azimuth": float(z)})
+
+    if include_planets:
+        bodies = [(name, "Planet", key) for name, key in PLANET_MAP.items() if name != "sun"]
+        bodies.append(("moon", "Moon", "moon"))
+        for name, objtype, key in bodies:
+            if BODY_MAGNITUDES[name] > max_magnitude:
+                continue
+            alt, az, _ = observer.observe(eph[key]).apparent().altaz()
+            if alt.degrees >= min_altitude:
+                results.append({"object": name.capitalize(), "type": objtype,
+                                "magnitude": BODY_MAGNITUDES[name],
+                                "altitude": float(alt.degrees), "azimuth": float(az.degrees)})
+
+    results.sort(key=lambda r: r["magnitude"])
+    if limit is not None:
+        results = results[:limit]
+    logger.info(f"{len(results)} objects visible above {min_altitude} degrees")
+    return results
+
+
+def night_key(now: datetime | None = None) -> str:
+    """Date of the evening a night started on, so that one night keeps one key past midnight."""
+    now = now or datetime.now().astimezone()
+    return (now - timedelta(hours=12)).strftime("%Y%m%d")
+
+
+def _night_start(key: str) -> datetime:
+    """Local noon on the day of 'key', the start of the search interval for that night."""
+    return datetime.strptime(key, "%Y%m%d").replace(hour=12).astimezone()
+
+
+def _local(times) -> list[datetime]:
+    return [t.utc_datetime().astimezone() for t in times]
+
+
+def _night_events(skyobject: str, objtype: str, key: str, min_altitude: float,
+                  lat_deg: float, lon_deg: float, height_m: float) -> dict:
+    """Rise, transit and set times and the window above 'min_altitude' for one night."""
+    start = _night_start(key)
+    t0 = ts.from_datetime(start)
+    t1 = ts.from_datetime(start + timedelta(days=1))
+    topos = wgs84.latlon(lat_deg, lon_deg, elevation_m=height_m)
+    body = resolve_target(skyobject, objtype)
+
+    # satellites pass several times a night, their events are only known above min_altitude
+    if objtype.lower() == "satellite":
+        t, events = body.find_events(topos, t0, t1, altitude_degrees=min_altitude)
+        rises, transits, sets = _local(t[events == 0]), _local(t[events == 1]), _local(t[events == 2])
+        return {"rise": rises, "transit": transits, "set": sets,
+                "window_start": rises, "window_end": sets, "always_up": False}
+
+    observer = eph["earth"] + topos
+    rise_t, rise_ok = almanac.find_risings(observer, body, t0, t1)
+    set_t, set_ok = almanac.find_settings(observer, body, t0, t1)
+    transit_t = almanac.find_transits(observer, body, t0, t1)
+    start_t, start_ok = almanac.find_risings(observer, body, t0, t1, horizon_degrees=min_altitude)
+    end_t, end_ok = almanac.find_settings(observer, body, t0, t1, horizon_degrees=min_altitude)
+
+    # no crossing of min_altitude at all: either circumpolar above it or never reaching it
+    always_up = False
+    if not start_ok.any() and not end_ok.any():
+        alt, _, _ = observer.at(t0).observe(body).apparent().altaz()
+        always_up = bool(alt.degrees >= min_altitude)
+
+    return {
+        "rise": _local(rise_t[rise_ok]),
+        "transit": _local(transit_t),
+        "set": _local(set_t[set_ok]),
+        "window_start": _local(start_t[start_ok]),
+        "window_end": _local(end_t[end_ok]),
+        "always_up": always_up,
+    }
+
+
+_plan_cache: dict[tuple, dict] = {}
+_plan_lock = threading.Lock()
+
+
+def _cached_night_events(skyobject: str, objtype: str, key: str, *args) -> dict:
+    cache_key = (skyobject.lower(), objtype.lower(), key, *args)
+    with _plan_lock:
+        events = _plan_cache.get(cache_key)
+    if events is not None:
+        incr("cache_hits", stage="plan")
+        return events
+
+    incr("cache_misses", stage="plan")
+    events = _night_events(skyobject, objtype, key, *args)
+    with _plan_lock:
+        # results of earlier nights are never asked for again
+        for stale in [k for k in _plan_cache if k[2] < night_key()]:
+            del _plan_cache[stale]
+        _plan_cache[cache_key] = events
+    return events
+
+
+@timed("plan")
+def plan(skyobject: str, objtype: str,
+         min_altitude: float = MIN_ALTITUDE,
+         lat_deg: float = OBSERVER_LAT,
+         lon_deg: float = OBSERVER_LON,
+         height_m: float = OBSERVER_HEIGHT,
+         now: datetime | None = None) -> dict:
+    """
+    Next rise, transit and set of 'skyobject' and the next time window in which it is above
+    'min_altitude', as local datetimes (None if there is none within the next night).
+    The root finding runs once per object and night, later requests are served from a cache.
+    """
+    now = now or datetime.now().astimezone()
+    tonight = night_key(now)
+    tomorrow = night_key(now + timedelta(days=1))
+    args = (min_altitude, lat_deg, lon_deg, height_m)
+
+    nights = [_cached_night_events(skyobject, objtype, tonight, *args)]
+    result = {"object": skyobject, "type": objtype, "always_up": nights[0]["always_up"]}
+    for event in ("rise", "transit", "set", "window_start", "window_end"):
+        upcoming = [t for t in nights[0][event] if t > now]
+        if not upcoming:
+            if len(nights) == 1:
+                nights.append(_cached_night_events(skyobject, objtype, tomorrow, *args))
+            upcoming = [t for t in nights[1][event] if t > now]
+        result[event] = upcoming[0] if upcoming else None
+
+    # currently inside the window if it ends before it starts again
+    end, start = result["window_end"], result["window_start"]
+    result["visible_now"] = result["always_up"] or (end is not None and (start is None or end < start))
+    return result
+
+
+@timed("convert")
 def convert(right_ascension, declination,
-            lat_deg: float = 52.41094790018972,
-            lon_deg: float = 12.538302555315548,
-            height_m: float = 36.0):
+            lat_deg: float = OBSERVER_LAT,
+            lon_deg: float = OBSERVER_LON,
+            height_m: float = OBSERVER_HEIGHT):
     """
-    Convert RA/Dec (Skyfield Angle objects) to Azimuth and Altitude
-    for given EarthLocation and current UTC time, using Astropy.
+    Convert RA/Dec (Skyfield Angle objects, scalar or array) to Azimuth and Altitude
+    for given EarthLocation and current UTC time, using Astropy, and to the servo
+    angles of the pointer (see mount.py).
     Default coordinates use the location of the department of computer science
     and media at the University of Applied Sciences Brandenburg.
+    Scalar requests are memoized per time bucket, see SKY_BUCKET.
     """
+    if np.ndim(right_ascension.hours) or np.ndim(declination.degrees):
+        return _convert(right_ascension, declination, lat_deg, lon_deg, height_m)
+    key = (float(right_ascension.hours), float(declination.degrees), lat_deg, lon_deg, height_m)
+    return _convert_cache.get_or_compute(
+        key, lambda: _convert(right_ascension, declination, lat_deg, lon_deg, height_m))
+
+
+def _convert(right_ascension, declination, lat_deg: float, lon_deg: float, height_m: float):
     # Target as provided
     target = SkyCoord(
         ra=right_ascension.hours * u.hour,
@@ -215,29 +378,28 @@ def convert(right_ascension, declination,
     azimuth_deg = altaz.az.degree
     altitude_deg = altaz.alt.degree
 
-    con_az = azimuth_deg
-    con_alt = altitude_deg
-
-    # if in green area
-    if 270 < azimuth_deg or azimuth_deg < 90:
-        inter = 450 - azimuth_deg
-        con_az = inter % 360
-
-    # if in red area
-    if 91 < azimuth_deg < 269:
-        con_az = azimuth_deg + 180
-        inter = 450 - con_az
-        con_az = inter % 360
-
-    # adjust altitude because of shift into green area
-        altitude_deg = 180 - altitude_deg
+    # servo commands from the calibrated mount model, the altitude servo flips over the zenith
+    # for targets in the southern half
+    con_az, con_alt, _ = mount.servo_angles(azimuth_deg, altitude_deg)
 
     return azimuth_deg, altitude_deg, con_az, con_alt
 
-def transmit(raw_url: str, altitude: float, azimuth: float):
+@timed("transmit")
+def transmit(raw_url: str, altitude: float, azimuth: float, timeout: float | None = None):
     """Function to transmit the calculated values as altitude and azimuth
     to provided Arduino webserver URL."""
-    transmit_url = raw_url + f"/alt={altitude}&az={azimuth}"
-    res = requests.get(transmit_url)
+    transmit_url = raw_url.rstrip("/") + f"/alt={altitude}&az={azimuth}"
+    incr("bytes_sent", len(transmit_url), target="arduino")
+    res = requests.get(transmit_url, timeout=timeout)
+    return res.status_code
+
+
+def transmit_path(raw_url: str, points, interval: float, timeout: float | None = None):
+    """Transmit a slew trajectory of servo azimuth/altitude points, 'interval' seconds apart.
+    The board steps through it on its own and answers right away."""
+    path = ",".join(f"{az:.1f}:{alt:.1f}" for az, alt in points)
+    transmit_url = raw_url.rstrip("/") + f"/path?dt={round(interval * 1000)}&p={path}"
+    incr("bytes_sent", len(transmit_url), target="arduino")
+    res = requests.get(transmit_url, timeout=timeout)
     return res.status_code
 
@@ -0,0 +1,156 @@
+"""
+Batch mode: run many recorded or typed requests through the pipeline without the GUI.
+
+Usage:
+    python batch.py recordings/ --workers 4 --output results.jsonl
+    python batch.py commands.txt --expect
+
+'recordings/' is a directory of WAV files, 'commands.txt' holds one text command per line.
+With --expect, text lines may carry the expected answer as 'command;Object,Type', which
+is compared with the resolved object for regression testing of the resolver.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import TYPE_CHECKING
+
+# Custom imports from other application parts are made where used, so that spawned worker
+# processes, which re-import the main module, do not load the catalog and ephemeris again
+if TYPE_CHECKING:
+    from client import Client
+
+logger = logging.getLogger(__name__)
+
+WORKERS = 4
+
+
+def load_items(path: str, expect: bool = False) -> list[dict]:
+    """One item per WAV file in a directory or per non-empty line of a text file."""
+    if os.path.isdir(path):
+        return [{"audio": os.path.join(path, name)}
+                for name in sorted(os.listdir(path)) if name.lower().endswith(".wav")]
+
+    items = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            item = {"text": line}
+            if expect and ";" in line:
+                text, expected = line.rsplit(";", 1)
+                obj, _, typ = expected.partition(",")
+                item = {"text": text.strip(), "expected": {"object": obj.strip(), "type": typ.strip()}}
+            items.append(item)
+    return items
+
+
+def run_item(client: "Client", item: dict) -> dict:
+    """Run one item through transcription (for audio), resolution, seek and convert."""
+    from astro import seek, convert
+
+    result = dict(item)
+    timings = result["timings"] = {}
+
+    def stage(name, func, *args):
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            timings[name] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    try:
+        text = item.get("text")
+        if text is None:
+            text = result["text"] = stage("transcribe", client.transcribe, item["audio"])
+        skyobj, skytyp = stage("resolve", client.resolve, text)
+        result["object"], result["type"] = skyobj, skytyp
+        ra, dec = stage("seek", seek, skyobj, skytyp)
+        azimuth, altitude, con_az, con_alt = stage("convert", convert, ra, dec)
+        result.update({
+            "ra_hours": ra.hours,
+            "dec_degrees": dec.degrees,
+            "azimuth": azimuth,
+            "altitude": altitude,
+            "converted_azimuth": con_az,
+            "converted_altitude": con_alt,
+        })
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    timings["total"] = time.perf_counter() - start
+
+    if "expected" in item:
+        expected = item["expected"]
+        result["match"] = (result.get("object", "").lower() == expected["object"].lower()
+                           and (not expected["type"] or result.get("type", "").lower() == expected["type"].lower()))
+    return result
+
+
+def run(items: list[dict], output, workers: int = WORKERS, client: "Client | None" = None) -> dict:
+    """
+    Process 'items' on a pool of 'workers' threads and write one JSON line per item to the
+    file object 'output' as soon as it is done. Returns a summary of the run.
+    """
+    from client import Client
+
+    client = client or Client()
+    write_lock = threading.Lock()
+    failed = matched = expected = 0
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(run_item, client, dict(item, index=i)) for i, item in enumerate(items)]
+        for future in as_completed(futures):
+            result = future.result()
+            failed += "error" in result
+            if "match" in result:
+                expected += 1
+                matched += result["match"]
+            with write_lock:
+                output.write(json.dumps(result, ensure_ascii=False) + "\n")
+                output.flush()
+    elapsed = time.perf_counter() - start
+
+    summary = {
+        "items": len(items),
+        "failed": failed,
+        "seconds": elapsed,
+        "items_per_second": len(items) / elapsed if elapsed else 0.0,
+    }
+    if expected:
+        summary["matched"] = matched
+        summary["accuracy"] = matched / expected
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run WAV files or text commands through the Starseeker pipeline.")
+    parser.add_argument("input", help="directory of WAV files or text file with one command per line")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="size of the worker pool")
+    parser.add_argument("--output", help="JSONL result file, defaults to stdout")
+    parser.add_argument("--expect", action="store_true",
+                        help="text lines carry the expected answer as 'command;Object,Type'")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s %(name)s: %(message)s")
+    items = load_items(args.input, args.expect)
+    if not items:
+        parser.error(f"No items found in {args.input}")
+
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        summary = run(items, output, args.workers)
+    finally:
+        if args.output:
+            output.close()
+    print(json.dumps(summary), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Compare two result files of bench/run.py and report regressions.
+
+    python -m bench.compare baseline.json current.json --threshold 0.10
+
+Exits with status 1 if any p50 got slower by more than the threshold.
+"""
+import argparse
+import json
+import sys
+
+
+def flatten(results: dict) -> dict[str, dict]:
+    """Map 'workload/measurement' to the stats dict of each measurement."""
+    flat = {}
+    for workload, measurements in results["results"].items():
+        for name, entry in measurements.items():
+            flat[f"{workload}/{name}"] = entry
+    return flat
+
+
+def compare(baseline: dict, current: dict, metric: str = "p50", threshold: float = 0.10) -> list[dict]:
+    base = flatten(baseline)
+    curr = flatten(current)
+    rows = []
+    for key in sorted(base.keys() & curr.keys()):
+        old = base[key].get(metric)
+        new = curr[key].get(metric)
+        if not old or new is None:
+            continue
+        change = (new - old) / old
+        rows.append({"measurement": key, "baseline": old, "current": new,
+                     "change": change, "regression": change > threshold})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two Starseeker benchmark results.")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--metric", default="p50", help="statistic to compare, e.g. p50, p95, mean")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed relative slowdown")
+    args = parser.parse_args()
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.current, encoding="utf-8") as f:
+        current = json.load(f)
+
+    rows = compare(baseline, current, args.metric, args.threshold)
+    for row in rows:
+        flag = "REGRESSION" if row["regression"] else ""
+        print(f"{row['measurement']:<40} {row['baseline'] * 1e3:10.3f} ms -> "
+              f"{row['current'] * 1e3:10.3f} ms  {row['change']:+7.1%}  {flag}")
+    sys.exit(1 if any(row["regression"] for row in rows) else 0)
+
+
+if __name__ == "__main__":
+    main()
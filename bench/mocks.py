@@ -0,0 +1,150 @@
+"""
+Local stand-ins for the external services used by Starseeker: the Whisper transcription API,
+the Ollama chat API and the Arduino webserver. Each server answers with a fixed response after
+a configurable latency, so benchmarks and replays do not depend on the SSH tunnels or hardware.
+
+Run standalone with ``python -m bench.mocks`` to serve all three on the default ports.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WHISPER_PORT = 8000
+OLLAMA_PORT = 18080
+ARDUINO_PORT = 8081
+
+
+class MockServer:
+    """
+    Small HTTP server running in a background thread. 'respond' receives method, path and
+    body and returns (status, content type, body bytes). Every request is delayed by
+    'latency' seconds plus a uniform random 'jitter', drawn from a seeded generator, or by
+    the seconds returned by 'latency_for(method, path, body)' if given and not None.
+    """
+
+    def __init__(self, respond, port: int = 0, latency: float = 0.0, jitter: float = 0.0,
+                 seed: int = 0, host: str = "127.0.0.1", latency_for=None):
+        self.respond = respond
+        self.latency = latency
+        self.latency_for = latency_for
+        self.jitter = jitter
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self.requests = 0
+        self.last_path: str | None = None
+        self.last_body: bytes | None = None
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _handle(self, method: str):
+                length = int(self.headers.get("Content-Length", 0))
+                body = self.rfile.read(length) if length else b""
+                time.sleep(server.delay(method, self.path, body))
+                status, content_type, payload = server.respond(method, self.path, body)
+                server.requests += 1
+                server.last_path = self.path
+                server.last_body = body
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                self._handle("GET")
+
+            def do_POST(self):
+                self._handle("POST")
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def delay(self, method: str = "GET", path: str = "/", body: bytes = b"") -> float:
+        if self.latency_for is not None:
+            seconds = self.latency_for(method, path, body)
+            if seconds is not None:
+                return seconds
+        with self._rng_lock:
+            return self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+
+    def start(self) -> "MockServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def _json(payload: dict) -> tuple[int, str, bytes]:
+    return 200, "application/json", json.dumps(payload).encode("utf-8")
+
+
+def whisper_server(text: str = "Zeig mir den Mars", **kwargs) -> MockServer:
+    """Mock of the OpenAI compatible Whisper transcription endpoint."""
+    return MockServer(lambda method, path, body: _json({"text": text}), **kwargs)
+
+
+def ollama_server(answer: str = "Mars,Planet", **kwargs) -> MockServer:
+    """Mock of the Ollama chat endpoint returning a fixed 'Object,Type' answer."""
+    def respond(method, path, body):
+        return _json({"model": "llama3.2", "message": {"role": "assistant", "content": answer}, "done": True})
+    return MockServer(respond, **kwargs)
+
+
+def arduino_server(**kwargs) -> MockServer:
+    """Mock of the Arduino webserver in wifi_servo.ino, which answers every request with OK."""
+    return MockServer(lambda method, path, body: (200, "text/plain", b"OK\r\n"), **kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve mock Whisper, Ollama and Arduino endpoints.")
+    parser.add_argument("--latency", type=float, default=0.0, help="fixed latency per request in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="additional uniform random latency")
+    parser.add_argument("--text", default="Zeig mir den Mars", help="transcript returned by Whisper")
+    parser.add_argument("--answer", default="Mars,Planet", help="answer returned by Ollama")
+    args = parser.parse_args()
+
+    common = {"latency": args.latency, "jitter": args.jitter}
+    servers = [
+        whisper_server(args.text, port=WHISPER_PORT, **common),
+        ollama_server(args.answer, port=OLLAMA_PORT, **common),
+        arduino_server(port=ARDUINO_PORT, **common),
+    ]
+    for server in servers:
+        server.start()
+        print(f"Mock listening on {server.url}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for server in servers:
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""
+Replay captured sessions against the mock servers of bench/mocks.py with their original timing.
+Sessions are recorded by running the GUI or the server with ``STARSEEKER_CAPTURE=<dir>`` (see
+capture.py). Every session is started at its recorded offset from the first one, and the mocks
+answer with the recorded transcript, LLM output and Arduino latency. The results have the format
+of bench/run.py, so two versions can be compared with bench/compare.py on the same workload.
+
+Usage from the repository root:
+    python -m bench.replay captures --output replay.json
+    python -m bench.replay captures --speed 4 --output replay.json
+    python -m bench.compare replay_baseline.json replay.json --metric p95
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import NamedTuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from bench.mocks import MockServer, _json
+from bench.run import environment, stats
+
+
+class Bundle(NamedTuple):
+    record: dict
+    audio: bytes
+
+    def event(self, name: str) -> dict | None:
+        return next((e for e in self.record["events"] if e["event"] == name), None)
+
+    def stage(self, name: str) -> float | None:
+        return next((s["seconds"] for s in self.record["stages"] if s["stage"] == name), None)
+
+
+def load_bundles(directory: str) -> list[Bundle]:
+    """All complete bundles below 'directory', ordered by their start time."""
+    from capture import SESSION_FILE
+
+    bundles = []
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name, SESSION_FILE)
+        if not os.path.exists(path):
+            continue
+        with open(path, encoding="utf-8") as f:
+            record = json.load(f)
+        if record.get("audio") is None or record.get("error") or not any(
+                e["event"] == "transcript" for e in record["events"]):
+            print(f"Skipping incomplete session {name}", file=sys.stderr)
+            continue
+        with open(os.path.join(directory, name, record["audio"]), "rb") as f:
+            bundles.append(Bundle(record, f.read()))
+    bundles.sort(key=lambda b: b.record["started"])
+    return bundles
+
+
+class ReplayServers:
+    """Mock Whisper, Ollama and Arduino servers answering from the recorded bundles."""
+
+    def __init__(self, bundles: list[Bundle], seed: int = 0):
+        self.bundles = bundles
+        self._by_text = {b.event("transcript")["text"]: b for b in bundles}
+        llm = [s for s in (b.stage("llm") for b in bundles) if s is not None]
+        # requests the recording never saw, e.g. sent to the LLM by a changed parser
+        self.default_llm = sorted(llm)[len(llm) // 2] if llm else 0.0
+        self.transmit = [d["elapsed"] for b in bundles if b.event("fan_out")
+                         for d in b.event("fan_out")["devices"] if "elapsed" in d]
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+
+        self.whisper = MockServer(self._whisper, latency_for=self._whisper_latency)
+        self.ollama = MockServer(self._ollama, latency_for=self._ollama_latency)
+        self.arduino = MockServer(lambda method, path, body: (200, "text/plain", b"OK\r\n"),
+                                  latency_for=self._arduino_latency)
+
+    def _match_audio(self, body: bytes) -> Bundle | None:
+        # the WAV file is sent unchanged inside the multipart upload
+        return next((b for b in self.bundles if b.audio in body), None)
+
+    def _whisper(self, method, path, body):
+        bundle = self._match_audio(body)
+        if bundle is None:
+            return 404, "application/json", b'{"error": "unknown audio"}'
+        return _json({"text": bundle.event("transcript")["text"]})
+
+    def _whisper_latency(self, method, path, body):
+        bundle = self._match_audio(body)
+        return bundle.stage("transcribe") if bundle is not None else None
+
+    def _match_text(self, body: bytes) -> Bundle | None:
+        messages = json.loads(body).get("messages", [])
+        text = messages[-1]["content"].removeprefix("Your message is: ") if messages else ""
+        return self._by_text.get(text)
+
+    def _ollama(self, method, path, body):
+        bundle = self._match_text(body)
+        if bundle is None:
+            return 404, "application/json", b'{"error": "unknown text"}'
+        llm = bundle.event("llm")
+        resolved = bundle.event("resolved")
+        content = llm["content"] if llm else f"{resolved['object']},{resolved['type']}"
+        return _json({"model": "llama3.2", "message": {"role": "assistant", "content": content}, "done": True})
+
+    def _ollama_latency(self, method, path, body):
+        bundle = self._match_text(body)
+        if bundle is None:
+            return None
+        seconds = bundle.stage("llm")
+        return seconds if seconds is not None else self.default_llm
+
+    def _arduino_latency(self, method, path, body):
+        if not self.transmit:
+            return None
+        with self._rng_lock:
+            return self._rng.choice(self.transmit)
+
+    def __enter__(self):
+        for server in (self.whisper, self.ollama, self.arduino):
+            server.start()
+        return self
+
+    def __exit__(self, *exc):
+        for server in (self.whisper, self.ollama, self.arduino):
+            server.stop()
+
+
+def replay(bundles: list[Bundle], speed: float = 1.0, seed: int = 0) -> tuple[dict, list[dict]]:
+    """
+    Run all bundles through StarseekerService.process_audio(), each on its own thread at its
+    recorded offset divided by 'speed'. Returns (stats per measurement, per session results).
+    """
+    from client import Client
+    from devices import DeviceRegistry
+    from metrics import metrics
+    from server import StarseekerService
+
+    sessions = [None] * len(bundles)
+    with ReplayServers(bundles, seed) as servers:
+        client = Client(
+            url_whisper=f"{servers.whisper.url}/v1/audio/transcriptions",
+            url_ollama=f"{servers.ollama.url}/api/chat",
+        )
+        service = StarseekerService(client=client, registry=DeviceRegistry.single(servers.arduino.url))
+
+        def run(index: int, bundle: Bundle):
+            stages = []
+            resolved = bundle.event("resolved") or {}
+            session = {"id": bundle.record["id"], "recorded_elapsed": bundle.record["elapsed"],
+                       "recorded_object": resolved.get("object")}
+            start = time.perf_counter()
+            try:
+                with metrics.collect(lambda stage, seconds, labels: stages.append((stage, seconds))):
+                    result = service.process_audio(bundle.audio, point=bundle.event("fan_out") is not None)
+                session["object"] = result["object"]
+            except Exception as e:
+                session["error"] = f"{type(e).__name__}: {e}"
+            session["elapsed"] = time.perf_counter() - start
+            session["stages"] = stages
+            sessions[index] = session
+
+        first = datetime.fromisoformat(bundles[0].record["started"])
+        threads = []
+        start = time.monotonic()
+        for index, bundle in enumerate(bundles):
+            offset = (datetime.fromisoformat(bundle.record["started"]) - first).total_seconds() / speed
+            time.sleep(max(0.0, start + offset - time.monotonic()))
+            thread = threading.Thread(target=run, args=(index, bundle))
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join()
+
+    completed = [s for s in sessions if "error" not in s]
+    results = {}
+    if completed:
+        results["end_to_end"] = stats([s["elapsed"] for s in completed])
+        per_stage: dict[str, list[float]] = {}
+        for session in completed:
+            for stage, seconds in session["stages"]:
+                per_stage.setdefault(stage, []).append(seconds)
+        for stage, samples in sorted(per_stage.items()):
+            results[stage] = stats(samples)
+    return results, sessions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay captured Starseeker sessions against mock servers.")
+    parser.add_argument("captures", help="directory with the bundles written by STARSEEKER_CAPTURE")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="replay faster (>1) or slower (<1) than the sessions were recorded")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the sampled Arduino latencies")
+    parser.add_argument("--output", help="write results as JSON to this file instead of stdout")
+    args = parser.parse_args()
+
+    bundles = load_bundles(args.captures)
+    if not bundles:
+        parser.error(f"No complete sessions in {args.captures}")
+    print(f"Replaying {len(bundles)} sessions...", file=sys.stderr)
+    measurements, sessions = replay(bundles, args.speed, args.seed)
+
+    recorded = [b.record["elapsed"] for b in bundles]
+    output = json.dumps({
+        "environment": environment(),
+        "config": vars(args),
+        "results": {"replay": measurements},
+        "recorded": {"end_to_end": stats(recorded)},
+        # sessions resolved to another object than in the recording
+        "mismatches": [s["id"] for s in sessions if "error" not in s and s["object"] != s["recorded_object"]],
+        "sessions": sessions,
+    }, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    failed = [s for s in sessions if "error" in s]
+    if failed:
+        print(f"{len(failed)} of {len(sessions)} sessions failed", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
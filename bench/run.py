@@ -0,0 +1,341 @@
+"""
+Benchmark suite for Starseeker. External services are replaced by the mock servers in
+bench/mocks.py, so results only depend on the local code and the configured latency.
+
+Usage from the repository root:
+    python -m bench.run --output bench_results.json
+    python -m bench.run --workloads seek,convert --repeat 50
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from bench.mocks import whisper_server, ollama_server, arduino_server
+
+# seconds from launching app.py until its window is mapped, everything heavy must be loaded after it
+STARTUP_BUDGET = 0.5
+# seconds from launching app.py until the background loader has set backend_ready
+READY_BUDGET = 15.0
+
+# objects used by the seek workload, one per object type handled by astro.seek()
+SEEK_TARGETS = [
+    ("Sirius", "Star"),
+    ("Mars", "Planet"),
+    ("Sun", "Star"),
+    ("Moon", "Moon"),
+]
+
+
+def stats(samples: list[float]) -> dict:
+    """Summary statistics in seconds for a list of samples."""
+    ordered = sorted(samples)
+    result = {
+        "n": len(ordered),
+        "mean": statistics.fmean(ordered),
+        "min": ordered[0],
+        "max": ordered[-1],
+        "p50": statistics.median(ordered),
+    }
+    if len(ordered) >= 2:
+        cuts = statistics.quantiles(ordered, n=100, method="inclusive")
+        result["p95"] = cuts[94]
+        result["p99"] = cuts[98]
+    else:
+        result["p95"] = result["p99"] = ordered[0]
+    return result
+
+
+def timeit(func, repeat: int, warmup: int = 1) -> list[float]:
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+# workloads
+
+def parse_importtime(stderr: str) -> tuple[float, list[tuple[str, float]]]:
+    """
+    Total import time in seconds and cumulative time per top level module from the
+    output of 'python -X importtime'.
+    """
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # nested imports are indented below the module that imported them
+        if not name[1:].startswith(" "):
+            modules.append((name.strip(), int(cumulative) / 1e6))
+    return sum(seconds for _, seconds in modules), modules
+
+
+def _gui_command() -> list[str] | None:
+    """Command prefix to run the GUI, under xvfb-run without a display. None if impossible."""
+    if sys.platform != "linux" or os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"):
+        return []
+    xvfb = shutil.which("xvfb-run")
+    return [xvfb, "-a"] if xvfb else None
+
+
+def bench_app_startup(args) -> dict:
+    """
+    Launch the GUI with bench/startup.py and measure the time until its window is mapped and
+    until the background loader is ready. The startup budgets apply to these times.
+    """
+    prefix = _gui_command()
+    if prefix is None:
+        return {"skipped": "no display and no xvfb-run"}
+    window, ready, errors = [], [], []
+    for _ in range(max(1, args.repeat // 10)):
+        proc = subprocess.run([*prefix, sys.executable, "-m", "bench.startup", repr(time.time())],
+                              cwd=ROOT, check=True, capture_output=True, text=True)
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        if result["error"] is not None:
+            errors.append(result["error"])
+        if result["window"] is not None:
+            window.append(result["window"])
+        if result["ready"] is not None and result["error"] is None:
+            ready.append(result["ready"])
+
+    results = {"errors": errors}
+    if window:
+        results["window"] = stats(window)
+        results["window"]["budget"] = args.startup_budget
+        results["window"]["over_budget"] = results["window"]["p50"] > args.startup_budget
+    if ready:
+        results["ready"] = stats(ready)
+        results["ready"]["budget"] = args.ready_budget
+        results["ready"]["over_budget"] = results["ready"]["p50"] > args.ready_budget
+    return results
+
+
+def bench_startup(args) -> dict:
+    """
+    Cold import of astro.py in a fresh interpreter, including ephemeris and catalog loading,
+    the import time of app.py per module, and the time until the GUI shows its window and
+    finished loading, see bench_app_startup().
+    """
+    samples = []
+    for _ in range(max(1, args.repeat // 10)):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "import astro"], cwd=ROOT, check=True)
+        samples.append(time.perf_counter() - start)
+
+    app_samples, slowest = [], []
+    for _ in range(max(1, args.repeat // 10)):
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app"],
+                              cwd=ROOT, check=True, capture_output=True, text=True)
+        total, modules = parse_importtime(proc.stderr)
+        app_samples.append(total)
+        slowest = sorted(modules, key=lambda item: item[1], reverse=True)[:10]
+
+    import_app = stats(app_samples)
+    import_app["slowest"] = [{"module": name, "seconds": seconds} for name, seconds in slowest]
+    return {"import_astro": stats(samples), "import_app": import_app, "app": bench_app_startup(args)}
+
+
+def bench_seek(args) -> dict:
+    import astro
+
+    results = {}
+    for skyobj, skytyp in SEEK_TARGETS:
+        # uncached computation and memoized repeats within one time bucket
+        samples = timeit(lambda: astro._seek(skyobj, skytyp, astro.eph), args.repeat)
+        results[f"{skytyp.lower()}:{skyobj.lower()}"] = stats(samples)
+        samples = timeit(lambda: astro.seek(skyobj, skytyp), args.repeat)
+        results[f"{skytyp.lower()}:{skyobj.lower()}:cached"] = stats(samples)
+    return results
+
+
+def bench_convert(args) -> dict:
+    import astro
+
+    ra, dec = astro.seek("Sirius", "Star")
+    results = {}
+    for name, func in (("convert", astro._convert), ("convert:cached", lambda *a: astro.convert(*a[:2]))):
+        samples = timeit(lambda: func(ra, dec, astro.OBSERVER_LAT, astro.OBSERVER_LON, astro.OBSERVER_HEIGHT),
+                         args.repeat)
+        result = stats(samples)
+        result["calls_per_second"] = len(samples) / sum(samples)
+        results[name] = result
+    return results
+
+
+def bench_recorder(args) -> dict:
+    """Overhead of AudioRecorder._audio_callback per block for synthetic audio, recording and pre-roll."""
+    import numpy as np
+    from recorder import AudioRecorder
+
+    blocksize = 512
+    rng = np.random.default_rng(0)
+    block = rng.uniform(-0.5, 0.5, size=(blocksize, 1)).astype(np.float32)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        recorder = AudioRecorder(tmp)
+        recorder._recording = True
+        samples = timeit(lambda: recorder._audio_callback(block, blocksize, None, None), args.repeat * 100)
+        recorder._recording = False
+        # a warm stream between recordings only fills the pre-roll ring
+        preroll_samples = timeit(lambda: recorder._audio_callback(block, blocksize, None, None), args.repeat * 100)
+
+        # encoding of ten seconds of audio as done by stop()
+        frames = [block] * (10 * recorder.fs // blocksize)
+
+        def encode():
+            recorder._frames = list(frames)
+            recorder._recording = True
+            recorder.stop()
+
+        encode_samples = timeit(encode, max(1, args.repeat // 10))
+    return {"callback": stats(samples), "callback_preroll": stats(preroll_samples),
+            "encode_10s": stats(encode_samples)}
+
+
+def bench_parallel(args) -> dict:
+    """Throughput of uncached seek + convert on a thread pool and on the process pool of workers.py."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    import astro
+    from workers import WorkerPool
+
+    n_workers = os.cpu_count() or 1
+    jobs = SEEK_TARGETS * max(1, args.repeat)
+    location = (astro.OBSERVER_LAT, astro.OBSERVER_LON, astro.OBSERVER_HEIGHT)
+
+    def pointing(skyobj, skytyp):
+        ra, dec = astro._seek(skyobj, skytyp, astro.eph)
+        return astro._convert(ra, dec, *location)
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=n_workers) as executor:
+        start = time.perf_counter()
+        list(executor.map(lambda job: pointing(*job), jobs))
+        results["threads"] = {"workers": n_workers, "items_per_second": len(jobs) / (time.perf_counter() - start)}
+
+    pool = WorkerPool(n_workers)
+    try:
+        pool.warm()
+        start = time.perf_counter()
+        for future in [pool.pointing(skyobj, skytyp, *location) for skyobj, skytyp in jobs]:
+            future.result()
+        results["processes"] = {"workers": n_workers, "items_per_second": len(jobs) / (time.perf_counter() - start)}
+    finally:
+        pool.shutdown()
+    return results
+
+
+def bench_client(args) -> dict:
+    """Round trips of Client and transmit() against mock Whisper, Ollama and Arduino servers."""
+    import numpy as np
+    from scipy.io.wavfile import write as wav_write
+    from client import Client
+    from astro import transmit
+
+    common = {"latency": args.latency, "jitter": args.jitter}
+    with whisper_server(**common) as whisper, ollama_server(**common) as ollama, \
+            arduino_server(**common) as arduino, tempfile.TemporaryDirectory() as tmp:
+        wav_path = os.path.join(tmp, "bench.wav")
+        wav_write(wav_path, 16000, np.zeros(3 * 16000, dtype=np.int16))
+
+        client = Client(
+            url_whisper=f"{whisper.url}/v1/audio/transcriptions",
+            url_ollama=f"{ollama.url}/api/chat",
+        )
+        return {
+            "transcribe": stats(timeit(lambda: client.transcribe(wav_path), args.repeat)),
+            "query_object": stats(timeit(lambda: client.query_object("Zeig mir den Mars"), args.repeat)),
+            "resolve": stats(timeit(lambda: client.resolve("Zeig mir den Mars"), args.repeat)),
+            "transmit": stats(timeit(lambda: transmit(arduino.url, 45.0, 90.0), args.repeat)),
+        }
+
+
+WORKLOADS = {
+    "startup": bench_startup,
+    "seek": bench_seek,
+    "convert": bench_convert,
+    "recorder": bench_recorder,
+    "parallel": bench_parallel,
+    "client": bench_client,
+}
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Starseeker benchmark suite.")
+    parser.add_argument("--workloads", default=",".join(WORKLOADS),
+                        help=f"comma separated subset of: {', '.join(WORKLOADS)}")
+    parser.add_argument("--repeat", type=int, default=20, help="repetitions per measurement")
+    parser.add_argument("--latency", type=float, default=0.0, help="latency of the mock servers in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="random extra latency of the mock servers")
+    parser.add_argument("--output", help="write results as JSON to this file instead of stdout")
+    parser.add_argument("--startup-budget", type=float, default=STARTUP_BUDGET,
+                        help="maximum seconds until the window of app.py is mapped, exceeding it fails the run")
+    parser.add_argument("--ready-budget", type=float, default=READY_BUDGET,
+                        help="maximum seconds until app.py finished loading, exceeding it fails the run")
+    args = parser.parse_args()
+
+    results = {"environment": environment(), "config": vars(args), "results": {}}
+    for name in args.workloads.split(","):
+        name = name.strip()
+        if name not in WORKLOADS:
+            parser.error(f"Unknown workload: {name}")
+        print(f"Running {name}...", file=sys.stderr)
+        results["results"][name] = WORKLOADS[name](args)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    startup = results["results"].get("startup", {}).get("app", {})
+    if "skipped" in startup:
+        print(f"GUI startup not measured: {startup['skipped']}", file=sys.stderr)
+    failed = False
+    for name, label in (("window", "window of app.py mapped"), ("ready", "app.py finished loading")):
+        measured = startup.get(name)
+        if measured and measured["over_budget"]:
+            print(f"Startup budget exceeded: {label} after {measured['p50']:.3f} s, "
+                  f"budget {measured['budget']:.3f} s", file=sys.stderr)
+            failed = True
+    if startup.get("errors"):
+        print(f"GUI startup failed: {startup['errors'][0]}", file=sys.stderr)
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
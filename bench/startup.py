@@ -0,0 +1,64 @@
+"""
+Startup harness for bench/run.py: starts the GUI of app.py like a visitor would and reports
+how long it takes until the window is mapped and until RecorderApp.backend_ready is set,
+both counted from the launch time given on the command line. Prints the result as JSON.
+
+Needs a display. bench/run.py starts it under xvfb-run if DISPLAY is not set.
+
+Usage from the repository root:
+    python -m bench.startup "$(python -c 'import time; print(time.time())')"
+"""
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# seconds the harness waits for the background loader before giving up
+READY_TIMEOUT = 300.0
+# interval in ms in which the harness checks backend_ready
+POLL_MS = 10
+
+
+def main():
+    launched = float(sys.argv[1]) if len(sys.argv) > 1 else time.time()
+    result = {"window": None, "ready": None, "error": None}
+
+    import tkinter as tk
+    from tkinter import messagebox
+
+    import app
+
+    # a failed load opens an error dialog, which would block the harness
+    messagebox.showerror = lambda title, message: None
+
+    root = tk.Tk()
+    recorder_app = app.RecorderApp(root)
+
+    def mapped(event):
+        if event.widget is root and result["window"] is None:
+            result["window"] = time.time() - launched
+
+    def poll():
+        if recorder_app.backend_ready.is_set():
+            result["ready"] = time.time() - launched
+            if recorder_app.backend_error is not None:
+                result["error"] = f"{type(recorder_app.backend_error).__name__}: {recorder_app.backend_error}"
+            root.destroy()
+        elif time.time() - launched > READY_TIMEOUT:
+            result["error"] = "timeout"
+            root.destroy()
+        else:
+            root.after(POLL_MS, poll)
+
+    root.bind("<Map>", mapped)
+    root.after(POLL_MS, poll)
+    root.mainloop()
+    print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# directory for replay bundles, requests are only captured if STARSEEKER_CAPTURE is set
+CAPTURE_DIR = os.environ.get("STARSEEKER_CAPTURE", "")
+# files of one bundle, a directory per captured request
+SESSION_FILE = "session.json"
+AUDIO_FILE = "audio.wav"
+
+# capture of the request handled in the current context, copied into its worker threads
+_capture: ContextVar["Capture | None"] = ContextVar("capture", default=None)
+
+
+class Capture:
+    """
+    Replay bundle of one request: the recorded audio, the pipeline events (transcript, LLM output,
+    resolved object, computed coordinates) and the stage timings of metrics.py, each with its
+    offset from the start of the request. bench/replay.py runs the bundles again.
+    """
+
+    def __init__(self, directory: str, source: str):
+        self.id = f"{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:8]}"
+        self.path = os.path.join(directory, self.id)
+        self._start = time.perf_counter()
+        self.record = {
+            "id": self.id,
+            "source": source,
+            "started": datetime.now(timezone.utc).isoformat(),
+            "audio": None,
+            "events": [],
+            "stages": [],
+        }
+        os.makedirs(self.path, exist_ok=True)
+
+    def offset(self) -> float:
+        return time.perf_counter() - self._start
+
+    def audio(self, audio: bytes | str):
+        """Store the request audio, given as WAV bytes or the path of a WAV file."""
+        target = os.path.join(self.path, AUDIO_FILE)
+        if isinstance(audio, str):
+            shutil.copyfile(audio, target)
+        else:
+            with open(target, "wb") as f:
+                f.write(audio)
+        self.record["audio"] = AUDIO_FILE
+
+    def event(self, name: str, **data):
+        self.record["events"].append({"event": name, "offset": self.offset(), **data})
+
+    def stage(self, stage: str, seconds: float, labels: dict):
+        self.record["stages"].append({"stage": stage, "seconds": seconds, "offset": self.offset(), **labels})
+
+    def save(self, error: str | None = None):
+        self.record["elapsed"] = self.offset()
+        if error is not None:
+            self.record["error"] = error
+        with open(os.path.join(self.path, SESSION_FILE), "w", encoding="utf-8") as f:
+            # numpy scalars from the astronomy stages are written as plain numbers
+            json.dump(self.record, f, indent=2, default=float)
+        logger.info(f"Captured session {self.id}")
+
+
+@contextmanager
+def session(source: str, directory: str | None = None):
+    """
+    Capture the request handled in the enclosed block into a replay bundle.
+    Yields the Capture, or None if capturing is disabled.
+    """
+    directory = CAPTURE_DIR if directory is None else directory
+    if not directory:
+        yield None
+        return
+    capture = Capture(directory, source)
+    token = _capture.set(capture)
+    error = None
+    try:
+        with metrics.collect(capture.stage):
+            yield capture
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _capture.reset(token)
+        capture.save(error)
+
+
+def note(name: str, **data):
+    """Add an event to the capture of the current context, cheap if nothing is captured."""
+    capture = _capture.get()
+    if capture is not None:
+        capture.event(name, **data)
+
+
+def audio(audio: bytes | str):
+    """Store the audio of the request captured in the current context, if any."""
+    capture = _capture.get()
+    if capture is not None:
+        capture.audio(audio)
@@ -1,40 +1,184 @@
+import logging
 import os
-import requests
+import re
+from typing import NamedTuple
+
+import capture
+from latency import LatencyTracker, hedged, timed_call
+from metrics import span, incr
+import names
+import stt
 
 WHISPER_PORT = 8000
 OLLAMA_PORT = 18080
+# optional second endpoints for hedged requests, a URL or 'local' for the in-process Whisper model
+WHISPER_HEDGE = os.environ.get("STARSEEKER_WHISPER_HEDGE") or None
+OLLAMA_HEDGE = os.environ.get("STARSEEKER_OLLAMA_HEDGE") or None
+
+logger = logging.getLogger(__name__)
+
+# minimum confidence of the rule based parser, below it the LLM is asked
+CONFIDENCE_THRESHOLD = 0.8
+
+# common visitor requests on the normalized transcript (lowercase, no umlauts or punctuation).
+# 'object' captures the phrase naming the sky object, the weight is the trust in the pattern.
+COMMAND_PATTERNS = [
+    (re.compile(r"^(?:bitte )?zeige? (?:mir |uns )?(?:bitte )?(?:mal )?(?P<object>.+?)(?: bitte)?$"), 1.0),
+    (re.compile(r"^(?:ich|wir) (?:mochte|mochten|will|wollen|wurde gerne?|wurden gerne?) "
+                r"(?:gerne? )?(?:mal )?(?P<object>.+?) sehen(?: bitte)?$"), 1.0),
+    (re.compile(r"^wo (?:ist|steht|befindet sich|sehe ich|finde ich) (?:gerade |jetzt |heute )?"
+                r"(?P<object>.+?)(?: gerade| jetzt| heute| am himmel)?$"), 1.0),
+    (re.compile(r"^(?:kannst|konntest) du (?:mir |uns )?(?:bitte )?(?P<object>.+?) zeigen(?: bitte)?$"), 1.0),
+    (re.compile(r"^(?:please )?(?:show me|where is|point at|point to) (?:the )?(?P<object>.+?)(?: please)?$"), 0.9),
+]
+
+# leading words naming the kind of object, e.g. 'den Stern Sirius' or 'den Planeten Mars'
+TYPE_WORDS = {
+    "stern": "Star", "star": "Star", "fixstern": "Star",
+    "planet": "Planet", "planeten": "Planet",
+    "satellit": "Satellite", "satelliten": "Satellite", "satellite": "Satellite",
+    "mond": "Moon",
+}
+ARTICLES = ("der", "die", "das", "den", "dem", "des", "the", "einen", "ein", "eine")
+
+
+class Intent(NamedTuple):
+    """Result of the rule based parser: object and type as used by seek() and a confidence."""
+    object: str
+    type: str
+    confidence: float
+    phrase: str
+
+
+def _object_phrase(phrase: str) -> tuple[str, str | None]:
+    """Strip articles and type words from the captured phrase, return it with the type hint."""
+    words = phrase.split()
+    type_hint = None
+    while words and (words[0] in ARTICLES or words[0] in TYPE_WORDS):
+        word = words.pop(0)
+        # 'den Mond' names the object itself, only a following name makes it a type word
+        if word in TYPE_WORDS and words:
+            type_hint = TYPE_WORDS[word]
+        elif word in TYPE_WORDS:
+            words.insert(0, word)
+            break
+    return " ".join(words), type_hint
+
+
+def parse_command(text: str) -> Intent | None:
+    """
+    Extract the sky object from transcripts like 'Zeig mir den Mars', 'Ich möchte Wega sehen'
+    or 'Wo ist die ISS?' with the command patterns and the catalog name index. The confidence
+    combines the pattern weight, the name match score and whether a spoken type word agrees.
+    Returns None if the transcript names nothing in the catalog.
+    """
+    key = names.normalize(text)
+    phrase, weight = key, 0.7
+    for pattern, pattern_weight in COMMAND_PATTERNS:
+        match = pattern.match(key)
+        if match:
+            phrase, weight = match.group("object"), pattern_weight
+            break
+
+    phrase, type_hint = _object_phrase(phrase)
+    if not phrase:
+        return None
+    try:
+        entry, score = names.index().resolve(phrase)
+    except ValueError:
+        return None
+
+    confidence = weight * score
+    if type_hint is not None and type_hint != entry.type:
+        confidence *= 0.5
+    return Intent(entry.name, entry.type, confidence, phrase)
 
 class Client:
     """
     Handles communication with Whisper for transcription and Ollama for parsing. Requires the setup
-    of SSH tunnels as described in the README. Contains the Ollama system prompt.
+    of SSH tunnels as described in the README, transcription can also run in-process (stt.py).
+    Contains the Ollama system prompt.
     """
 
     def __init__(self,
                  url_whisper: str = f"http://localhost:{WHISPER_PORT}/v1/audio/transcriptions",
-                 url_ollama: str = f"http://localhost:{OLLAMA_PORT}/api/chat"):
+                 url_ollama: str = f"http://localhost:{OLLAMA_PORT}/api/chat",
+                 transcriber: stt.Transcriber | None = None,
+                 hedge_whisper: str | None = WHISPER_HEDGE,
+                 hedge_ollama: str | None = OLLAMA_HEDGE):
         self.url_whisper = url_whisper
         self.url_ollama = url_ollama
+        # rolling latencies per endpoint for adaptive timeouts and hedging, see latency.py;
+        # partial transcripts of short clips are kept apart from the full recordings
+        self.latency = {name: LatencyTracker(name) for name in
+                        ("whisper", "whisper_hedge", "whisper_partial", "ollama", "ollama_hedge")}
+        # Whisper server, in-process model or automatic choice, see stt.py
+        self.transcriber = transcriber or stt.create(url_whisper, tracker=self.latency["whisper"])
+        # optional second endpoint that gets a duplicate request when the first one is slow
+        self.hedge_transcriber = None
+        if hedge_whisper == "local":
+            self.hedge_transcriber = stt.LocalWhisper()
+        elif hedge_whisper:
+            self.hedge_transcriber = stt.WhisperServer(hedge_whisper, tracker=self.latency["whisper_hedge"])
+        self.hedge_ollama = hedge_ollama
 
     def transcribe(self, wav_path: str) -> str:
         """Use Whisper to transcribe input audio into text string."""
         if not os.path.exists(wav_path):
             raise FileNotFoundError(wav_path)
 
-        print("Transcribing via Whisper server...")
-        with open(wav_path, "rb") as f:
-            files = {"file": (os.path.basename(wav_path), f, "audio/wav")}
-            data = {"model": "whisper-1"}
-            resp = requests.post(self.url_whisper, files=files, data=data, timeout=120)
-
-        resp.raise_for_status()
-        whisper_json = resp.json()
-        text = whisper_json.get("text", "").strip()
+        logger.info(f"Transcribing via {self.transcriber.name} backend...")
+        attempts = [self._transcribe_attempt(self.transcriber, wav_path)]
+        if self.hedge_transcriber is not None:
+            attempts.append(self._transcribe_attempt(self.hedge_transcriber, wav_path))
+        with span("transcribe"):
+            text = hedged(attempts, self.latency["whisper"])
         if not text:
             raise RuntimeError("Whisper did not return text")
-        print(f"Transcribed text: {text}")
+        logger.info(f"Transcribed text: {text}")
+        capture.note("transcript", text=text, backend=self.transcriber.name)
         return text
 
+    @staticmethod
+    def _transcribe_attempt(transcriber: stt.Transcriber, wav_path: str):
+        """Attempt for hedged(), the session is only used by the Whisper server backend."""
+        if isinstance(transcriber, stt.WhisperServer):
+            return lambda session, cancel: transcriber.transcribe(wav_path, cancel=cancel, session=session)
+        return lambda session, cancel: transcriber.transcribe(wav_path, cancel=cancel)
+
+    def _chat(self, payload: dict) -> dict:
+        """POST to Ollama with an adaptive timeout, hedged to the second endpoint if configured."""
+        def attempt(url: str, tracker: LatencyTracker):
+            def post(session, cancel):
+                resp = timed_call(tracker, session.post, url, json=payload, timeout=tracker.timeout())
+                resp.raise_for_status()
+                return resp.json()
+            return post
+
+        attempts = [attempt(self.url_ollama, self.latency["ollama"])]
+        if self.hedge_ollama:
+            attempts.append(attempt(self.hedge_ollama, self.latency["ollama_hedge"]))
+        return hedged(attempts, self.latency["ollama"])
+
+    def resolve(self, text: str) -> tuple[str, str]:
+        """
+        Object and type for a transcript. Clear commands are answered by the rule based parser,
+        only ambiguous ones are sent to Ollama via query_object().
+        """
+        with span("parse"):
+            intent = parse_command(text)
+        if intent is not None and intent.confidence >= CONFIDENCE_THRESHOLD:
+            incr("resolved", source="rules")
+            logger.info(f"Parsed '{intent.phrase}' as {intent.object}, {intent.type} "
+                        f"(confidence {intent.confidence:.2f})")
+            capture.note("resolved", object=intent.object, type=intent.type, source="rules",
+                         confidence=intent.confidence)
+            return intent.object, intent.type
+        if intent is not None:
+            logger.info(f"Low confidence {intent.confidence:.2f} for '{intent.phrase}', asking Ollama")
+        incr("resolved", source="llm")
+        return self.query_object(text)
+
     def query_object(self, text: str) -> tuple[str, str]:
         """
         Ask Ollama to interpret the TTS 'text' and convert it into 'Object,Type'.
@@ -45,9 +189,9 @@ class Client:
             "You will return a response in the format 'Object,Type'. The Input will include a astronomical object that someone wants to see. "
             "Return the english common name of the object for the first parameter 'Object'. For the parameter 'Type' the options are: 'Star', 'Planet' or 'Satellite'. "
             "Choose the correct type for the object you determined. Make sure that your response is in english and never a full sentence. "
-            "If the object is a star other than our sun, always return the Hipparcos Identifier for the object and never the name of the star. Make sure you look this up in a current database such as Vizier and it is correct."
-            "For example, if the input is 'Zeige mir den Stern Sirius', your response should be '32349,Star'. "
-            "If the input is 'Ich möchte den Polarstern sehen', your response should be '11767,Star'."
+            "If the object is a star other than our sun, return its english proper name. Only if the star has no proper name, return its Bayer designation such as 'Alpha Centauri' or its Hipparcos Identifier. "
+            "For example, if the input is 'Zeige mir den Stern Sirius', your response should be 'Sirius,Star'. "
+            "If the input is 'Ich möchte den Polarstern sehen', your response should be 'Polaris,Star'."
 			"If the object is a planet, return the response as 'Name,Planet'. For example, if the input was 'Bitte zeige mir den Uranus', your response should be 'Uranus,Planet'."
         )
 
@@ -56,16 +200,14 @@ class Client:
             {"role": "user", "content": f"Your message is: {text}"},
         ]
 
-        print("Querying Ollama...")
-        resp = requests.post(
-            self.url_ollama,
-            json={"model": "llama3.2", "messages": messages, "stream": False},
-            timeout=120,
-        )
-        resp.raise_for_status()
-        oj = resp.json()
+        logger.info("Querying Ollama...")
+        payload = {"model": "llama3.2", "messages": messages, "stream": False}
+        incr("bytes_sent", len(system_prompt) + len(text), target="ollama")
+        with span("llm"):
+            oj = self._chat(payload)
         output = oj.get("message", {}).get("content", "").strip()
-        print(f"Output Ollama: {output}")
+        logger.info(f"Output Ollama: {output}")
+        capture.note("llm", content=output)
 
         parsed = None
         for line in output.splitlines():
@@ -83,5 +225,11 @@ class Client:
         # split response into the two important parts and return those
         skyobj = skyo[0].strip()
         skytyp = skyo[1].strip()
-        print(f"Skyobj: {skyobj}, Skytyp: {skytyp}")
+
+        # prefer the catalog name and type if the object is known to the name index
+        entry = names.index().lookup(skyobj)
+        if entry is not None:
+            skyobj, skytyp = entry.name, entry.type
+        logger.info(f"Skyobj: {skyobj}, Skytyp: {skytyp}")
+        capture.note("resolved", object=skyobj, type=skytyp, source="llm")
         return skyobj, skytyp
@@ -0,0 +1,359 @@
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+
+import numpy as np
+import requests
+from astropy.coordinates import SkyCoord, EarthLocation, AltAz
+from astropy.time import Time
+from astropy import units as u
+
+import astro
+import capture
+import mount
+import satellites
+import slew
+
+logger = logging.getLogger(__name__)
+
+# registry of the laser pointers on the field. Without the file a single device at
+# astro.TRANSMIT_URL and the default observer location is used.
+DEVICES_PATH = os.path.join(os.path.dirname(__file__), "devices.json")
+# seconds a board may take to accept a command before it is reported as timed out
+DEFAULT_TIMEOUT = 2.0
+# satellites are followed along a precomputed track, sampled at this rate
+TRACK_RATE_HZ = 10.0
+# seconds between two tracks while a satellite is followed, a track lasts slew.MAX_POINTS samples
+TRACK_REFRESH = 4.0
+# seconds a satellite is followed after it was pointed at
+FOLLOW_SECONDS = float(os.environ.get("STARSEEKER_FOLLOW_SECONDS", "120"))
+
+
+class Device:
+    """One Arduino laser pointer with its own location and mount calibration."""
+
+    def __init__(self, name: str, url: str,
+                 lat_deg: float = astro.OBSERVER_LAT,
+                 lon_deg: float = astro.OBSERVER_LON,
+                 height_m: float = astro.OBSERVER_HEIGHT,
+                 calibration: mount.Calibration | None = None,
+                 timeout: float = DEFAULT_TIMEOUT,
+                 trajectory: bool = True):
+        self.name = name
+        self.url = url
+        self.lat_deg = lat_deg
+        self.lon_deg = lon_deg
+        self.height_m = height_m
+        self.calibration = calibration or mount.default_calibration()
+        self.timeout = timeout
+        # send planned trajectories, boards with the old sketch only understand single angles
+        self.trajectory = trajectory
+        # last commanded servo azimuth/altitude, assumed at the power up pose until the first move
+        self.position = slew.HOME
+        # satellite whose track the board is following, it is somewhere on that track then
+        self.tracking: str | None = None
+        self.position_lock = threading.Lock()
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Device":
+        data = dict(data)
+        if "calibration" in data:
+            data["calibration"] = mount.Calibration.from_dict(data["calibration"])
+        return cls(**data)
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "url": self.url,
+            "lat_deg": self.lat_deg,
+            "lon_deg": self.lon_deg,
+            "height_m": self.height_m,
+            "calibration": self.calibration.to_dict(),
+            "timeout": self.timeout,
+            "trajectory": self.trajectory,
+        }
+
+    def __repr__(self):
+        return f"Device({self.name!r}, {self.url!r})"
+
+
+class DeviceRegistry:
+    """
+    All pointers on the field. fan_out() computes alt/az for every device location in one
+    vectorized Astropy transform and sends the commands to all boards concurrently,
+    each request bounded by the timeout of its device. Every board has its own sender
+    thread, a board still busy with its previous command is skipped.
+    """
+
+    def __init__(self, devices: list[Device]):
+        if not devices:
+            raise ValueError("At least one device is required.")
+        self.devices = devices
+        self.by_name = {device.name: device for device in devices}
+        # one sender thread per board, so a hung board never blocks the commands to the others
+        self._executors = {device.name: ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"transmit-{device.name}")
+                           for device in devices}
+        # last command per board, a new one is only sent once it has finished
+        self._pending: dict[str, Future] = {}
+        self._pending_lock = threading.Lock()
+        # set to end the follow() loop of the current satellite
+        self._follow_stop: threading.Event | None = None
+        self._follow_lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: str = DEVICES_PATH) -> "DeviceRegistry":
+        if not os.path.exists(path):
+            return cls.single(astro.TRANSMIT_URL)
+        with open(path, encoding="utf-8") as f:
+            devices = [Device.from_dict(entry) for entry in json.load(f)]
+        logger.info(f"Loaded {len(devices)} devices from {path}")
+        return cls(devices)
+
+    @classmethod
+    def single(cls, url: str) -> "DeviceRegistry":
+        """Registry with one device at the default observer location."""
+        return cls([Device("default", url)])
+
+    def save(self, path: str = DEVICES_PATH):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump([device.to_dict() for device in self.devices], f, indent=2)
+
+    def get(self, name: str) -> Device:
+        if name not in self.by_name:
+            raise ValueError(f"Unknown device: {name}")
+        return self.by_name[name]
+
+    # pointing
+
+    def altaz(self, right_ascension, declination, devices: list[Device] | None = None) -> list[dict]:
+        """
+        Azimuth/altitude and servo angles of one RA/Dec target for every device,
+        transformed for all device locations at once.
+        """
+        devices = devices or self.devices
+        location = EarthLocation(
+            lat=np.array([d.lat_deg for d in devices]) * u.deg,
+            lon=np.array([d.lon_deg for d in devices]) * u.deg,
+            height=np.array([d.height_m for d in devices]) * u.m,
+        )
+        target = SkyCoord(ra=right_ascension.hours * u.hour, dec=declination.degrees * u.deg, frame="icrs")
+        obstime = Time(datetime.now(timezone.utc), scale="utc")
+        altaz = target.transform_to(AltAz(obstime=obstime, location=location))
+        azimuth = np.atleast_1d(altaz.az.degree)
+        altitude = np.atleast_1d(altaz.alt.degree)
+
+        results = []
+        for device, az, alt in zip(devices, azimuth, altitude):
+            con_az, con_alt, _ = mount.servo_angles(az, alt, device.calibration)
+            results.append({
+                "device": device.name,
+                "url": device.url,
+                "azimuth": float(az),
+                "altitude": float(alt),
+                "converted_azimuth": con_az,
+                "converted_altitude": con_alt,
+            })
+        return results
+
+    @staticmethod
+    def _send(device: Device, move: slew.Slew) -> dict:
+        start = time.perf_counter()
+        outcome = {"transmitted": False}
+        try:
+            if device.trajectory:
+                outcome["status"] = astro.transmit_path(device.url, move.points, move.interval, timeout=device.timeout)
+            else:
+                outcome["status"] = astro.transmit(device.url, move.target[1], move.target[0], timeout=device.timeout)
+            outcome["transmitted"] = outcome["status"] == 200
+            if outcome["transmitted"]:
+                with device.position_lock:
+                    device.position = move.target
+        except requests.RequestException as e:
+            outcome["error"] = str(e)
+        outcome["elapsed"] = time.perf_counter() - start
+        return outcome
+
+    def _submit(self, device: Device, move: slew.Slew) -> Future | None:
+        """Send 'move' on the thread of the device, None if its previous command is still running."""
+        with self._pending_lock:
+            previous = self._pending.get(device.name)
+            if previous is not None and not previous.done():
+                return None
+            # the transmit span belongs to the capture of the request that moved the device
+            future = self._executors[device.name].submit(contextvars.copy_context().run, self._send, device, move)
+            self._pending[device.name] = future
+            return future
+
+    def fan_out(self, right_ascension, declination, names: list[str] | None = None) -> list[dict]:
+        """
+        Point all devices (or the ones in 'names') at a target. Devices that see it below
+        the horizon or are still busy with their previous command are skipped. Each device
+        gets a trajectory from its last position, the results carry its duration as 'slew_time'.
+        Returns one result per device in registry order.
+        """
+        devices = [self.get(name) for name in names] if names else self.devices
+        self._end_follow()
+        results = self.altaz(right_ascension, declination, devices)
+
+        futures = {}
+        for device, result in zip(devices, results):
+            result["transmitted"] = False
+            if result["altitude"] < 0:
+                result["error"] = "below horizon"
+                continue
+            with device.position_lock:
+                position = device.position
+            move = slew.plan(position, result["azimuth"], result["altitude"], device.calibration)
+            result["converted_azimuth"], result["converted_altitude"] = move.target
+            result["slew_time"] = move.duration
+            future = self._submit(device, move)
+            if future is None:
+                result["error"] = "busy"
+                continue
+            futures[future] = result
+
+        self._collect(futures, devices)
+        for device, result in zip(devices, results):
+            if result["transmitted"]:
+                with device.position_lock:
+                    device.tracking = None
+        self._log(results)
+        capture.note("fan_out", ra_hours=right_ascension.hours, dec_degrees=declination.degrees, devices=results)
+        return results
+
+    def _collect(self, futures: dict[Future, dict], devices: list[Device]):
+        # requests applies the timeout per socket operation, the wait bounds the whole exchange
+        done, pending = wait(futures, timeout=max(d.timeout for d in devices) * 2)
+        for future in done:
+            futures[future].update(future.result())
+        for future in pending:
+            futures[future]["error"] = "timeout"
+
+    @staticmethod
+    def _log(results: list[dict]):
+        for result in results:
+            if result["transmitted"]:
+                logger.info(f"Information transmitted to {result['device']} ({result['url']})")
+            elif result.get("error") == "below horizon":
+                logger.info(f"Object is below the horizon of {result['device']}")
+            else:
+                logger.warning(f"Transmission to {result['device']} failed: "
+                               f"{result.get('error', result.get('status'))}")
+
+    # satellites
+
+    def _track_move(self, device: Device, satellite: str, track_az, track_alt, result: dict) -> slew.Slew | None:
+        """
+        Move of one device onto a satellite track: the slew to the first sample it can reach,
+        then the track itself until the satellite sets or the mount has to flip over.
+        """
+        servo_az, servo_alt, flipped = mount.servo_angles(track_az, track_alt, device.calibration)
+        track = np.column_stack([servo_az, servo_alt])
+        result["converted_azimuth"], result["converted_altitude"] = float(track[0, 0]), float(track[0, 1])
+        if not track_alt[0] >= 0:
+            result["error"] = "below horizon"
+            return None
+        interval = 1.0 / TRACK_RATE_HZ
+        if not device.trajectory:
+            # boards with the old sketch get the current position on every refresh
+            return slew.Slew(tuple(track[0]), bool(flipped[0]), 0.0, interval, track[:1])
+
+        with device.position_lock:
+            # a board following the track is at its current sample, not at the end of the last one
+            position = track[0] if device.tracking == satellite else device.position
+        index, approach = slew.intercept(position, track, interval)
+        # NaN altitudes of SGP4 errors compare False and end the track as well
+        follows = (track_alt[index:] >= 0) & (flipped[index:] == flipped[index])
+        end = index + (int(np.argmin(follows)) if not follows.all() else len(follows))
+        points = np.concatenate([approach, track[index + 1:end]])[:slew.MAX_POINTS]
+        result["slew_time"] = index * interval
+        return slew.Slew(tuple(points[-1]), bool(flipped[index]), len(points) * interval, interval, points)
+
+    def track(self, satellite: str, names: list[str] | None = None) -> list[dict]:
+        """
+        Send every device (or the ones in 'names') a track of the satellite for the next
+        slew.MAX_POINTS samples at TRACK_RATE_HZ, computed for its own location with
+        satellites.SatelliteCatalog.track(). Results as of fan_out(), with the position now.
+        """
+        devices = [self.get(name) for name in names] if names else self.devices
+        catalog = satellites.catalog()
+        start = time.time()
+        futures, results = {}, []
+        for device in devices:
+            _, azimuth, altitude = catalog.track(satellite, device.lat_deg, device.lon_deg, device.height_m,
+                                                 duration_s=slew.MAX_POINTS / TRACK_RATE_HZ,
+                                                 rate_hz=TRACK_RATE_HZ, start=start)
+            result = {"device": device.name, "url": device.url, "azimuth": float(azimuth[0]),
+                      "altitude": float(altitude[0]), "transmitted": False}
+            results.append(result)
+            move = self._track_move(device, satellite, azimuth, altitude, result)
+            if move is None:
+                continue
+            future = self._submit(device, move)
+            if future is None:
+                result["error"] = "busy"
+                continue
+            futures[future] = result
+
+        self._collect(futures, devices)
+        for device, result in zip(devices, results):
+            # a busy board is still running the previous track
+            if result.get("error") != "busy":
+                with device.position_lock:
+                    device.tracking = satellite if result["transmitted"] else None
+        self._log(results)
+        capture.note("track", satellite=satellite, devices=results)
+        return results
+
+    def follow(self, satellite: str, names: list[str] | None = None, seconds: float = FOLLOW_SECONDS) -> list[dict]:
+        """
+        Point the devices at a satellite with track() and keep sending new tracks every
+        TRACK_REFRESH seconds in the background, until 'seconds' have passed, the satellite
+        set for all devices or another target is pointed at. Returns the results of the first track.
+        """
+        stop = threading.Event()
+        with self._follow_lock:
+            if self._follow_stop is not None:
+                self._follow_stop.set()
+            self._follow_stop = stop
+        results = self.track(satellite, names)
+        if any(r["transmitted"] for r in results):
+            threading.Thread(target=self._follow, args=(satellite, names, seconds, stop),
+                             name="follow", daemon=True).start()
+        return results
+
+    def _follow(self, satellite: str, names: list[str] | None, seconds: float, stop: threading.Event):
+        end = time.monotonic() + seconds
+        while not stop.wait(TRACK_REFRESH) and time.monotonic() < end:
+            try:
+                results = self.track(satellite, names)
+            except Exception as e:
+                logger.warning(f"Following {satellite} failed: {e}")
+                return
+            if all(r.get("error") == "below horizon" for r in results):
+                logger.info(f"{satellite} has set for all devices")
+                return
+
+    def _end_follow(self):
+        with self._follow_lock:
+            if self._follow_stop is not None:
+                self._follow_stop.set()
+                self._follow_stop = None
+
+
+_registry: DeviceRegistry | None = None
+_registry_lock = threading.Lock()
+
+
+def registry() -> DeviceRegistry:
+    """Process wide DeviceRegistry from devices.json, loaded on first use."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = DeviceRegistry.load()
+        return _registry
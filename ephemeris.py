@@ -0,0 +1,94 @@
+import argparse
+import logging
+import os
+from datetime import date
+
+from jplephem.daf import DAF
+from jplephem.excerpter import write_excerpt
+from jplephem.spk import SPK
+from skyfield.api import load
+
+logger = logging.getLogger(__name__)
+
+# JPL ephemeris used by default. Downloaded if not found in project dir.
+EPHEMERIS = os.environ.get("STARSEEKER_EPHEMERIS", "de421.bsp")
+# number of years from the current one kept in the excerpt, 0 loads the full kernel
+EXCERPT_YEARS = int(os.environ.get("STARSEEKER_EPHEMERIS_YEARS", "0"))
+
+# NAIF ids of all segments seek() needs: the planetary barycenters 1-9 and the sun relative
+# to the solar system barycenter, Mercury, Venus and Mars relative to their barycenters,
+# and Earth and Moon relative to the Earth-Moon barycenter 3.
+DEFAULT_TARGETS = (1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 199, 299, 301, 399, 499)
+
+
+def julian_date(day: date) -> float:
+    return day.toordinal() + 1721424.5
+
+
+def excerpt_path(source: str, start_year: int, end_year: int) -> str:
+    """Excerpts are cached next to the original kernel, e.g. de421_2025_2030.bsp."""
+    root, ext = os.path.splitext(source)
+    return f"{root}_{start_year}_{end_year}{ext}"
+
+
+def write_spk_excerpt(source: str, output: str, start_year: int, end_year: int,
+                      targets: tuple[int, ...] = DEFAULT_TARGETS):
+    """Copy the segments of 'targets' between the start of 'start_year' and the end of 'end_year'."""
+    start_jd = julian_date(date(start_year, 1, 1))
+    end_jd = julian_date(date(end_year + 1, 1, 1))
+    with open(source, "rb") as f:
+        spk = SPK(DAF(f))
+        # summary values: start, end, target, center, frame, data type, start and end address
+        summaries = [(name, values) for name, values in spk.daf.summaries() if values[2] in targets]
+        missing = set(targets) - {values[2] for _, values in summaries}
+        if missing:
+            logger.warning(f"Targets not in {source}: {sorted(missing)}")
+        tmp_path = output + ".part"
+        with open(tmp_path, "w+b") as out:
+            write_excerpt(spk, out, start_jd, end_jd, summaries)
+    os.replace(tmp_path, output)
+    logger.info(f"Wrote ephemeris excerpt {output} ({os.path.getsize(output) / 1e6:.1f} MB, "
+                f"source {os.path.getsize(source) / 1e6:.1f} MB)")
+
+
+def load_ephemeris(name: str = EPHEMERIS, years: int = EXCERPT_YEARS,
+                   targets: tuple[int, ...] = DEFAULT_TARGETS):
+    """
+    Load the ephemeris 'name' with Skyfield. If 'years' is set, an excerpt covering the
+    previous and the next 'years' years with only 'targets' is created once from the full
+    kernel and loaded instead, which keeps memory and load time low.
+    """
+    if not years:
+        return load(name)
+
+    this_year = date.today().year
+    start_year, end_year = this_year - 1, this_year + years
+    path = load.path_to(excerpt_path(name, start_year, end_year))
+    if not os.path.exists(path):
+        # the full kernel is only needed once to cut the excerpt
+        load(name).close()
+        write_spk_excerpt(load.path_to(name), path, start_year, end_year, targets)
+    return load(os.path.basename(path))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract a date range and body subset from an SPK kernel.")
+    parser.add_argument("source", nargs="?", default=EPHEMERIS, help="input kernel, e.g. de421.bsp or de440s.bsp")
+    parser.add_argument("--start", type=int, default=date.today().year - 1, help="first year to keep")
+    parser.add_argument("--end", type=int, default=date.today().year + 5, help="last year to keep")
+    parser.add_argument("--targets", default=",".join(map(str, DEFAULT_TARGETS)),
+                        help="comma separated NAIF ids of the segments to keep")
+    parser.add_argument("--output", help="output file, defaults to <source>_<start>_<end>.bsp")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if not os.path.exists(args.source):
+        load(args.source).close()
+        args.source = load.path_to(args.source)
+    targets = tuple(int(t) for t in args.targets.split(","))
+    output = args.output or excerpt_path(args.source, args.start, args.end)
+    write_spk_excerpt(args.source, output, args.start, args.end, targets)
+
+
+if __name__ == "__main__":
+    main()
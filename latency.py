@@ -0,0 +1,211 @@
+import contextvars
+import os
+import socket
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import incr
+
+# recent request durations kept per endpoint
+WINDOW = 200
+# samples needed before timeouts and hedging adapt, fixed defaults are used until then
+MIN_SAMPLES = 10
+# adaptive timeout: p99 times TIMEOUT_FACTOR, kept between TIMEOUT_FLOOR and the fixed default
+TIMEOUT_FACTOR = 3.0
+TIMEOUT_FLOOR = 5.0
+DEFAULT_TIMEOUT = 120.0
+# quantile after which a duplicate request is sent to the hedge endpoint
+HEDGE_QUANTILE = float(os.environ.get("STARSEEKER_HEDGE_QUANTILE", "0.95"))
+# duplicates running at the same time across all requests, further ones are not sent
+MAX_HEDGES = int(os.environ.get("STARSEEKER_MAX_HEDGES", "2"))
+
+# losing attempts are aborted, so a thread is only held as long as the winner of its request
+# needs. Only the in-process openai-whisper cannot be interrupted and runs to its end.
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="attempt")
+# duplicates run on their own threads, so slow losers never delay the first attempt of a request
+_hedge_executor = ThreadPoolExecutor(max_workers=MAX_HEDGES, thread_name_prefix="hedge")
+_hedge_slots = threading.BoundedSemaphore(MAX_HEDGES)
+
+
+class Cancelled(Exception):
+    """Raised by an attempt of hedged() that stopped because another attempt finished first."""
+
+
+class AbortableAdapter(HTTPAdapter):
+    """
+    Transport adapter that keeps the sockets it opened, so that abort() can end a request
+    that is still waiting for its response from another thread. The request then fails
+    with a requests.ConnectionError.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._sockets: list[socket.socket] = []
+        self._lock = threading.Lock()
+        super().__init__(*args, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        track = self._track
+
+        def tracking(pool_cls):
+            class Connection(pool_cls.ConnectionCls):
+                def _new_conn(self):
+                    sock = super()._new_conn()
+                    track(sock)
+                    return sock
+
+            return type(pool_cls.__name__, (pool_cls,), {"ConnectionCls": Connection})
+
+        # a copy for this pool manager, the module wide mapping of urllib3 stays untouched
+        self.poolmanager.pool_classes_by_scheme = {
+            scheme: tracking(pool_cls) for scheme, pool_cls in self.poolmanager.pool_classes_by_scheme.items()}
+
+    def _track(self, sock: socket.socket):
+        with self._lock:
+            self._sockets.append(sock)
+
+    def abort(self):
+        with self._lock:
+            sockets, self._sockets = self._sockets, []
+        for sock in sockets:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                # already closed
+                pass
+
+
+class LatencyTracker:
+    """
+    Rolling latency histogram of one endpoint. Derives the timeout for the next request from
+    the observed p99 and the delay after which a hedged duplicate is sent from the p95.
+    """
+
+    def __init__(self, name: str, default_timeout: float = DEFAULT_TIMEOUT, window: int = WINDOW):
+        self.name = name
+        self.default_timeout = default_timeout
+        self._samples: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def quantile(self, q: float) -> float | None:
+        with self._lock:
+            if len(self._samples) < MIN_SAMPLES:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def timeout(self) -> float:
+        p99 = self.quantile(0.99)
+        if p99 is None:
+            return self.default_timeout
+        return min(self.default_timeout, max(TIMEOUT_FLOOR, p99 * TIMEOUT_FACTOR))
+
+    def hedge_delay(self) -> float | None:
+        return self.quantile(HEDGE_QUANTILE)
+
+    def summary(self) -> dict:
+        return {
+            "samples": len(self._samples),
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "timeout": self.timeout(),
+        }
+
+
+def hedged(attempts: list, tracker: LatencyTracker):
+    """
+    Run attempts[0](session, cancel) and, if it is still running after the hedge delay of
+    'tracker' or fails, the next attempt as well. Returns the first successful result. Every
+    attempt gets its own requests.Session and threading.Event. Once a result is returned, the
+    others are stopped: their events are set, so the in-process Whisper raises Cancelled at
+    the next segment, and the sockets of their sessions are shut down, so HTTP requests fail
+    right away instead of waiting for their response or timeout. At most MAX_HEDGES
+    duplicates run at a time, without a free slot the request waits for its current attempt.
+    """
+    sessions = []
+    adapters = []
+    cancels = []
+    futures = {}
+    errors = []
+    next_attempt = 0
+
+    def launch(hedge: bool = False):
+        nonlocal next_attempt
+        session = requests.Session()
+        adapter = AbortableAdapter()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        cancel = threading.Event()
+        sessions.append(session)
+        adapters.append(adapter)
+        cancels.append(cancel)
+        executor = _hedge_executor if hedge else _executor
+        # in a copy of the caller's context, so spans and notes reach its capture
+        future = executor.submit(contextvars.copy_context().run, attempts[next_attempt], session, cancel)
+        if hedge:
+            future.add_done_callback(lambda _: _hedge_slots.release())
+        futures[future] = next_attempt
+        next_attempt += 1
+
+    launch()
+    delay = tracker.hedge_delay()
+    try:
+        while futures:
+            can_hedge = next_attempt < len(attempts) and delay is not None
+            done, _ = wait(futures, timeout=delay if can_hedge else None, return_when=FIRST_COMPLETED)
+            if not done:
+                if _hedge_slots.acquire(blocking=False):
+                    incr("hedged", endpoint=tracker.name)
+                    launch(hedge=True)
+                else:
+                    incr("hedge_skipped", endpoint=tracker.name)
+                    delay = None
+                continue
+            for future in done:
+                index = futures.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    errors.append(e)
+                    if next_attempt < len(attempts):
+                        launch()
+                    continue
+                if index > 0:
+                    incr("hedge_wins", endpoint=tracker.name)
+                return result
+        raise errors[-1]
+    finally:
+        for cancel in cancels:
+            cancel.set()
+        # the winner has read its response already, only losers are still connected
+        for adapter in adapters:
+            adapter.abort()
+        for session in sessions:
+            session.close()
+
+
+def timed_call(tracker: LatencyTracker, func, *args, **kwargs):
+    """
+    Call func and record its duration in 'tracker'. A request that timed out is recorded with
+    at least its timeout, so a slow backend raises the quantiles instead of being left out.
+    """
+    start = time.perf_counter()
+    try:
+        result = func(*args, **kwargs)
+    except requests.Timeout:
+        timeout = kwargs.get("timeout") or 0.0
+        if isinstance(timeout, tuple):
+            timeout = sum(t for t in timeout if t is not None)
+        tracker.record(max(time.perf_counter() - start, timeout))
+        raise
+    tracker.record(time.perf_counter() - start)
+    return result
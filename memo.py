@@ -0,0 +1,96 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from metrics import incr
+
+# entries kept per cache, 0 disables memoization
+CACHE_SIZE = int(os.environ.get("STARSEEKER_CACHE_SIZE", "256"))
+
+_caches: dict[str, "TimeBucketCache"] = {}
+_MISSING = object()
+
+
+class TimeBucketCache:
+    """
+    Bounded LRU cache for results that only change slowly with time. Keys are extended by
+    the index of the current time bucket, so an entry is reused for at most 'bucket_seconds'
+    and then recomputed. Hits and misses are counted for stats() and the metrics module.
+    """
+
+    def __init__(self, name: str, bucket_seconds: float, maxsize: int = CACHE_SIZE):
+        self.name = name
+        self.bucket_seconds = bucket_seconds
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple, object] = OrderedDict()
+        self._lock = threading.Lock()
+        _caches[name] = self
+
+    def _bucket_key(self, key: tuple, bucket_seconds: float | None) -> tuple:
+        width = bucket_seconds or self.bucket_seconds
+        return (*key, width, int(time.time() // width))
+
+    def get(self, key: tuple, bucket_seconds: float | None = None, default=None):
+        """Cached value of 'key' for the current time bucket, 'default' on a miss."""
+        if self.maxsize <= 0:
+            return default
+        key = self._bucket_key(key, bucket_seconds)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                value = self._entries[key]
+            else:
+                self.misses += 1
+                value = _MISSING
+        if value is _MISSING:
+            incr("cache_misses", stage=self.name)
+            return default
+        incr("cache_hits", stage=self.name)
+        return value
+
+    def put(self, key: tuple, value, bucket_seconds: float | None = None):
+        """Store 'value' for 'key' in the current time bucket."""
+        if self.maxsize <= 0:
+            return
+        key = self._bucket_key(key, bucket_seconds)
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, key: tuple, compute, bucket_seconds: float | None = None):
+        """Return the cached value of 'key' for the current time bucket or store compute()."""
+        value = self.get(key, bucket_seconds, _MISSING)
+        if value is not _MISSING:
+            return value
+        # computed outside the lock, concurrent misses of the same key may both compute it
+        value = compute()
+        self.put(key, value, bucket_seconds)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "bucket_seconds": self.bucket_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
+def stats() -> dict:
+    """Stats of all caches by name."""
+    return {name: cache.stats() for name, cache in _caches.items()}
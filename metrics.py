@@ -0,0 +1,219 @@
+import json
+import os
+import threading
+from contextvars import ContextVar
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+
+# Instrumentation is disabled unless STARSEEKER_METRICS is set, so that span() and incr()
+# reduce to a flag check in normal runs.
+ENABLED = os.environ.get("STARSEEKER_METRICS", "") not in ("", "0")
+LOG_PATH = os.environ.get(
+    "STARSEEKER_METRICS_LOG", os.path.join(os.path.dirname(__file__), "metrics.jsonl")
+)
+
+# number of recent samples per stage kept for the percentile summaries
+WINDOW = 1024
+QUANTILES = (0.5, 0.95, 0.99)
+
+_NULL_SPAN = nullcontext()
+
+
+def _percentile(sorted_values: list[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, max(0, round(q * len(sorted_values)) - 1))
+    return sorted_values[idx]
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: dict) -> str:
+    """Prometheus label set like {stage="plan"}, empty without labels."""
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in sorted(labels.items())) + "}"
+
+
+class Metrics:
+    """
+    Collects timing spans per pipeline stage and simple counters (bytes sent, cache hits).
+    Every finished span is appended to a JSONL log. Summaries with p50/p95/p99 are available
+    as a dict or in the Prometheus text exposition format.
+    """
+
+    def __init__(self, enabled: bool = ENABLED, log_path: str | None = LOG_PATH, window: int = WINDOW):
+        self.enabled = enabled
+        self.log_path = log_path
+        self.window = window
+        self._lock = threading.Lock()
+        self._samples: dict[str, deque[float]] = {}
+        self._sums: dict[str, float] = {}
+        self._counts: dict[str, int] = {}
+        # keyed by counter name and label set, e.g. ('cache_hits', {('stage', 'plan')})
+        self._counters: dict[tuple[str, frozenset], float] = {}
+        self._log_file = None
+        # collectors of collect() in the current context, spans are timed while any is active
+        self._collectors: ContextVar[tuple] = ContextVar("collectors", default=())
+        self._collecting = 0
+
+    def enable(self, log_path: str | None = None):
+        if log_path is not None:
+            self.log_path = log_path
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+        with self._lock:
+            if self._log_file is not None:
+                self._log_file.close()
+                self._log_file = None
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._sums.clear()
+            self._counts.clear()
+            self._counters.clear()
+
+    # recording
+
+    @contextmanager
+    def collect(self, collector):
+        """
+        Pass every span and observation of the current context to collector(stage, seconds, labels)
+        while the block runs, also when metrics are disabled. Used for the replay captures.
+        Work handed to other threads is included if it runs in a copy of the context.
+        """
+        token = self._collectors.set(self._collectors.get() + (collector,))
+        with self._lock:
+            self._collecting += 1
+        try:
+            yield
+        finally:
+            self._collectors.reset(token)
+            with self._lock:
+                self._collecting -= 1
+
+    def span(self, stage: str, **labels):
+        """Context manager timing the enclosed block as 'stage'. No-op when disabled."""
+        if not self.enabled and not self._collecting:
+            return _NULL_SPAN
+        return self._span(stage, labels)
+
+    def timed(self, stage: str):
+        """Decorator variant of span() for whole functions."""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled and not self._collecting:
+                    return func(*args, **kwargs)
+                with self._span(stage, {}):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    @contextmanager
+    def _span(self, stage: str, labels: dict):
+        start = time.perf_counter()
+        error = None
+        try:
+            yield
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            if error is not None:
+                labels["error"] = error
+            self.observe(stage, duration, **labels)
+
+    def observe(self, stage: str, seconds: float, **labels):
+        """Record a duration measured elsewhere, e.g. between recorder start() and stop()."""
+        if self._collecting:
+            for collector in self._collectors.get():
+                collector(stage, seconds, labels)
+        if not self.enabled:
+            return
+        with self._lock:
+            samples = self._samples.get(stage)
+            if samples is None:
+                samples = self._samples[stage] = deque(maxlen=self.window)
+            samples.append(seconds)
+            self._sums[stage] = self._sums.get(stage, 0.0) + seconds
+            self._counts[stage] = self._counts.get(stage, 0) + 1
+            self._log({"type": "span", "stage": stage, "seconds": seconds, **labels})
+
+    def incr(self, counter: str, value: float = 1, **labels):
+        """Increase a counter such as 'bytes_sent' or 'cache_hits', separately per label set."""
+        if not self.enabled:
+            return
+        key = (counter, frozenset(labels.items()))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+            self._log({"type": "counter", "counter": counter, "value": value, **labels})
+
+    def _log(self, record: dict):
+        # caller holds the lock
+        if not self.log_path:
+            return
+        if self._log_file is None:
+            self._log_file = open(self.log_path, "a", encoding="utf-8")
+        record["ts"] = time.time()
+        self._log_file.write(json.dumps(record) + "\n")
+        self._log_file.flush()
+
+    # reporting
+
+    def summary(self) -> dict:
+        """
+        Return {'stages': {stage: {count, sum, p50, p95, p99}}, 'counters': {counter: [{labels, value}]}},
+        with one counter entry per label set.
+        """
+        with self._lock:
+            stages = {}
+            for stage, samples in self._samples.items():
+                values = sorted(samples)
+                entry = {"count": self._counts[stage], "sum": self._sums[stage]}
+                for q in QUANTILES:
+                    entry[f"p{round(q * 100)}"] = _percentile(values, q)
+                stages[stage] = entry
+            counters: dict[str, list[dict]] = {}
+            for (counter, labels), value in self._counters.items():
+                counters.setdefault(counter, []).append({"labels": dict(sorted(labels)), "value": value})
+            for entries in counters.values():
+                entries.sort(key=lambda entry: sorted(entry["labels"].items()))
+            return {"stages": stages, "counters": counters}
+
+    def render_prometheus(self) -> str:
+        """Render the current summary in the Prometheus text exposition format."""
+        summary = self.summary()
+        lines = [
+            "# HELP starseeker_stage_seconds Duration of pipeline stages.",
+            "# TYPE starseeker_stage_seconds summary",
+        ]
+        for stage, entry in sorted(summary["stages"].items()):
+            for q in QUANTILES:
+                value = entry[f"p{round(q * 100)}"]
+                lines.append(f'starseeker_stage_seconds{{stage="{stage}",quantile="{q}"}} {value}')
+            lines.append(f'starseeker_stage_seconds_sum{{stage="{stage}"}} {entry["sum"]}')
+            lines.append(f'starseeker_stage_seconds_count{{stage="{stage}"}} {entry["count"]}')
+        for counter, entries in sorted(summary["counters"].items()):
+            name = f"starseeker_{counter}_total"
+            lines.append(f"# TYPE {name} counter")
+            for entry in entries:
+                lines.append(f"{name}{_labels(entry['labels'])} {entry['value']}")
+        return "\n".join(lines) + "\n"
+
+
+# process wide instance used by all application parts
+metrics = Metrics()
+span = metrics.span
+timed = metrics.timed
+observe = metrics.observe
+incr = metrics.incr
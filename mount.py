@@ -0,0 +1,204 @@
+import argparse
+import json
+import logging
+import os
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# fitted calibration of the pointer, defaults (no correction) are used if the file is missing
+CALIBRATION_PATH = os.path.join(os.path.dirname(__file__), "mount.json")
+
+# both servos move between 0 and 180 degrees, 90 is their center
+SERVO_MIN = 0.0
+SERVO_MAX = 180.0
+SERVO_CENTER = 90.0
+# the Arduino sketch writes whole degrees, finer changes do not move the pointer
+SERVO_STEP = 1.0
+
+
+class Calibration:
+    """
+    Pointing model of a laser pointer mount.
+
+    az_offset / alt_offset: rotation of the mount zero against true north / the horizon (deg)
+    tilt_north / tilt_east: tilt of the base plane, raising the north / east side (deg)
+    az_poly / alt_poly:     servo nonlinearity as polynomial coefficients (increasing order)
+                            around the servo center, command = 90 + p(angle - 90)
+    """
+
+    def __init__(self, az_offset: float = 0.0, alt_offset: float = 0.0,
+                 tilt_north: float = 0.0, tilt_east: float = 0.0,
+                 az_poly: list[float] | None = None, alt_poly: list[float] | None = None):
+        self.az_offset = az_offset
+        self.alt_offset = alt_offset
+        self.tilt_north = tilt_north
+        self.tilt_east = tilt_east
+        self.az_poly = list(az_poly) if az_poly is not None else [0.0, 1.0]
+        self.alt_poly = list(alt_poly) if alt_poly is not None else [0.0, 1.0]
+
+    def to_dict(self) -> dict:
+        return {
+            "az_offset": self.az_offset,
+            "alt_offset": self.alt_offset,
+            "tilt_north": self.tilt_north,
+            "tilt_east": self.tilt_east,
+            "az_poly": self.az_poly,
+            "alt_poly": self.alt_poly,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Calibration":
+        return cls(**data)
+
+    @classmethod
+    def load(cls, path: str = CALIBRATION_PATH) -> "Calibration":
+        if not os.path.exists(path):
+            return cls()
+        with open(path, encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+    def save(self, path: str = CALIBRATION_PATH):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def __repr__(self):
+        return f"Calibration({self.to_dict()})"
+
+
+def _scalar(value):
+    """Return plain floats for scalar input so results stay JSON serializable."""
+    return float(value) if np.ndim(value) == 0 else value
+
+
+def to_mount_frame(azimuth, altitude, calibration: Calibration):
+    """Rotate true azimuth/altitude (deg) into the frame of the tilted and offset mount."""
+    az = np.radians(np.asarray(azimuth, dtype=np.float64))
+    alt = np.radians(np.asarray(altitude, dtype=np.float64))
+    east = np.cos(alt) * np.sin(az)
+    north = np.cos(alt) * np.cos(az)
+    up = np.sin(alt)
+
+    # tilt_north rotates about the east axis, tilt_east about the north axis
+    tn = np.radians(calibration.tilt_north)
+    te = np.radians(calibration.tilt_east)
+    north, up = np.cos(tn) * north + np.sin(tn) * up, -np.sin(tn) * north + np.cos(tn) * up
+    east, up = np.cos(te) * east + np.sin(te) * up, -np.sin(te) * east + np.cos(te) * up
+
+    mount_az = (np.degrees(np.arctan2(east, north)) - calibration.az_offset) % 360.0
+    mount_alt = np.degrees(np.arcsin(np.clip(up, -1.0, 1.0))) - calibration.alt_offset
+    return mount_az, mount_alt
+
+
+def servo_angles(azimuth, altitude, calibration: Calibration | None = None):
+    """
+    Map true azimuth/altitude in degrees (scalars or arrays) to servo commands.
+
+    The azimuth servo only covers 180 degrees. Targets in the northern half (green area)
+    are reached directly, targets in the southern half (red area, 90 < az < 270) by turning
+    the azimuth servo by 180 degrees and flipping the altitude servo over the zenith.
+    Returns (servo azimuth, servo altitude, flipped).
+    """
+    calibration = calibration or default_calibration()
+    mount_az, mount_alt = to_mount_frame(azimuth, altitude, calibration)
+    flipped = (mount_az > 90.0) & (mount_az < 270.0)
+    servo_az, servo_alt = _servo_commands(mount_az, mount_alt, flipped, calibration)
+    servo_az = np.clip(servo_az, SERVO_MIN, SERVO_MAX)
+    servo_alt = np.clip(servo_alt, SERVO_MIN, SERVO_MAX)
+    return _scalar(servo_az), _scalar(servo_alt), flipped if np.ndim(flipped) else bool(flipped)
+
+
+def servo_candidates(azimuth, altitude, calibration: Calibration | None = None):
+    """
+    Both servo solutions of one true azimuth/altitude: direct and flipped over the zenith.
+    Returns (servo azimuth, servo altitude, reachable) as arrays of two, unclipped, where
+    'reachable' tells whether the solution lies within the servo range up to one SERVO_STEP.
+    """
+    calibration = calibration or default_calibration()
+    mount_az, mount_alt = to_mount_frame(azimuth, altitude, calibration)
+    servo_az, servo_alt = _servo_commands(mount_az, mount_alt, np.array([False, True]), calibration)
+    reachable = ((servo_az >= SERVO_MIN - SERVO_STEP) & (servo_az <= SERVO_MAX + SERVO_STEP)
+                 & (servo_alt >= SERVO_MIN - SERVO_STEP) & (servo_alt <= SERVO_MAX + SERVO_STEP))
+    return servo_az, servo_alt, reachable
+
+
+def _servo_commands(mount_az, mount_alt, flipped, calibration: Calibration):
+    """Unclipped servo commands for mount frame angles and a given flip state."""
+    servo_az = np.where(flipped, 270.0 - mount_az, 450.0 - mount_az)
+    # wrapped to -90..270, so solutions just outside the servo range stay next to it
+    servo_az = (servo_az + 90.0) % 360.0 - 90.0
+    servo_alt = np.where(flipped, 180.0 - mount_alt, mount_alt)
+    servo_az = SERVO_CENTER + np.polynomial.polynomial.polyval(servo_az - SERVO_CENTER, calibration.az_poly)
+    servo_alt = SERVO_CENTER + np.polynomial.polynomial.polyval(servo_alt - SERVO_CENTER, calibration.alt_poly)
+    return servo_az, servo_alt
+
+
+def fit(azimuth, altitude, servo_az, servo_alt, degree: int = 1,
+        initial: Calibration | None = None) -> tuple[Calibration, float]:
+    """
+    Learn a Calibration from measured pointings: for each known target (true az/alt) the servo
+    commands that put the laser on it. 'degree' is the order of the servo polynomials.
+    Returns the fitted calibration and the RMS residual in degrees.
+    """
+    from scipy.optimize import least_squares
+
+    azimuth = np.asarray(azimuth, dtype=np.float64)
+    altitude = np.asarray(altitude, dtype=np.float64)
+    servo_az = np.asarray(servo_az, dtype=np.float64)
+    servo_alt = np.asarray(servo_alt, dtype=np.float64)
+    # the flip state is taken from the measurement, so residuals stay continuous near the boundary
+    flipped = servo_alt > SERVO_CENTER
+    initial = initial or Calibration()
+    n_poly = degree + 1
+
+    def unpack(params) -> Calibration:
+        az_poly = [0.0, *params[4:4 + degree]]
+        alt_poly = [0.0, *params[4 + degree:4 + 2 * degree]]
+        return Calibration(*params[:4], az_poly=az_poly, alt_poly=alt_poly)
+
+    def residuals(params):
+        cal = unpack(params)
+        mount_az, mount_alt = to_mount_frame(azimuth, altitude, cal)
+        predicted_az, predicted_alt = _servo_commands(mount_az, mount_alt, flipped, cal)
+        az_error = (predicted_az - servo_az + 180.0) % 360.0 - 180.0
+        return np.concatenate([az_error, predicted_alt - servo_alt])
+
+    # constant terms are covered by the offsets, so the polynomials start at the linear term
+    x0 = [initial.az_offset, initial.alt_offset, initial.tilt_north, initial.tilt_east]
+    x0 += (list(initial.az_poly[1:n_poly]) + [0.0] * n_poly)[:degree]
+    x0 += (list(initial.alt_poly[1:n_poly]) + [0.0] * n_poly)[:degree]
+    result = least_squares(residuals, x0)
+    calibration = unpack([float(x) for x in result.x])
+    rms = float(np.sqrt(np.mean(result.fun ** 2)))
+    logger.info(f"Fitted {calibration} with RMS {rms:.3f} deg")
+    return calibration, rms
+
+
+_calibration: Calibration | None = None
+
+
+def default_calibration() -> Calibration:
+    """Calibration from mount.json, loaded on first use."""
+    global _calibration
+    if _calibration is None:
+        _calibration = Calibration.load()
+    return _calibration
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit the mount calibration from measured pointings.")
+    parser.add_argument("pointings", help="CSV file with the columns azimuth,altitude,servo_az,servo_alt")
+    parser.add_argument("--degree", type=int, default=1, help="order of the servo polynomials")
+    parser.add_argument("--output", default=CALIBRATION_PATH, help="calibration file to write")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    data = np.genfromtxt(args.pointings, delimiter=",", names=True)
+    calibration, _ = fit(data["azimuth"], data["altitude"], data["servo_az"], data["servo_alt"], args.degree)
+    calibration.save(args.output)
+    logger.info(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
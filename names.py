@@ -0,0 +1,277 @@
+import csv
+import logging
+import os
+import pickle
+import re
+import threading
+import unicodedata
+from collections import defaultdict
+from typing import NamedTuple
+
+logger = logging.getLogger(__name__)
+
+# curated star names: IAU proper name, Bayer and Flamsteed designation, further aliases.
+# covers the 94 named stars of the former inline starchart, not the full IAU list
+NAMES_CSV = os.path.join(os.path.dirname(__file__), "star_names.csv")
+# prebuilt index, rebuilt whenever star_names.csv changes
+CACHE_PATH = os.path.join(os.path.dirname(__file__), "cache", "names.pkl")
+CACHE_VERSION = 1
+
+# minimum trigram similarity for fuzzy matches
+MIN_SCORE = 0.45
+# fuzzy matches below this score are only offered as candidates, never resolved to
+ACCEPT_SCORE = 0.85
+
+GREEK = {
+    "alpha": "α", "beta": "β", "gamma": "γ", "delta": "δ", "epsilon": "ε", "zeta": "ζ",
+    "eta": "η", "theta": "θ", "iota": "ι", "kappa": "κ", "lambda": "λ", "mu": "μ",
+    "nu": "ν", "xi": "ξ", "omicron": "ο", "pi": "π", "rho": "ρ", "sigma": "σ",
+    "tau": "τ", "upsilon": "υ", "phi": "φ", "chi": "χ", "psi": "ψ", "omega": "ω",
+}
+# three letter abbreviations used in star catalogs
+GREEK_ABBR = {
+    "alpha": "alf", "beta": "bet", "gamma": "gam", "delta": "del", "epsilon": "eps", "zeta": "zet",
+    "eta": "eta", "theta": "tet", "iota": "iot", "kappa": "kap", "lambda": "lam", "mu": "mu",
+    "nu": "nu", "xi": "ksi", "omicron": "omi", "pi": "pi", "rho": "rho", "sigma": "sig",
+    "tau": "tau", "upsilon": "ups", "phi": "phi", "chi": "chi", "psi": "psi", "omega": "ome",
+}
+
+# constellation abbreviation -> latin genitive, for designations like 'Alpha Canis Majoris'
+CONSTELLATIONS = {
+    "And": "Andromedae", "Ant": "Antliae", "Aps": "Apodis", "Aqr": "Aquarii", "Aql": "Aquilae",
+    "Ara": "Arae", "Ari": "Arietis", "Aur": "Aurigae", "Boo": "Bootis", "Cae": "Caeli",
+    "Cam": "Camelopardalis", "Cnc": "Cancri", "CVn": "Canum Venaticorum", "CMa": "Canis Majoris",
+    "CMi": "Canis Minoris", "Cap": "Capricorni", "Car": "Carinae", "Cas": "Cassiopeiae",
+    "Cen": "Centauri", "Cep": "Cephei", "Cet": "Ceti", "Cha": "Chamaeleontis", "Cir": "Circini",
+    "Col": "Columbae", "Com": "Comae Berenices", "CrA": "Coronae Australis",
+    "CrB": "Coronae Borealis", "Crv": "Corvi", "Crt": "Crateris", "Cru": "Crucis", "Cyg": "Cygni",
+    "Del": "Delphini", "Dor": "Doradus", "Dra": "Draconis", "Equ": "Equulei", "Eri": "Eridani",
+    "For": "Fornacis", "Gem": "Geminorum", "Gru": "Gruis", "Her": "Herculis", "Hor": "Horologii",
+    "Hya": "Hydrae", "Hyi": "Hydri", "Ind": "Indi", "Lac": "Lacertae", "Leo": "Leonis",
+    "LMi": "Leonis Minoris", "Lep": "Leporis", "Lib": "Librae", "Lup": "Lupi", "Lyn": "Lyncis",
+    "Lyr": "Lyrae", "Men": "Mensae", "Mic": "Microscopii", "Mon": "Monocerotis", "Mus": "Muscae",
+    "Nor": "Normae", "Oct": "Octantis", "Oph": "Ophiuchi", "Ori": "Orionis", "Pav": "Pavonis",
+    "Peg": "Pegasi", "Per": "Persei", "Phe": "Phoenicis", "Pic": "Pictoris", "Psc": "Piscium",
+    "PsA": "Piscis Austrini", "Pup": "Puppis", "Pyx": "Pyxidis", "Ret": "Reticuli",
+    "Sge": "Sagittae", "Sgr": "Sagittarii", "Sco": "Scorpii", "Scl": "Sculptoris", "Sct": "Scuti",
+    "Ser": "Serpentis", "Sex": "Sextantis", "Tau": "Tauri", "Tel": "Telescopii",
+    "Tri": "Trianguli", "TrA": "Trianguli Australis", "Tuc": "Tucanae", "UMa": "Ursae Majoris",
+    "UMi": "Ursae Minoris", "Vel": "Velorum", "Vir": "Virginis", "Vol": "Volantis",
+    "Vul": "Vulpeculae",
+}
+
+# solar system bodies and satellites with their English and German names.
+# keys are the names seek() understands.
+BODIES = {
+    ("Sun", "Star"): ["sun", "sonne"],
+    ("Moon", "Moon"): ["moon", "mond", "erdmond"],
+    ("Mercury", "Planet"): ["mercury", "merkur"],
+    ("Venus", "Planet"): ["venus", "abendstern", "morgenstern"],
+    ("Mars", "Planet"): ["mars"],
+    ("Jupiter", "Planet"): ["jupiter"],
+    ("Saturn", "Planet"): ["saturn"],
+    ("Uranus", "Planet"): ["uranus"],
+    ("Neptune", "Planet"): ["neptune", "neptun"],
+    ("Pluto", "Planet"): ["pluto"],
+    ("ISS", "Satellite"): ["iss", "international space station", "internationale raumstation",
+                           "raumstation"],
+}
+
+
+class CatalogEntry(NamedTuple):
+    """Resolved object: display name, object type as used by seek() and Hipparcos id for stars."""
+    name: str
+    type: str
+    hip: int | None = None
+
+
+def normalize(name: str) -> str:
+    """Lowercase, strip accents and punctuation and collapse whitespace."""
+    name = name.lower().replace("ß", "ss")
+    name = "".join(c for c in unicodedata.normalize("NFKD", name) if not unicodedata.combining(c))
+    name = name.replace("'", "").replace("’", "")
+    name = re.sub(r"[^\w\s]", " ", name)
+    name = re.sub(r"\s+", " ", name).strip()
+    # leading articles as in 'the Sun' or 'die Sonne'
+    return re.sub(r"^(the|der|die|das|den|dem|des) ", "", name)
+
+
+def trigrams(text: str) -> set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _designation_variants(designation: str) -> list[str]:
+    """'alpha CMa' -> alpha cma, α cma, alf cma, alpha canis majoris, ..."""
+    prefix, _, abbr = designation.partition(" ")
+    constellation = [abbr, CONSTELLATIONS.get(abbr, abbr)]
+    prefixes = [prefix]
+    if prefix in GREEK:
+        prefixes += [GREEK[prefix], GREEK_ABBR[prefix]]
+    return [f"{p} {c}" for p in prefixes for c in constellation]
+
+
+class NameIndex:
+    """
+    Persistent name index for sky objects. Exact lookups of normalized names are dict
+    lookups, unknown spellings are matched fuzzily via a trigram index. Covers proper names,
+    German names, Bayer and Flamsteed designations, HIP and HD numbers, planets and the ISS.
+    """
+
+    def __init__(self):
+        self.exact: dict[str, CatalogEntry] = {}
+        self.by_hip: dict[int, CatalogEntry] = {}
+        self.hd_to_hip: dict[int, int] = {}
+        self._trigrams: dict[str, set[str]] = defaultdict(set)
+
+    # building
+
+    def add(self, alias: str, entry: CatalogEntry, fuzzy: bool = True):
+        key = normalize(alias)
+        if not key:
+            return
+        self.exact.setdefault(key, entry)
+        if entry.hip is not None:
+            self.by_hip.setdefault(entry.hip, entry)
+        if fuzzy:
+            for gram in trigrams(key):
+                self._trigrams[gram].add(key)
+
+    @classmethod
+    def build(cls, csv_path: str = NAMES_CSV, with_hd: bool = True) -> "NameIndex":
+        index = cls()
+        for (name, objtype), aliases in BODIES.items():
+            entry = CatalogEntry(name, objtype)
+            for alias in aliases:
+                index.add(alias, entry)
+
+        with open(csv_path, encoding="utf-8", newline="") as f:
+            for row in csv.DictReader(f):
+                entry = CatalogEntry(row["name"], "Star", int(row["hip"]))
+                index.add(row["name"], entry)
+                for alias in filter(None, row["aliases"].split(";")):
+                    index.add(alias, entry)
+                if row["bayer"]:
+                    for variant in _designation_variants(row["bayer"]):
+                        index.add(variant, entry)
+                if row["flamsteed"]:
+                    for variant in _designation_variants(row["flamsteed"]):
+                        index.add(variant, entry)
+
+        if with_hd:
+            index.hd_to_hip = cls._load_hd_numbers()
+        return index
+
+    @staticmethod
+    def _load_hd_numbers() -> dict[int, int]:
+        """Read the HD cross identification (field H71) from the Hipparcos main catalog."""
+        import pandas as pd
+        from skyfield.api import load
+        from skyfield.data import hipparcos
+
+        with load.open(hipparcos.URL) as f:
+            ids = pd.read_csv(f, sep="|", header=None, usecols=[1, 71], dtype=str)
+        hip = pd.to_numeric(ids[1], errors="coerce")
+        hd = pd.to_numeric(ids[71], errors="coerce")
+        valid = hip.notna() & hd.notna()
+        return dict(zip(hd[valid].astype(int), hip[valid].astype(int)))
+
+    # lookup
+
+    def lookup(self, name: str) -> CatalogEntry | None:
+        """Exact lookup of a name, designation, 'HIP 12345', 'HD 48915' or a bare HIP number."""
+        key = normalize(name)
+        entry = self.exact.get(key)
+        if entry is not None:
+            return entry
+
+        match = re.fullmatch(r"(hip|hd)?\s*(\d+)", key)
+        if match:
+            catalog, number = match.group(1) or "hip", int(match.group(2))
+            if catalog == "hd":
+                hip = self.hd_to_hip.get(number)
+                return CatalogEntry(f"HD {number}", "Star", hip) if hip is not None else None
+            return self.for_hip(number)
+        return None
+
+    def for_hip(self, hip: int) -> CatalogEntry:
+        """Entry with the proper name of a Hipparcos star, 'HIP <id>' for unnamed stars."""
+        return self.by_hip.get(hip) or CatalogEntry(f"HIP {hip}", "Star", hip)
+
+    def search(self, name: str, limit: int = 5, min_score: float = MIN_SCORE) -> list[tuple[CatalogEntry, float]]:
+        """
+        Fuzzy lookup by trigram similarity (Dice coefficient), best matches first. Equal scores
+        are ordered by the matched name, so ties always resolve the same way.
+        """
+        key = normalize(name)
+        grams = trigrams(key)
+        counts: dict[str, int] = defaultdict(int)
+        for gram in grams:
+            for candidate in self._trigrams.get(gram, ()):
+                counts[candidate] += 1
+
+        scored = []
+        for candidate, common in counts.items():
+            score = 2 * common / (len(grams) + len(trigrams(candidate)))
+            if score >= min_score:
+                scored.append((candidate, score))
+        scored.sort(key=lambda item: (-item[1], item[0]))
+
+        results, seen = [], set()
+        for candidate, score in scored:
+            entry = self.exact[candidate]
+            if entry not in seen:
+                seen.add(entry)
+                results.append((entry, score))
+            if len(results) >= limit:
+                break
+        return results
+
+    def resolve(self, name: str, accept: float = ACCEPT_SCORE) -> tuple[CatalogEntry, float]:
+        """
+        Exact match with confidence 1.0, otherwise the best fuzzy match and its score. Raises
+        ValueError naming the candidates if no match reaches 'accept' or the best two tie.
+        """
+        entry = self.lookup(name)
+        if entry is not None:
+            return entry, 1.0
+        matches = self.search(name)
+        if not matches:
+            raise ValueError(f"Unknown object: {name}")
+        best, score = matches[0]
+        if score < accept or (len(matches) > 1 and matches[1][1] == score):
+            candidates = ", ".join(entry.name for entry, _ in matches)
+            raise ValueError(f"Unknown object: {name}, did you mean {candidates}?")
+        return best, score
+
+    # persistence
+
+    def save(self, path: str = CACHE_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            pickle.dump((CACHE_VERSION, os.path.getmtime(NAMES_CSV), self), f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load_or_build(cls, path: str = CACHE_PATH) -> "NameIndex":
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                version, csv_mtime, index = pickle.load(f)
+            if version == CACHE_VERSION and csv_mtime == os.path.getmtime(NAMES_CSV):
+                return index
+        logger.info("Building name index")
+        index = cls.build()
+        index.save(path)
+        return index
+
+
+_index: NameIndex | None = None
+_index_lock = threading.Lock()
+
+
+def index() -> NameIndex:
+    """Process wide NameIndex shared by astro.seek() and the Client."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = NameIndex.load_or_build()
+        return _index
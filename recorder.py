@@ -1,25 +1,91 @@
+import logging
 import os
 import queue
 import threading
+import time
+from collections import deque
 from datetime import datetime
 
 import numpy as np
 import sounddevice as sd
 from scipy.io.wavfile import write as wav_write
 
+from metrics import span, observe
+
+logger = logging.getLogger(__name__)
+
+
+def _latency(value: str | None) -> str | float | None:
+    """sounddevice latency from the environment: 'low', 'high' or seconds, None for its default."""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+# frames per callback, 0 lets PortAudio choose; smaller blocks deliver the first audio sooner
+BLOCKSIZE = int(os.environ.get("STARSEEKER_AUDIO_BLOCKSIZE", "0"))
+# input latency requested from PortAudio, sounddevice's default if unset
+LATENCY = _latency(os.environ.get("STARSEEKER_AUDIO_LATENCY"))
+# keep the input stream open between recordings and prepend the last PREROLL seconds before start()
+WARM_STREAM = os.environ.get("STARSEEKER_AUDIO_WARM", "") not in ("", "0")
+PREROLL = float(os.environ.get("STARSEEKER_AUDIO_PREROLL", "0.5"))
+# Whisper works on 16 kHz. The default rate of the device is used if it is not below, otherwise
+# the closest rate the device supports from there upwards
+TARGET_RATE = 16000
+CANDIDATE_RATES = (16000, 22050, 24000, 32000, 44100, 48000)
+FALLBACK_RATE = 44100
+
+
+def probe_samplerate(device=None, channels: int = 1) -> int:
+    """
+    Default sample rate of the input device if it accepts it and it is not below TARGET_RATE,
+    otherwise the accepted rate closest to TARGET_RATE (not below).
+    """
+    try:
+        default = int(sd.query_devices(device, kind="input")["default_samplerate"])
+        if default >= TARGET_RATE:
+            sd.check_input_settings(device=device, channels=channels, samplerate=default)
+            return default
+    except (ValueError, sd.PortAudioError):
+        pass
+    for rate in sorted(CANDIDATE_RATES, key=lambda r: abs(r - TARGET_RATE)):
+        if rate < TARGET_RATE:
+            continue
+        try:
+            sd.check_input_settings(device=device, channels=channels, samplerate=rate)
+            return rate
+        except (ValueError, sd.PortAudioError):
+            continue
+    return FALLBACK_RATE
+
+
 class AudioRecorder:
     """
     Simple audio recorder using sounddevice.
     Produces a WAV file path when recording stops.
     Audio file is stored in the tmp folder
+
+    With 'warm' the input stream is opened once by open() and kept running, so start() does not
+    wait for the device. The last 'preroll' seconds before start() are kept in a ring buffer
+    and begin the recording, so speech started just before the click is not lost.
     """
 
-    def __init__(self, audio_dir: str, fs: int = 44100, channels: int = 1):
+    def __init__(self, audio_dir: str, fs: int | None = None, channels: int = 1, device=None,
+                 blocksize: int = BLOCKSIZE, latency: str | float | None = LATENCY,
+                 warm: bool = WARM_STREAM, preroll: float = PREROLL):
         self.audio_dir = audio_dir
         os.makedirs(self.audio_dir, exist_ok=True)
 
-        self.fs = fs
+        self.device = device
         self.channels = channels
+        self.fs = fs or probe_samplerate(device, channels)
+        self.blocksize = blocksize
+        self.latency = latency
+        self.warm = warm
+        self.preroll = preroll
 
         self._recording = False
         self._q: queue.Queue[np.ndarray] = queue.Queue()
@@ -27,13 +93,44 @@ class AudioRecorder:
         self._stream: sd.InputStream | None = None
         self._consumer_thread: threading.Thread | None = None
         self.output_file: str | None = None
+        self._started_at: float | None = None
+        # blocks captured before start(), trimmed to the preroll duration
+        self._ring: deque[np.ndarray] = deque()
+        self._ring_frames = 0
+        self._lock = threading.Lock()
+        # seconds from start() to the first audio block of the device, None until it arrived
+        self.first_audio_latency: float | None = None
+        self._awaiting_first = False
 
     # internal
-    def _audio_callback(self, indata, frames, time, status):
+    def _open_stream(self) -> sd.InputStream:
+        stream = sd.InputStream(
+            samplerate=self.fs,
+            channels=self.channels,
+            device=self.device,
+            blocksize=self.blocksize,
+            latency=self.latency,
+            callback=self._audio_callback,
+        )
+        stream.start()
+        return stream
+
+    def _audio_callback(self, indata, frames, time_info, status):
         if status:
-            print(f"Audio status: {status}")
-        if self._recording:
-            self._q.put(indata.copy())
+            logger.warning(f"Audio status: {status}")
+        with self._lock:
+            if self._recording:
+                if self._awaiting_first:
+                    self._awaiting_first = False
+                    self.first_audio_latency = time.perf_counter() - self._started_at
+                self._q.put(indata.copy())
+            elif self.warm and self.preroll > 0:
+                # blocks after stop() of a closing stream never reach the ring
+                self._ring.append(indata.copy())
+                self._ring_frames += len(indata)
+                limit = self.preroll * self.fs
+                while self._ring and self._ring_frames - len(self._ring[0]) >= limit:
+                    self._ring_frames -= len(self._ring.popleft())
 
     def _consume(self):
         while self._recording:
@@ -44,30 +141,52 @@ class AudioRecorder:
                 continue
 
     # public API
+    def open(self):
+        """Open the warm input stream now, start() opens it on demand otherwise."""
+        if self._stream is None:
+            self._stream = self._open_stream()
+            logger.info(f"Audio input open at {self.fs} Hz, blocksize {self.blocksize or 'auto'}, "
+                        f"latency {self._stream.latency:.3f} s")
+
+    def close(self):
+        """Close the input stream of warm mode."""
+        if self._stream is not None and not self._recording:
+            try:
+                self._stream.stop()
+                self._stream.close()
+            finally:
+                self._stream = None
+
     def start(self):
         if self._recording:
             return
-        self._frames = []
         self._q = queue.Queue()
-        self._recording = True
-
-        self._stream = sd.InputStream(
-            samplerate=self.fs,
-            channels=self.channels,
-            callback=self._audio_callback,
-        )
-        self._stream.start()
+        self.first_audio_latency = None
+        with self._lock:
+            # the pre-roll of the warm stream becomes the beginning of the recording
+            self._frames = list(self._ring) if self.warm else []
+            self._ring.clear()
+            self._ring_frames = 0
+            self._started_at = time.perf_counter()
+            self._awaiting_first = True
+            self._recording = True
+
+        if self.warm:
+            self.open()
+        else:
+            self._stream = self._open_stream()
 
         self._consumer_thread = threading.Thread(target=self._consume, daemon=True)
         self._consumer_thread.start()
-        print("Now recording... (press Stop when finished)")
+        logger.info("Now recording... (press Stop when finished)")
 
     def stop(self) -> str | None:
         if not self._recording:
             return None
 
-        self._recording = False
-        if self._stream is not None:
+        with self._lock:
+            self._recording = False
+        if self._stream is not None and not self.warm:
             try:
                 self._stream.stop()
                 self._stream.close()
@@ -77,19 +196,50 @@ class AudioRecorder:
         if self._consumer_thread is not None:
             self._consumer_thread.join(timeout=1.0)
             self._consumer_thread = None
+        # blocks queued after the consumer saw the stop
+        while True:
+            try:
+                self._frames.append(self._q.get_nowait())
+            except queue.Empty:
+                break
+
+        if self._started_at is not None:
+            observe("record", time.perf_counter() - self._started_at)
+            self._started_at = None
+        if self.first_audio_latency is not None:
+            observe("capture_first_audio", self.first_audio_latency)
+            logger.info(f"First audio {self.first_audio_latency * 1000:.0f} ms after start")
 
         if not self._frames:
-            print("No audio captured.")
+            logger.info("No audio captured.")
             return None
 
-        audio = np.concatenate(self._frames, axis=0)
+        ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.output_file = os.path.join(self.audio_dir, f"recording_{ts}.wav")
+        with span("encode"):
+            self._write_wav(self._frames, self.output_file)
+        logger.info(f"Recording finished. Saved to {self.output_file}")
+        return self.output_file
+
+    def snapshot(self, path: str) -> float:
+        """
+        Write the audio captured so far to 'path' while the recording continues, e.g. for
+        partial transcripts. Returns the duration in seconds, 0 if nothing was captured yet.
+        """
+        frames = list(self._frames)
+        if not frames:
+            return 0.0
+        self._write_wav(frames, path)
+        return sum(len(frame) for frame in frames) / self.fs
+
+    def _write_wav(self, frames: list[np.ndarray], path: str):
+        audio = np.concatenate(frames, axis=0)
         if audio.dtype != np.float32:
             audio = audio.astype(np.float32)
         audio_clipped = np.clip(audio, -1.0, 1.0)
         audio_int16 = (audio_clipped * 32767).astype(np.int16)
+        wav_write(path, self.fs, audio_int16)
 
-        ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-        self.output_file = os.path.join(self.audio_dir, f"recording_{ts}.wav")
-        wav_write(self.output_file, self.fs, audio_int16)
-        print(f"Recording finished. Saved to {self.output_file}")
-        return self.output_file
+    @property
+    def recording(self) -> bool:
+        return self._recording
@@ -0,0 +1,209 @@
+import logging
+import os
+import re
+import threading
+import time
+
+import numpy as np
+import requests
+from sgp4.api import SatrecArray
+from skyfield.api import load
+from skyfield.iokit import parse_tle_file
+from skyfield.sgp4lib import TEME_to_ITRF
+
+from metrics import incr
+
+logger = logging.getLogger(__name__)
+
+# Celestrak group with the space stations, the ISS among them
+STATIONS_URL = "https://celestrak.org/NORAD/elements/gp.php?GROUP=stations&FORMAT=tle"
+# local TLE store. Downloaded if missing or older than MAX_AGE_HOURS, used as is when offline.
+TLE_PATH = os.path.join(os.path.dirname(__file__), "stations.tle")
+MAX_AGE_HOURS = 12.0
+DOWNLOAD_TIMEOUT = 10
+
+# WGS84 ellipsoid for the observer position
+_WGS84_A_KM = 6378.137
+_WGS84_F = 1 / 298.257223563
+
+# common names used by visitors mapped onto the Celestrak names
+ALIASES = {
+    "iss": "iss (zarya)",
+    "international space station": "iss (zarya)",
+    "internationale raumstation": "iss (zarya)",
+    "raumstation": "iss (zarya)",
+    "tiangong": "css (tianhe)",
+    "chinese space station": "css (tianhe)",
+}
+
+
+def _normalize(name: str) -> str:
+    return re.sub(r"\s+", " ", name.strip().lower())
+
+
+def unix_to_jd(unix_seconds) -> tuple[np.ndarray, np.ndarray]:
+    """Split POSIX timestamps (UTC) into whole and fractional Julian dates as expected by SGP4."""
+    days = np.asarray(unix_seconds, dtype=np.float64) / 86400.0
+    whole = np.floor(days)
+    return whole + 2440587.5, days - whole
+
+
+def observer_itrs_km(lat_deg: float, lon_deg: float, height_m: float) -> np.ndarray:
+    """Geodetic WGS84 coordinates to an Earth fixed (ITRS) position vector in km."""
+    lat = np.radians(lat_deg)
+    lon = np.radians(lon_deg)
+    e2 = _WGS84_F * (2 - _WGS84_F)
+    n = _WGS84_A_KM / np.sqrt(1 - e2 * np.sin(lat) ** 2)
+    h = height_m / 1000.0
+    return np.array([
+        (n + h) * np.cos(lat) * np.cos(lon),
+        (n + h) * np.cos(lat) * np.sin(lon),
+        (n * (1 - e2) + h) * np.sin(lat),
+    ])
+
+
+class SatelliteCatalog:
+    """
+    On-disk TLE store with a prebuilt name and NORAD id index. The TLE file is refreshed when
+    it is older than 'max_age_hours' and the cached copy is used whenever a download fails.
+    Positions for many satellites and time steps are propagated at once with SatrecArray.
+    """
+
+    def __init__(self, url: str = STATIONS_URL, path: str = TLE_PATH, max_age_hours: float = MAX_AGE_HOURS):
+        self.url = url
+        self.path = path
+        self.max_age_hours = max_age_hours
+        self.satellites = []
+        self.by_name = {}
+        self.by_id = {}
+        self.loaded_at: float | None = None
+        self._lock = threading.Lock()
+
+    # TLE store
+
+    def age_hours(self) -> float | None:
+        if not os.path.exists(self.path):
+            return None
+        return (time.time() - os.path.getmtime(self.path)) / 3600.0
+
+    def is_stale(self) -> bool:
+        age = self.age_hours()
+        return age is None or age > self.max_age_hours
+
+    def download(self):
+        """Fetch the TLE file and replace the local copy atomically."""
+        logger.info(f"Downloading TLE data from {self.url}")
+        resp = requests.get(self.url, timeout=DOWNLOAD_TIMEOUT)
+        resp.raise_for_status()
+        tmp_path = self.path + ".part"
+        with open(tmp_path, "wb") as f:
+            f.write(resp.content)
+        os.replace(tmp_path, self.path)
+
+    def refresh(self, force: bool = False):
+        """Download new TLEs if the cache is stale (or 'force'), then rebuild the index."""
+        with self._lock:
+            if force or self.is_stale():
+                try:
+                    self.download()
+                except requests.RequestException as e:
+                    if not os.path.exists(self.path):
+                        raise RuntimeError(f"No TLE data available: {e}") from e
+                    logger.warning(f"TLE download failed, using cached file from "
+                                   f"{self.age_hours():.1f} h ago: {e}")
+            else:
+                incr("cache_hits", stage="tle")
+            self._build_index()
+
+    def _build_index(self):
+        ts = load.timescale()
+        with open(self.path, "rb") as f:
+            satellites = list(parse_tle_file(f, ts))
+        self.satellites = satellites
+        self.by_name = {_normalize(sat.name): sat for sat in satellites}
+        self.by_id = {sat.model.satnum: sat for sat in satellites}
+        self.loaded_at = time.time()
+        logger.info(f"Loaded {len(satellites)} satellites from {self.path}")
+
+    def _ensure_loaded(self):
+        if self.loaded_at is None or (time.time() - self.loaded_at) / 3600.0 > self.max_age_hours:
+            self.refresh()
+
+    # lookup
+
+    def get(self, key: str | int):
+        """Return the EarthSatellite for a name, alias or NORAD catalog number."""
+        self._ensure_loaded()
+        if isinstance(key, int) or str(key).strip().isdigit():
+            sat = self.by_id.get(int(key))
+        else:
+            name = _normalize(key)
+            sat = self.by_name.get(ALIASES.get(name, name))
+        if sat is None:
+            raise ValueError(f"Unknown satellite: {key}")
+        return sat
+
+    # batched propagation
+
+    def propagate(self, satellites, unix_seconds) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Propagate all 'satellites' to all POSIX timestamps in one SGP4 call.
+        Returns (error codes, TEME positions in km, TEME velocities in km/s)
+        with shapes (n_sat, n_t), (n_sat, n_t, 3) and (n_sat, n_t, 3).
+        """
+        jd, fr = unix_to_jd(np.atleast_1d(unix_seconds))
+        array = SatrecArray([sat.model for sat in satellites])
+        return array.sgp4(jd, fr)
+
+    def altaz(self, satellites, unix_seconds, lat_deg: float, lon_deg: float,
+              height_m: float) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Topocentric azimuth and altitude in degrees for every satellite and time step,
+        both of shape (n_sat, n_t). Entries where SGP4 reports an error are NaN.
+        """
+        unix_seconds = np.atleast_1d(np.asarray(unix_seconds, dtype=np.float64))
+        errors, r_teme, v_teme = self.propagate(satellites, unix_seconds)
+        n_sat, n_t = errors.shape
+
+        # TEME -> ITRS for all samples at once, UTC is used in place of UT1
+        jd, fr = unix_to_jd(np.tile(unix_seconds, n_sat))
+        r_itrs, _ = TEME_to_ITRF(jd, r_teme.reshape(-1, 3).T, v_teme.reshape(-1, 3).T, fraction_ut1=fr)
+
+        lat = np.radians(lat_deg)
+        lon = np.radians(lon_deg)
+        d = r_itrs - observer_itrs_km(lat_deg, lon_deg, height_m)[:, None]
+        east = -np.sin(lon) * d[0] + np.cos(lon) * d[1]
+        north = -np.sin(lat) * np.cos(lon) * d[0] - np.sin(lat) * np.sin(lon) * d[1] + np.cos(lat) * d[2]
+        up = np.cos(lat) * np.cos(lon) * d[0] + np.cos(lat) * np.sin(lon) * d[1] + np.sin(lat) * d[2]
+
+        azimuth = (np.degrees(np.arctan2(east, north)) % 360.0).reshape(n_sat, n_t)
+        altitude = np.degrees(np.arctan2(up, np.hypot(east, north))).reshape(n_sat, n_t)
+        invalid = errors != 0
+        azimuth[invalid] = np.nan
+        altitude[invalid] = np.nan
+        return azimuth, altitude
+
+    def track(self, key: str | int, lat_deg: float, lon_deg: float, height_m: float,
+              duration_s: float = 10.0, rate_hz: float = 10.0, start: float | None = None):
+        """
+        Precompute a tracking table for one satellite, e.g. 10 s of the ISS at 10 Hz.
+        Returns (POSIX timestamps, azimuth, altitude) as 1-D arrays.
+        """
+        start = time.time() if start is None else start
+        times = start + np.arange(0, duration_s, 1.0 / rate_hz)
+        azimuth, altitude = self.altaz([self.get(key)], times, lat_deg, lon_deg, height_m)
+        return times, azimuth[0], altitude[0]
+
+
+_catalog: SatelliteCatalog | None = None
+_catalog_lock = threading.Lock()
+
+
+def catalog() -> SatelliteCatalog:
+    """Process wide SatelliteCatalog, loaded on first use."""
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = SatelliteCatalog()
+            _catalog.refresh()
+        return _catalog
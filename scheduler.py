@@ -0,0 +1,155 @@
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+
+from metrics import incr, observe
+
+logger = logging.getLogger(__name__)
+
+# priority classes, lower values are served first
+INTERACTIVE = 0
+BULK = 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BULK: "bulk"}
+
+THREADS = 4
+# queued requests in total and per client before new ones are rejected
+MAX_QUEUE = 64
+MAX_PER_CLIENT = 8
+# one in BULK_SHARE dispatches goes to bulk work even while interactive requests wait
+BULK_SHARE = 4
+
+
+class Overloaded(RuntimeError):
+    """Raised by Scheduler.submit() when a request is rejected by admission control."""
+
+
+class _Job:
+    __slots__ = ("client", "priority", "func", "key", "future", "queued_at")
+
+    def __init__(self, client: str, priority: int, func, key, future: Future, queued_at: float):
+        self.client = client
+        self.priority = priority
+        self.func = func
+        self.key = key
+        self.future = future
+        self.queued_at = queued_at
+
+
+class Scheduler:
+    """
+    Runs requests of several kiosks on a fixed set of threads. Each priority class keeps one
+    FIFO queue per client and serves the clients round-robin, so one kiosk with many or long
+    requests cannot starve the others. Interactive requests go first, bulk work still gets
+    every BULK_SHARE-th dispatch and never occupies the last free thread. Requests beyond
+    the queue limits are rejected right away, and a request with the same key as one queued
+    or running shares its result instead of being computed again.
+    """
+
+    def __init__(self, threads: int = THREADS, max_queue: int = MAX_QUEUE, max_per_client: int = MAX_PER_CLIENT):
+        self.threads = threads
+        self.max_queue = max_queue
+        self.max_per_client = max_per_client
+        # per priority: client -> queue of jobs, in round-robin order
+        self._queues: dict[int, OrderedDict[str, deque[_Job]]] = {p: OrderedDict() for p in PRIORITY_NAMES}
+        self._inflight: dict[object, Future] = {}
+        self._queued = 0
+        self._queued_per_client: dict[str, int] = {}
+        self._running = {p: 0 for p in PRIORITY_NAMES}
+        self._dispatches = 0
+        self._stopped = False
+        self._cond = threading.Condition()
+        self._threads = [threading.Thread(target=self._work, name=f"scheduler-{i}", daemon=True)
+                         for i in range(threads)]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, client: str, func, priority: int = INTERACTIVE, key=None) -> Future:
+        """
+        Queue func() for 'client'. Returns a Future, shared with an identical request if 'key'
+        matches one queued or running. Raises Overloaded if the queue limits are reached.
+        """
+        with self._cond:
+            if key is not None and key in self._inflight:
+                incr("coalesced", priority=PRIORITY_NAMES[priority])
+                return self._inflight[key]
+            if self._queued >= self.max_queue or self._queued_per_client.get(client, 0) >= self.max_per_client:
+                incr("rejected", priority=PRIORITY_NAMES[priority])
+                raise Overloaded(f"Too many queued requests (client {client})")
+
+            future = Future()
+            job = _Job(client, priority, func, key, future, time.perf_counter())
+            self._queues[priority].setdefault(client, deque()).append(job)
+            self._queued += 1
+            self._queued_per_client[client] = self._queued_per_client.get(client, 0) + 1
+            if key is not None:
+                self._inflight[key] = future
+            self._cond.notify()
+            return future
+
+    def _next_job(self) -> _Job | None:
+        """Pick the next job under the lock: priority with bulk share, round-robin over clients."""
+        order = sorted(self._queues)
+        if (self._dispatches + 1) % BULK_SHARE == 0:
+            order.reverse()
+        for priority in order:
+            clients = self._queues[priority]
+            if not clients:
+                continue
+            # bulk work always leaves one thread for interactive requests
+            if priority != INTERACTIVE and self._running[priority] >= self.threads - 1 and self.threads > 1:
+                continue
+            client, jobs = next(iter(clients.items()))
+            job = jobs.popleft()
+            # the client moves to the end of the round-robin order
+            del clients[client]
+            if jobs:
+                clients[client] = jobs
+            self._queued -= 1
+            self._queued_per_client[client] -= 1
+            if not self._queued_per_client[client]:
+                del self._queued_per_client[client]
+            self._dispatches += 1
+            return job
+        return None
+
+    def _work(self):
+        while True:
+            with self._cond:
+                job = self._next_job()
+                while job is None:
+                    if self._stopped:
+                        return
+                    self._cond.wait()
+                    job = self._next_job()
+                self._running[job.priority] += 1
+
+            priority = PRIORITY_NAMES[job.priority]
+            observe("queue_wait", time.perf_counter() - job.queued_at, priority=priority)
+            if job.future.set_running_or_notify_cancel():
+                try:
+                    job.future.set_result(job.func())
+                except BaseException as e:
+                    job.future.set_exception(e)
+
+            with self._cond:
+                self._running[job.priority] -= 1
+                if job.key is not None:
+                    self._inflight.pop(job.key, None)
+                # a bulk job may have been held back for a free thread
+                self._cond.notify()
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "threads": self.threads,
+                "queued": self._queued,
+                "queued_per_client": dict(self._queued_per_client),
+                "running": {PRIORITY_NAMES[p]: n for p, n in self._running.items()},
+            }
+
+    def shutdown(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
@@ -0,0 +1,402 @@
+import argparse
+import json
+import logging
+import os
+import tempfile
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING
+from urllib.parse import urlparse, parse_qs
+
+# Custom imports from other application parts. astro, client, devices and starindex load
+# pandas, the catalog and the ephemeris; they are imported where used (and once by main()),
+# so that spawned worker processes, which re-import this module, do not load them again.
+import capture
+from metrics import metrics
+import memo
+from scheduler import Scheduler, Overloaded, INTERACTIVE, BULK
+import scheduler
+import workers
+
+if TYPE_CHECKING:
+    from client import Client
+    from devices import DeviceRegistry
+
+# directory for saving uploaded audio files, each upload is removed after transcription
+AUDIO_DIR = os.path.join(os.path.dirname(__file__), "tmp")
+# seconds a kiosk is asked to wait when its request was rejected by the scheduler
+RETRY_AFTER = 1
+
+HOST = "0.0.0.0"
+PORT = 8080
+
+logger = logging.getLogger(__name__)
+
+
+class StarseekerService:
+    """
+    Headless version of the processing pipeline of the RecorderApp. Holds a single Client
+    and exposes the individual steps (transcribe, query, seek, convert, transmit)
+    so that several kiosks can share one warm backend. Pointing goes to all devices
+    of the registry (devices.json) unless a single URL is given.
+    """
+
+    def __init__(self, client: "Client | None" = None, registry: "DeviceRegistry | None" = None):
+        from client import Client
+        import devices
+
+        self.client = client or Client()
+        self.registry = registry or devices.registry()
+        os.makedirs(AUDIO_DIR, exist_ok=True)
+
+    def transcribe(self, audio: bytes) -> str:
+        """Write uploaded WAV bytes to a temporary file and transcribe it via Whisper."""
+        fd, wav_path = tempfile.mkstemp(suffix=".wav", dir=AUDIO_DIR)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(audio)
+            return self.client.transcribe(wav_path)
+        finally:
+            os.remove(wav_path)
+
+    def query(self, text: str) -> dict:
+        skyobj, skytyp = self.client.resolve(text)
+        return {"text": text, "object": skyobj, "type": skytyp}
+
+    def seek(self, skyobj: str, skytyp: str) -> dict:
+        import astro
+
+        ra, dec = astro.seek(skyobj, skytyp)
+        return {"object": skyobj, "type": skytyp, "ra_hours": ra.hours, "dec_degrees": dec.degrees}
+
+    def altaz(self, skyobj: str, skytyp: str, **location) -> dict:
+        import astro
+
+        pool = workers.pool()
+        if pool is not None:
+            # CPU bound part in a worker process, the request thread only waits
+            location = {"lat_deg": astro.OBSERVER_LAT, "lon_deg": astro.OBSERVER_LON,
+                        "height_m": astro.OBSERVER_HEIGHT, **location}
+            return {"object": skyobj, "type": skytyp, **pool.pointing(skyobj, skytyp, **location).result()}
+
+        ra, dec = astro.seek(skyobj, skytyp)
+        azimuth, altitude, con_az, con_alt = astro.convert(ra, dec, **location)
+        return {
+            "object": skyobj,
+            "type": skytyp,
+            "ra_hours": ra.hours,
+            "dec_degrees": dec.degrees,
+            "azimuth": azimuth,
+            "altitude": altitude,
+            "converted_azimuth": con_az,
+            "converted_altitude": con_alt,
+        }
+
+    def visible(self, min_altitude: float = 10.0, max_magnitude: float = 3.0,
+                limit: int | None = None, **location) -> dict:
+        import astro
+
+        objects = astro.visible_now(min_altitude, max_magnitude, limit, **location)
+        return {"count": len(objects), "objects": objects}
+
+    def plan(self, skyobj: str, skytyp: str, min_altitude: float | None = None, **location) -> dict:
+        import astro
+
+        kwargs = {"min_altitude": min_altitude} if min_altitude is not None else {}
+        info = astro.plan(skyobj, skytyp, **kwargs, **location)
+        return {k: v.isoformat() if hasattr(v, "isoformat") else v for k, v in info.items()}
+
+    def identify(self, params: dict) -> dict:
+        """Nearest catalog stars for a pointing direction given as alt/az or ra/dec (degrees)."""
+        import starindex
+
+        k = int(params.get("k", 3))
+        if "ra" in params and "dec" in params:
+            stars = starindex.index().nearest_radec(float(params["ra"]), float(params["dec"]), k)
+        elif "alt" in params and "az" in params:
+            stars = starindex.index().nearest_altaz(float(params["alt"]), float(params["az"]), k)
+        else:
+            raise ValueError("Parameters 'alt' and 'az' or 'ra' and 'dec' are required.")
+        return {"stars": stars}
+
+    def list_devices(self) -> dict:
+        return {"devices": [device.to_dict() for device in self.registry.devices]}
+
+    def point(self, skyobj: str, skytyp: str, url: str | None = None,
+              names: list[str] | None = None, **location) -> dict:
+        """
+        Resolve the object and transmit it to the Arduino webserver at 'url' if above the
+        horizon. 'url' has to be the address of a registered device (or --transmit-url),
+        requests never make the service contact other hosts. Without 'url' all devices of the
+        registry (or the ones in 'names') are pointed concurrently, each for its own location.
+        Satellites are followed along their track, see DeviceRegistry.follow().
+        """
+        if url is not None:
+            registered = {device.url.rstrip("/"): device.url for device in self.registry.devices}
+            if not isinstance(url, str) or url.rstrip("/") not in registered:
+                raise ValueError(f"Unknown device URL: {url}")
+            url = registered[url.rstrip("/")]
+
+        import astro
+
+        if url is None:
+            if skytyp.lower() == "satellite":
+                results = self.registry.follow(skyobj, names)
+            else:
+                ra, dec = astro.seek(skyobj, skytyp)
+                results = self.registry.fan_out(ra, dec, names)
+            return {
+                "object": skyobj,
+                "type": skytyp,
+                "transmitted": any(r["transmitted"] for r in results),
+                "devices": results,
+            }
+
+        result = self.altaz(skyobj, skytyp, **location)
+        result["transmitted"] = False
+        if result["altitude"] < 0:
+            logger.info("Object is below the horizon")
+            return result
+        res_status = astro.transmit(url, result["converted_altitude"], result["converted_azimuth"])
+        result["transmitted"] = res_status == 200
+        result["status"] = res_status
+        if result["transmitted"]:
+            logger.info(f"Information transmitted to {url}")
+        else:
+            logger.warning("Transmission failed!")
+        return result
+
+    def process_audio(self, audio: bytes, point: bool = False) -> dict:
+        """
+        Full pipeline as run by the GUI: transcribe, query, resolve and optionally point.
+        Captured into a replay bundle if STARSEEKER_CAPTURE is set.
+        """
+        with capture.session("server"):
+            capture.audio(audio)
+            text = self.transcribe(audio)
+            query = self.query(text)
+            if point:
+                result = self.point(query["object"], query["type"])
+            else:
+                result = self.altaz(query["object"], query["type"])
+                capture.note("pointing", **result)
+            result["text"] = text
+            return result
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    """
+    Maps HTTP endpoints onto the StarseekerService.
+
+    GET  /health                               -> {"status": "ok"}
+    GET  /metrics                              -> stage timings in Prometheus text format
+    GET  /metrics.json                         -> same summary as JSON
+    GET  /seek?object=Mars&type=Planet         -> RA/Dec
+    GET  /altaz?object=Mars&type=Planet        -> Azimuth/Altitude and servo angles
+    GET  /visible?min_alt=10&max_mag=3&limit=5 -> brightest objects currently above the horizon
+    GET  /identify?alt=40&az=120&k=3           -> nearest stars to a direction (or ra=&dec=)
+    GET  /plan?object=Vega&type=Star&min_alt=10 -> next rise, transit, set and observing window
+    GET  /devices                              -> registered laser pointers
+    GET  /cache                                -> hit rates of the seek/convert memoization
+    GET  /scheduler                            -> queue depths and running requests
+
+    Requests run on the fair Scheduler: per-client queues (X-Client-Id header or address),
+    satellites, /plan and /visible as bulk work, identical requests within a time bucket
+    coalesced, and 503 when the queues are full.
+    POST /text    {"text": "..."}              -> object and type via Ollama
+    POST /audio   WAV body, ?point=1           -> full pipeline for a recording
+    POST /point   {"object": .., "type": .., "url": ..}  -> resolve and transmit to the registered device at this URL
+    POST /point   {"object": .., "type": .., "devices": [..]} -> transmit to all/named devices
+    """
+
+    service: StarseekerService
+    scheduler: Scheduler
+
+    # helpers
+
+    def _send_json(self, status: int, payload: dict, headers: dict | None = None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_text(self, status: int, text: str):
+        body = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length", 0))
+        return self.rfile.read(length) if length else b""
+
+    @staticmethod
+    def _json(body: bytes) -> dict:
+        """Decode a JSON object body, runs inside the handler so bad input becomes a 400."""
+        data = json.loads(body) if body else {}
+        if not isinstance(data, dict):
+            raise ValueError("Request body must be a JSON object.")
+        return data
+
+    @staticmethod
+    def _location(params: dict) -> dict:
+        """Extract optional observer location overrides for convert()."""
+        keys = {"lat": "lat_deg", "lon": "lon_deg", "height": "height_m"}
+        return {arg: float(params[key]) for key, arg in keys.items() if key in params}
+
+    @staticmethod
+    def _object(params: dict) -> tuple[str, str]:
+        if "object" not in params or "type" not in params:
+            raise ValueError("Parameters 'object' and 'type' are required.")
+        return params["object"], params["type"]
+
+    def _client_id(self) -> str:
+        """Kiosks may identify themselves, otherwise requests are grouped by address."""
+        return self.headers.get("X-Client-Id") or self.client_address[0]
+
+    @staticmethod
+    def _priority(skytyp: str | None = None) -> int:
+        # satellite lookups fetch and propagate TLEs, they must not hold up quick requests
+        return BULK if isinstance(skytyp, str) and skytyp.lower() == "satellite" else INTERACTIVE
+
+    @staticmethod
+    def _key(name: str, params: dict) -> tuple:
+        """Coalescing key: endpoint, parameters and the memoization time bucket of astro.py."""
+        import astro
+
+        bucket = astro.SATELLITE_BUCKET if params.get("type", "").lower() == "satellite" else astro.SKY_BUCKET
+        normalized = tuple(sorted((k, str(v).lower()) for k, v in params.items()))
+        return name, normalized, int(time.time() // bucket)
+
+    def _dispatch(self, handler, priority: int = INTERACTIVE, key=None):
+        try:
+            future = self.scheduler.submit(self._client_id(), handler, priority, key)
+            self._send_json(200, future.result())
+        except Overloaded as e:
+            self._send_json(503, {"error": str(e)}, {"Retry-After": str(RETRY_AFTER)})
+        except (ValueError, KeyError, FileNotFoundError) as e:
+            self._send_json(400, {"error": str(e)})
+        except Exception as e:
+            logger.exception(f"Error: {e}")
+            self._send_json(500, {"error": str(e)})
+
+    # endpoints
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+
+        if parsed.path == "/health":
+            self._send_json(200, {"status": "ok"})
+        elif parsed.path == "/metrics":
+            self._send_text(200, metrics.render_prometheus())
+        elif parsed.path == "/metrics.json":
+            self._send_json(200, metrics.summary())
+        elif parsed.path == "/cache":
+            self._send_json(200, memo.stats())
+        elif parsed.path == "/devices":
+            self._send_json(200, self.service.list_devices())
+        elif parsed.path == "/scheduler":
+            self._send_json(200, self.scheduler.stats())
+        elif parsed.path == "/seek":
+            self._dispatch(lambda: self.service.seek(*self._object(params)),
+                           self._priority(params.get("type")), self._key("seek", params))
+        elif parsed.path == "/altaz":
+            self._dispatch(lambda: self.service.altaz(*self._object(params), **self._location(params)),
+                           self._priority(params.get("type")), self._key("altaz", params))
+        elif parsed.path == "/plan":
+            self._dispatch(lambda: self.service.plan(
+                *self._object(params),
+                float(params["min_alt"]) if "min_alt" in params else None,
+                **self._location(params),
+            ), BULK, self._key("plan", params))
+        elif parsed.path == "/identify":
+            self._dispatch(lambda: self.service.identify(params), INTERACTIVE, self._key("identify", params))
+        elif parsed.path == "/visible":
+            self._dispatch(lambda: self.service.visible(
+                float(params.get("min_alt", 10.0)),
+                float(params.get("max_mag", 3.0)),
+                int(params["limit"]) if "limit" in params else None,
+                **self._location(params),
+            ), BULK, self._key("visible", params))
+        else:
+            self._send_json(404, {"error": f"Unknown endpoint: {parsed.path}"})
+
+    def do_POST(self):
+        parsed = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+
+        # the body is read by the request thread, the scheduler threads decode and compute
+        if parsed.path == "/audio":
+            point = params.get("point", "0").lower() in ("1", "true", "yes")
+            audio = self._read_body()
+            self._dispatch(lambda: self.service.process_audio(audio, point=point))
+        elif parsed.path == "/text":
+            body = self._read_body()
+            self._dispatch(lambda: self.service.query(self._json(body)["text"]), INTERACTIVE, ("text", body))
+        elif parsed.path == "/point":
+            body = self._read_body()
+            try:
+                priority = self._priority(self._json(body).get("type"))
+            except ValueError:
+                # rejected by the handler with a 400
+                priority = INTERACTIVE
+
+            def handler():
+                data = self._json(body)
+                skyobj, skytyp = self._object(data)
+                return self.service.point(skyobj, skytyp, url=data.get("url"), names=data.get("devices"),
+                                          **self._location(data))
+            self._dispatch(handler, priority)
+        else:
+            self._send_json(404, {"error": f"Unknown endpoint: {parsed.path}"})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless Starseeker HTTP service.")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--transmit-url",
+                        help="single Arduino webserver used by /point and /audio?point=1 "
+                             "instead of the devices in devices.json")
+    parser.add_argument("--threads", type=int, default=scheduler.THREADS,
+                        help="number of requests computed at the same time")
+    parser.add_argument("--max-queue", type=int, default=scheduler.MAX_QUEUE,
+                        help="queued requests in total before new ones are rejected with 503")
+    parser.add_argument("--max-per-client", type=int, default=scheduler.MAX_PER_CLIENT,
+                        help="queued requests per client before new ones are rejected with 503")
+    parser.add_argument("--metrics", action="store_true",
+                        help="enable stage timing instrumentation (also via STARSEEKER_METRICS=1)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s: %(message)s")
+    if args.metrics:
+        metrics.enable()
+
+    # loads the ephemeris and the Hipparcos catalog once, all requests share them afterwards
+    import astro  # noqa: F401
+    from devices import DeviceRegistry
+
+    registry = DeviceRegistry.single(args.transmit_url) if args.transmit_url else None
+    RequestHandler.service = StarseekerService(registry=registry)
+    RequestHandler.scheduler = Scheduler(args.threads, args.max_queue, args.max_per_client)
+    if workers.pool() is not None:
+        workers.pool().warm()
+    httpd = ThreadingHTTPServer((args.host, args.port), RequestHandler)
+    logger.info(f"Starseeker service listening on http://{args.host}:{args.port}")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
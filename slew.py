@@ -0,0 +1,118 @@
+import os
+from typing import NamedTuple
+
+import numpy as np
+
+import mount
+
+# rate and acceleration limits of the pointer servos, in deg/s and deg/s²
+MAX_RATE = float(os.environ.get("STARSEEKER_SLEW_RATE", "90"))
+MAX_ACCEL = float(os.environ.get("STARSEEKER_SLEW_ACCEL", "180"))
+# time between trajectory points, longer slews use fewer, wider spaced points
+SAMPLE_INTERVAL = 0.05
+# trajectory points per batch, the sketch keeps at most this many in memory
+MAX_POINTS = 64
+# servo azimuth/altitude the sketch moves to after power up
+HOME = (90.0, 10.0)
+
+
+class Slew(NamedTuple):
+    target: tuple[float, float]
+    flipped: bool
+    duration: float
+    interval: float
+    # (n, 2) array of servo azimuth/altitude, the last row is the target
+    points: np.ndarray
+
+
+def profile_duration(distance, rate: float = MAX_RATE, accel: float = MAX_ACCEL):
+    """
+    Duration of a rest-to-rest move over 'distance' degrees (scalar or array): trapezoidal
+    velocity profile, triangular for moves too short to reach the full rate.
+    """
+    distance = np.abs(np.asarray(distance, dtype=np.float64))
+    peak = np.minimum(rate, np.sqrt(distance * accel))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(distance > 0, distance / peak + peak / accel, 0.0)
+
+
+def profile_position(t, distance: float, rate: float = MAX_RATE, accel: float = MAX_ACCEL):
+    """Degrees travelled at the times 't' (array) of the move of profile_duration()."""
+    t = np.asarray(t, dtype=np.float64)
+    distance = abs(distance)
+    if distance == 0:
+        return np.zeros_like(t)
+    peak = min(rate, np.sqrt(distance * accel))
+    ramp = peak / accel
+    duration = distance / peak + ramp
+    t = np.clip(t, 0.0, duration)
+    return np.where(
+        t < ramp, 0.5 * accel * t ** 2,
+        np.where(t < duration - ramp, 0.5 * accel * ramp ** 2 + peak * (t - ramp),
+                 distance - 0.5 * accel * (duration - t) ** 2))
+
+
+def trajectory(start, target, rate: float = MAX_RATE, accel: float = MAX_ACCEL,
+               interval: float = SAMPLE_INTERVAL, max_points: int = MAX_POINTS) -> tuple[float, float, np.ndarray]:
+    """
+    Sampled move of both servos from 'start' to 'target' (servo azimuth, altitude). The axis
+    with the longer way follows the profile, the other one is scaled to arrive at the same time.
+    Returns (duration, interval, points).
+    """
+    start = np.asarray(start, dtype=np.float64)
+    delta = np.asarray(target, dtype=np.float64) - start
+    distance = float(np.max(np.abs(delta)))
+    duration = float(profile_duration(distance, rate, accel))
+    n = int(np.clip(np.ceil(duration / interval), 1, max_points))
+    times = duration * np.arange(1, n + 1) / n
+    fraction = profile_position(times, distance, rate, accel) / distance if distance else np.ones(n)
+    return duration, duration / n, start + np.outer(fraction, delta)
+
+
+def intercept(current, track, interval: float, rate: float = MAX_RATE,
+              accel: float = MAX_ACCEL) -> tuple[int, np.ndarray]:
+    """
+    Move from the servo position 'current' onto a moving target, given as an (n, 2) array of
+    servo azimuth/altitude every 'interval' seconds from now. Picks the first sample that can
+    be reached in time and returns its index and the move sampled at the same spacing, ending
+    on that sample. The last sample is taken if none can be reached.
+    """
+    track = np.asarray(track, dtype=np.float64)
+    current = np.asarray(current, dtype=np.float64)
+    distance = np.max(np.abs(track - current), axis=1)
+    reachable = profile_duration(distance, rate, accel) <= interval * np.arange(len(track))
+    index = int(np.argmax(reachable)) if reachable.any() else len(track) - 1
+    if index == 0:
+        return 0, track[:1]
+    delta = track[index] - current
+    fraction = profile_position(interval * np.arange(1, index + 1), distance[index], rate, accel)
+    fraction = fraction / distance[index] if distance[index] else np.ones(index)
+    # a move shorter than the wait arrives early and holds the position
+    return index, current + np.outer(np.minimum(fraction, 1.0), delta)
+
+
+def plan(current, azimuth: float, altitude: float, calibration: mount.Calibration | None = None,
+         rate: float = MAX_RATE, accel: float = MAX_ACCEL) -> Slew:
+    """
+    Plan the slew from the servo position 'current' to a true azimuth/altitude. Where both
+    the direct and the flipped solution are reachable (around the flip boundary of
+    mount.servo_angles()), the one with the shorter slew is taken.
+    """
+    servo_az, servo_alt, reachable = mount.servo_candidates(azimuth, altitude, calibration)
+    servo_az = np.clip(servo_az, mount.SERVO_MIN, mount.SERVO_MAX)
+    servo_alt = np.clip(servo_alt, mount.SERVO_MIN, mount.SERVO_MAX)
+    if reachable.any():
+        distance = np.maximum(np.abs(servo_az - current[0]), np.abs(servo_alt - current[1]))
+        durations = np.where(reachable, profile_duration(distance, rate, accel), np.inf)
+        choice = int(np.argmin(durations))
+    else:
+        # out of range either way, fall back to the clipped solution of servo_angles()
+        choice = int(mount.servo_angles(azimuth, altitude, calibration)[2])
+    target = (float(servo_az[choice]), float(servo_alt[choice]))
+    duration, interval, points = trajectory(current, target, rate, accel)
+    return Slew(target, bool(choice), duration, interval, points)
+
+
+def time_to_target(results: list[dict]) -> float:
+    """Seconds until the last pointer of a DeviceRegistry.fan_out() result is on target."""
+    return max((r.get("slew_time", 0.0) for r in results if r.get("transmitted")), default=0.0)
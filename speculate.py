@@ -0,0 +1,179 @@
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from client import Client, parse_command
+from latency import LatencyTracker
+from metrics import incr
+import stt
+
+logger = logging.getLogger(__name__)
+
+# minimum parser confidence before the pointers are moved on a partial transcript
+PREPOSITION_CONFIDENCE = 0.9
+# seconds between partial transcripts while recording, and minimum audio before the first one
+PARTIAL_INTERVAL = 1.5
+MIN_PARTIAL_AUDIO = 1.0
+
+
+class Speculator:
+    """
+    Runs the resolver on partial transcripts while the visitor is still speaking. Once a
+    partial transcript names an object with high confidence, seek() and convert() run and the
+    pointers are moved there, so they are already on target when the final transcript arrives.
+    finish() compares the speculation with the final transcript and reports whether it holds.
+    """
+
+    def __init__(self, client: Client, min_confidence: float = PREPOSITION_CONFIDENCE,
+                 preposition: bool = True):
+        self.client = client
+        self.min_confidence = min_confidence
+        self.preposition = preposition
+        self.target: tuple[str, str] | None = None
+        self.positioned_at: float | None = None
+        self._lock = threading.Lock()
+        # only the newest target is pointed at, stale speculations are dropped
+        self._pending: tuple[str, str] | None = None
+        self._worker: threading.Thread | None = None
+
+    def reset(self):
+        with self._lock:
+            self.target = None
+            self.positioned_at = None
+            self._pending = None
+
+    def feed(self, partial_text: str):
+        """Handle one partial transcript, cheap if it names nothing new."""
+        intent = parse_command(partial_text)
+        if intent is None or intent.confidence < self.min_confidence:
+            return
+        target = (intent.object, intent.type)
+        with self._lock:
+            if target == self.target:
+                return
+            logger.info(f"Speculating on {intent.object} from partial transcript '{partial_text}' "
+                        f"(confidence {intent.confidence:.2f})")
+            self.target = target
+            self.positioned_at = None
+            self._pending = target
+            if self.preposition and (self._worker is None or not self._worker.is_alive()):
+                self._worker = threading.Thread(target=self._position_pending, daemon=True)
+                self._worker.start()
+
+    def _position_pending(self):
+        from astro import seek
+        import devices
+
+        while True:
+            with self._lock:
+                target, self._pending = self._pending, None
+            if target is None:
+                return
+            try:
+                ra, dec = seek(*target)
+                results = devices.registry().fan_out(ra, dec)
+            except Exception as e:
+                logger.warning(f"Pre-positioning on {target[0]} failed: {e}")
+                continue
+            # on target only if every board that sees the object took the move,
+            # otherwise finish() reports a miss and all boards are pointed again
+            complete = any(r["transmitted"] for r in results) and all(
+                r["transmitted"] or r.get("error") == "below horizon" for r in results)
+            with self._lock:
+                if self.target == target and complete:
+                    self.positioned_at = time.monotonic()
+
+    def finish(self, final_text: str) -> tuple[str, str, bool]:
+        """
+        Resolve the final transcript. Returns (object, type, on_target), where 'on_target'
+        tells that the pointers were already moved to this object by the speculation.
+        Satellites and positions older than the memoization bucket of astro.py are never
+        on target, they have moved since.
+        """
+        from astro import SKY_BUCKET
+
+        skyobj, skytyp = self.client.resolve(final_text)
+        with self._lock:
+            worker = self._worker
+        if worker is not None:
+            # a pre-positioning still in flight decides whether the pointers are on target
+            worker.join(timeout=5.0)
+        with self._lock:
+            speculated = self.target
+            on_target = (speculated == (skyobj, skytyp) and self.positioned_at is not None
+                         and skytyp.lower() != "satellite"
+                         and time.monotonic() - self.positioned_at < SKY_BUCKET)
+        if speculated is None:
+            incr("speculation", outcome="none")
+        elif on_target:
+            incr("speculation", outcome="confirmed")
+            logger.info(f"Speculation confirmed, pointers already on {skyobj}")
+        elif speculated == (skyobj, skytyp):
+            incr("speculation", outcome="repoint")
+            logger.info(f"Speculation confirmed, pointing at {skyobj} again (moving target, stale or failed send)")
+        else:
+            incr("speculation", outcome="corrected")
+            logger.info(f"Speculation on {speculated[0]} discarded, final object is {skyobj}")
+        self.reset()
+        return skyobj, skytyp, on_target
+
+
+class PartialTranscriber:
+    """
+    Transcribes the growing recording of an AudioRecorder every PARTIAL_INTERVAL seconds and
+    feeds the partial transcripts to a Speculator until the recording stops.
+    """
+
+    def __init__(self, recorder, speculator: Speculator, interval: float = PARTIAL_INTERVAL):
+        self.recorder = recorder
+        self.speculator = speculator
+        self.interval = interval
+        # same backends with their own failure and latency bookkeeping, so that partial clips
+        # neither make AutoTranscriber skip a backend for the final transcript nor shorten
+        # the adaptive timeout of the full recordings
+        client = speculator.client
+        self.transcriber = _partial_transcriber(client.transcriber, client.latency["whisper_partial"])
+        self._active = False
+        self._thread: threading.Thread | None = None
+
+    def start(self):
+        self.speculator.reset()
+        self._active = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop after the recording, a partial transcript still in flight is ignored."""
+        self._active = False
+
+    def _run(self):
+        fd, path = tempfile.mkstemp(suffix=".wav", dir=self.recorder.audio_dir)
+        os.close(fd)
+        try:
+            while self._active and self.recorder.recording:
+                time.sleep(self.interval)
+                if not (self._active and self.recorder.recording):
+                    break
+                if self.recorder.snapshot(path) < MIN_PARTIAL_AUDIO:
+                    continue
+                try:
+                    text = self.transcriber.transcribe(path)
+                except Exception as e:
+                    logger.debug(f"Partial transcription failed: {e}")
+                    continue
+                if text and self._active:
+                    self.speculator.feed(text)
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def _partial_transcriber(transcriber: stt.Transcriber, tracker: LatencyTracker) -> stt.Transcriber:
+    """Copy of 'transcriber' whose Whisper servers record into 'tracker'."""
+    if isinstance(transcriber, stt.AutoTranscriber):
+        return stt.AutoTranscriber([_partial_transcriber(b, tracker) for b in transcriber.backends])
+    if isinstance(transcriber, stt.WhisperServer):
+        return stt.WhisperServer(transcriber.url, transcriber.timeout, tracker=tracker)
+    return transcriber
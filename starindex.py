@@ -0,0 +1,134 @@
+import glob
+import logging
+import os
+import pickle
+import threading
+
+import numpy as np
+from scipy.spatial import cKDTree
+from skyfield.api import wgs84
+
+import astro
+import names
+
+logger = logging.getLogger(__name__)
+
+# directory for the per-night index files, older nights are removed when a new one is built
+CACHE_DIR = os.path.join(os.path.dirname(__file__), "cache")
+# only stars a visitor could actually point at are indexed by default
+INDEX_MAG_LIMIT = 6.5
+# reference epoch of the Hipparcos positions
+HIPPARCOS_EPOCH = 1991.25
+
+
+def _unit_vectors(ra_deg: np.ndarray, dec_deg: np.ndarray) -> np.ndarray:
+    ra = np.radians(ra_deg)
+    dec = np.radians(dec_deg)
+    cos_dec = np.cos(dec)
+    return np.column_stack((cos_dec * np.cos(ra), cos_dec * np.sin(ra), np.sin(dec)))
+
+
+class StarIndex:
+    """
+    KD-tree over unit vectors of the Hipparcos stars, with proper motion applied to the
+    epoch the index was built for. Answers "which star is in this direction" for RA/Dec
+    and Alt/Az queries. Built from the catalog already loaded by astro.py.
+    """
+
+    def __init__(self, hip: np.ndarray, magnitude: np.ndarray, vectors: np.ndarray, key: str):
+        self.hip = hip
+        self.magnitude = magnitude
+        self.vectors = vectors
+        self.key = key
+        self.tree = cKDTree(vectors)
+
+    @classmethod
+    def build(cls, mag_limit: float = INDEX_MAG_LIMIT, key: str | None = None) -> "StarIndex":
+        df = astro.df
+        stars = df[(df["magnitude"] <= mag_limit) & df["ra_degrees"].notnull()]
+        years = astro.ts.now().J - HIPPARCOS_EPOCH
+
+        # linear proper motion, pmRA already includes the cos(dec) factor
+        dec0 = stars["dec_degrees"].to_numpy()
+        dec = dec0 + stars["dec_mas_per_year"].fillna(0).to_numpy() * years / 3.6e6
+        ra = stars["ra_degrees"].to_numpy() + (
+            stars["ra_mas_per_year"].fillna(0).to_numpy() * years / 3.6e6 / np.cos(np.radians(dec0))
+        )
+
+        return cls(
+            hip=stars.index.to_numpy(),
+            magnitude=stars["magnitude"].to_numpy(),
+            vectors=_unit_vectors(ra, dec),
+            key=key or astro.night_key(),
+        )
+
+    # queries
+
+    def nearest_radec(self, ra_deg: float, dec_deg: float, k: int = 3,
+                      max_separation: float | None = None) -> list[dict]:
+        """Return the 'k' nearest stars to an ICRS direction, closest first."""
+        vector = _unit_vectors(np.atleast_1d(ra_deg), np.atleast_1d(dec_deg))[0]
+        upper = np.inf if max_separation is None else 2 * np.sin(np.radians(max_separation) / 2)
+        distances, idx = self.tree.query(vector, k=k, distance_upper_bound=upper)
+        results = []
+        for d, i in zip(np.atleast_1d(distances), np.atleast_1d(idx)):
+            if not np.isfinite(d):
+                break
+            hip = int(self.hip[i])
+            results.append({
+                "hip": hip,
+                "name": names.index().for_hip(hip).name,
+                "magnitude": float(self.magnitude[i]),
+                "separation": float(np.degrees(2 * np.arcsin(min(d / 2, 1.0)))),
+            })
+        return results
+
+    def nearest_altaz(self, altitude: float, azimuth: float, k: int = 3,
+                      max_separation: float | None = None,
+                      lat_deg: float = astro.OBSERVER_LAT,
+                      lon_deg: float = astro.OBSERVER_LON,
+                      height_m: float = astro.OBSERVER_HEIGHT) -> list[dict]:
+        """Return the 'k' nearest stars to a pointing direction of the observer right now."""
+        observer = (astro.eph["earth"] + wgs84.latlon(lat_deg, lon_deg, elevation_m=height_m)).at(astro.ts.now())
+        ra, dec, _ = observer.from_altaz(alt_degrees=altitude, az_degrees=azimuth).radec()
+        return self.nearest_radec(ra.hours * 15.0, dec.degrees, k, max_separation)
+
+    # disk cache
+
+    @staticmethod
+    def path_for(key: str) -> str:
+        return os.path.join(CACHE_DIR, f"starindex_{key}.pkl")
+
+    def save(self):
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(self.path_for(self.key), "wb") as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        # drop indexes of previous nights
+        for path in glob.glob(os.path.join(CACHE_DIR, "starindex_*.pkl")):
+            if path != self.path_for(self.key):
+                os.remove(path)
+
+    @classmethod
+    def load_or_build(cls, key: str | None = None) -> "StarIndex":
+        key = key or astro.night_key()
+        path = cls.path_for(key)
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        logger.info(f"Building star index for night {key}")
+        index = cls.build(key=key)
+        index.save()
+        return index
+
+
+_index: StarIndex | None = None
+_index_lock = threading.Lock()
+
+
+def index() -> StarIndex:
+    """Process wide StarIndex for the current night, rebuilt when the night changes."""
+    global _index
+    with _index_lock:
+        if _index is None or _index.key != astro.night_key():
+            _index = StarIndex.load_or_build()
+        return _index
@@ -0,0 +1,257 @@
+import abc
+import logging
+import os
+import socket
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+
+from latency import Cancelled, LatencyTracker, timed_call
+from metrics import incr
+
+logger = logging.getLogger(__name__)
+
+# "auto" picks the fastest available backend, "server" or "local" force one of them
+BACKEND = os.environ.get("STARSEEKER_STT", "auto")
+# size of the in-process Whisper model (tiny, base, small, medium, ...) and decoding beam width.
+# Smaller models and beam 1 are faster, larger ones more accurate.
+LOCAL_MODEL = os.environ.get("STARSEEKER_STT_MODEL", "small")
+LOCAL_BEAM_SIZE = int(os.environ.get("STARSEEKER_STT_BEAM", "1"))
+LANGUAGE = "de"
+
+# latency assumed for a backend before it has been measured, in seconds
+SERVER_PRIOR_LATENCY = 1.5
+LOCAL_PRIOR_LATENCY = {"tiny": 1.0, "base": 1.5, "small": 3.0, "medium": 8.0}
+# weight of the newest sample in the moving latency average
+LATENCY_ALPHA = 0.3
+# failed backends are skipped for this many seconds before they are tried again
+RETRY_AFTER = 30.0
+# seconds a reachability probe of the Whisper server is reused
+PROBE_TTL = 10.0
+
+
+class Transcriber(abc.ABC):
+    """Interface of a speech-to-text backend."""
+
+    name = "transcriber"
+    prior_latency = 1.0
+
+    def available(self) -> bool:
+        return True
+
+    def warm(self):
+        """Prepare the backend so that the first transcription is not slower than the others."""
+
+    @abc.abstractmethod
+    def transcribe(self, wav_path: str, cancel: threading.Event | None = None) -> str:
+        """Text of the WAV file. Backends that can stop early raise Cancelled once 'cancel' is set."""
+
+
+class WhisperServer(Transcriber):
+    """Remote Whisper behind the OpenAI compatible API, usually reached through an SSH tunnel."""
+
+    name = "server"
+    prior_latency = SERVER_PRIOR_LATENCY
+
+    def __init__(self, url: str, timeout: float = 120, tracker: LatencyTracker | None = None):
+        self.url = url
+        self.timeout = timeout
+        # adaptive timeout from the observed latencies, the fixed timeout is used without one
+        self.tracker = tracker
+        # result and time of the last reachability probe
+        self._probe: tuple[bool, float] | None = None
+
+    def available(self) -> bool:
+        """
+        Cheap reachability check: can a TCP connection to the tunnel endpoint be opened?
+        The result is reused for PROBE_TTL seconds and refreshed by every request.
+        """
+        now = time.monotonic()
+        if self._probe is not None and now - self._probe[1] < PROBE_TTL:
+            return self._probe[0]
+        parsed = urlparse(self.url)
+        try:
+            with socket.create_connection((parsed.hostname, parsed.port or 80), timeout=0.5):
+                reachable = True
+        except OSError:
+            reachable = False
+        self._probe = (reachable, now)
+        return reachable
+
+    def transcribe(self, wav_path: str, cancel: threading.Event | None = None,
+                   session: requests.Session | None = None) -> str:
+        if cancel is not None and cancel.is_set():
+            raise Cancelled()
+        incr("bytes_sent", os.path.getsize(wav_path), target="whisper")
+        post = (session or requests).post
+        with open(wav_path, "rb") as f:
+            files = {"file": (os.path.basename(wav_path), f, "audio/wav")}
+            data = {"model": "whisper-1"}
+            try:
+                if self.tracker is not None:
+                    resp = timed_call(self.tracker, post, self.url, files=files, data=data,
+                                      timeout=self.tracker.timeout())
+                else:
+                    resp = post(self.url, files=files, data=data, timeout=self.timeout)
+            except requests.ConnectionError as e:
+                # hedged() aborts the connection of a losing attempt
+                if cancel is not None and cancel.is_set():
+                    raise Cancelled() from e
+                self._probe = (False, time.monotonic())
+                raise
+        self._probe = (True, time.monotonic())
+        resp.raise_for_status()
+        return resp.json().get("text", "").strip()
+
+
+class LocalWhisper(Transcriber):
+    """
+    In-process Whisper on the CPU. Uses faster-whisper with an int8 quantized model if it
+    is installed and falls back to openai-whisper otherwise. The model is loaded once and
+    kept in memory.
+    """
+
+    name = "local"
+
+    def __init__(self, model_size: str = LOCAL_MODEL, beam_size: int = LOCAL_BEAM_SIZE,
+                 language: str = LANGUAGE):
+        self.model_size = model_size
+        self.beam_size = beam_size
+        self.language = language
+        self.prior_latency = LOCAL_PRIOR_LATENCY.get(model_size, 10.0)
+        self._model = None
+        self._engine: str | None = None
+        self._lock = threading.Lock()
+
+    def available(self) -> bool:
+        import importlib.util
+
+        return any(importlib.util.find_spec(m) is not None for m in ("faster_whisper", "whisper"))
+
+    def _load(self):
+        with self._lock:
+            if self._model is not None:
+                return
+            start = time.perf_counter()
+            try:
+                from faster_whisper import WhisperModel
+
+                self._model = WhisperModel(self.model_size, device="cpu", compute_type="int8")
+                self._engine = "faster-whisper"
+            except ImportError:
+                import whisper
+
+                self._model = whisper.load_model(self.model_size, device="cpu")
+                self._engine = "openai-whisper"
+            logger.info(f"Loaded {self._engine} model '{self.model_size}' "
+                        f"in {time.perf_counter() - start:.1f} s")
+
+    def warm(self):
+        self._load()
+
+    def transcribe(self, wav_path: str, cancel: threading.Event | None = None) -> str:
+        self._load()
+        if self._engine == "faster-whisper":
+            # segments are decoded lazily, so a cancelled transcription stops at the next one
+            segments, _ = self._model.transcribe(wav_path, language=self.language, beam_size=self.beam_size)
+            text = []
+            for segment in segments:
+                if cancel is not None and cancel.is_set():
+                    raise Cancelled()
+                text.append(segment.text)
+            return "".join(text).strip()
+        # openai-whisper decodes the whole file in one call and cannot be interrupted
+        result = self._model.transcribe(wav_path, language=self.language, beam_size=self.beam_size,
+                                        fp16=False)
+        return result.get("text", "").strip()
+
+
+class AutoTranscriber(Transcriber):
+    """
+    Picks the backend with the lowest measured latency among the available ones.
+    Backends that were not used yet are ranked by their prior latency. A backend that cannot
+    be reached is skipped for RETRY_AFTER seconds, on other errors the next one is tried for
+    this request only.
+    """
+
+    name = "auto"
+
+    def __init__(self, backends: list[Transcriber]):
+        self.backends = backends
+        self.latency: dict[str, float] = {}
+        self.failed_at: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def warm(self):
+        """
+        Load the local models in the background if no server is reachable, so that the first
+        request does not pay for it. Otherwise they are loaded when first needed.
+        """
+        servers = [b for b in self.backends if isinstance(b, WhisperServer)]
+        if any(server.available() for server in servers):
+            return
+        for backend in self.backends:
+            if backend not in servers and backend.available():
+                threading.Thread(target=backend.warm, daemon=True).start()
+
+    def ranking(self) -> list[Transcriber]:
+        now = time.monotonic()
+        with self._lock:
+            candidates = [b for b in self.backends if now - self.failed_at.get(b.name, -RETRY_AFTER) >= RETRY_AFTER]
+            # if everything failed recently, try all of them again rather than giving up
+            candidates = candidates or list(self.backends)
+            return sorted(candidates, key=lambda b: self.latency.get(b.name, b.prior_latency))
+
+    def _record(self, backend: Transcriber, seconds: float | None):
+        with self._lock:
+            if seconds is None:
+                self.failed_at[backend.name] = time.monotonic()
+                return
+            self.failed_at.pop(backend.name, None)
+            previous = self.latency.get(backend.name)
+            self.latency[backend.name] = seconds if previous is None else (
+                LATENCY_ALPHA * seconds + (1 - LATENCY_ALPHA) * previous)
+
+    def transcribe(self, wav_path: str, cancel: threading.Event | None = None) -> str:
+        errors = []
+        for backend in self.ranking():
+            if cancel is not None and cancel.is_set():
+                raise Cancelled()
+            if not backend.available():
+                self._record(backend, None)
+                errors.append(f"{backend.name}: not available")
+                continue
+            try:
+                # model loading is not part of the measured latency
+                backend.warm()
+                start = time.perf_counter()
+                text = backend.transcribe(wav_path, cancel=cancel)
+            except Cancelled:
+                raise
+            except Exception as e:
+                logger.warning(f"Transcription with {backend.name} failed: {e}")
+                # a rejected or garbled request says nothing about the next one
+                if isinstance(e, (requests.ConnectionError, ConnectionError)):
+                    self._record(backend, None)
+                errors.append(f"{backend.name}: {e}")
+                continue
+            self._record(backend, time.perf_counter() - start)
+            logger.info(f"Transcribed with {backend.name} backend")
+            return text
+        raise RuntimeError(f"No transcription backend succeeded ({'; '.join(errors) or 'none available'})")
+
+
+def create(url_whisper: str, backend: str = BACKEND, tracker: LatencyTracker | None = None) -> Transcriber:
+    """Build the transcriber selected by 'backend' (auto, server or local)."""
+    if backend == "server":
+        return WhisperServer(url_whisper, tracker=tracker)
+    if backend == "local":
+        return LocalWhisper()
+    if backend != "auto":
+        raise ValueError(f"Unknown transcription backend: {backend}")
+    auto = AutoTranscriber([WhisperServer(url_whisper, tracker=tracker), LocalWhisper()])
+    auto.warm()
+    return auto
+
@@ -0,0 +1,44 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("requests")
+pytest.importorskip("astropy")
+pytest.importorskip("skyfield")
+
+import astro
+import slew
+from devices import Device, DeviceRegistry
+
+# close to the celestial pole, above the horizon of the default observer at any time
+RA = SimpleNamespace(hours=2.5)
+DEC = SimpleNamespace(degrees=89.0)
+
+
+def test_hung_board_is_skipped_and_does_not_block_others(monkeypatch):
+    release = threading.Event()
+
+    def transmit_path(url, points, interval, timeout):
+        # the hung board never answers until the end of the test
+        if url == "http://hung":
+            release.wait(10)
+        return 200
+
+    monkeypatch.setattr(astro, "transmit_path", transmit_path)
+    registry = DeviceRegistry([Device("hung", "http://hung", timeout=0.2), Device("healthy", "http://healthy", timeout=0.2)])
+    try:
+        first = {r["device"]: r for r in registry.fan_out(RA, DEC)}
+        assert first["healthy"]["transmitted"]
+        assert first["hung"]["error"] == "timeout"
+
+        start = time.perf_counter()
+        second = {r["device"]: r for r in registry.fan_out(RA, DEC)}
+        assert time.perf_counter() - start < 1.0
+        assert second["healthy"]["transmitted"]
+        assert second["hung"]["error"] == "busy"
+        # the position only follows commands the board accepted
+        assert registry.get("hung").position == slew.HOME
+    finally:
+        release.set()
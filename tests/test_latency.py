@@ -0,0 +1,96 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("requests")
+
+import latency
+
+
+def test_losing_attempt_is_cancelled():
+    tracker = latency.LatencyTracker("test")
+    for _ in range(latency.MIN_SAMPLES):
+        tracker.record(0.01)
+    stopped = threading.Event()
+
+    def slow(session, cancel):
+        # stands in for the in-process Whisper, which checks the event between segments
+        for _ in range(500):
+            if cancel.is_set():
+                stopped.set()
+                raise latency.Cancelled()
+            time.sleep(0.01)
+        return "slow"
+
+    def fast(session, cancel):
+        return "fast"
+
+    assert latency.hedged([slow, fast], tracker) == "fast"
+    assert stopped.wait(1.0)
+
+
+def test_no_hedge_without_free_slot(monkeypatch):
+    monkeypatch.setattr(latency, "_hedge_slots", threading.BoundedSemaphore(1))
+    latency._hedge_slots.acquire()
+    tracker = latency.LatencyTracker("test")
+    for _ in range(latency.MIN_SAMPLES):
+        tracker.record(0.01)
+    hedges = []
+
+    def primary(session, cancel):
+        time.sleep(0.1)
+        return "primary"
+
+    assert latency.hedged([primary, lambda session, cancel: hedges.append(1)], tracker) == "primary"
+    assert hedges == []
+
+
+def test_losing_http_request_is_aborted():
+    from bench.mocks import MockServer
+
+    tracker = latency.LatencyTracker("test")
+    for _ in range(latency.MIN_SAMPLES):
+        tracker.record(0.01)
+    slow_server = MockServer(lambda method, path, body: (200, "text/plain", b"late"), latency=5.0)
+    ended = threading.Event()
+
+    def slow(session, cancel):
+        try:
+            return session.get(slow_server.url, timeout=10).text
+        finally:
+            ended.set()
+
+    with slow_server:
+        start = time.perf_counter()
+        assert latency.hedged([slow, lambda session, cancel: "fast"], tracker) == "fast"
+        assert ended.wait(1.0)
+        assert time.perf_counter() - start < 1.5
+
+
+def test_timeouts_are_recorded():
+    import requests
+
+    tracker = latency.LatencyTracker("test")
+
+    def post(url, timeout):
+        raise requests.Timeout()
+
+    with pytest.raises(requests.Timeout):
+        latency.timed_call(tracker, post, "http://whisper", timeout=3.0)
+    assert list(tracker._samples) == [3.0]
+
+
+def test_attempts_are_captured(tmp_path):
+    import capture
+    from metrics import span
+
+    def attempt(session, cancel):
+        with span("attempt"):
+            capture.note("attempt")
+        return "done"
+
+    with capture.session("test", str(tmp_path)) as bundle:
+        assert latency.hedged([attempt], latency.LatencyTracker("test")) == "done"
+    assert [event["event"] for event in bundle.record["events"]] == ["attempt"]
+    assert [stage["stage"] for stage in bundle.record["stages"]] == ["attempt"]
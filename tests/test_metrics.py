@@ -0,0 +1,37 @@
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import Metrics
+
+
+def test_counters_are_kept_per_label_set():
+    m = Metrics(enabled=True, log_path=None)
+    m.incr("cache_hits", stage="plan")
+    m.incr("cache_hits", stage="plan")
+    m.incr("cache_hits", stage="tle")
+    m.incr("bytes_sent", 10)
+
+    assert m.summary()["counters"] == {
+        "cache_hits": [{"labels": {"stage": "plan"}, "value": 2}, {"labels": {"stage": "tle"}, "value": 1}],
+        "bytes_sent": [{"labels": {}, "value": 10}],
+    }
+    text = m.render_prometheus()
+    assert 'starseeker_cache_hits_total{stage="plan"} 2\n' in text
+    assert 'starseeker_cache_hits_total{stage="tle"} 1\n' in text
+    assert "starseeker_bytes_sent_total 10\n" in text
+    assert text.count("# TYPE starseeker_cache_hits_total counter") == 1
+
+
+def test_label_values_are_escaped():
+    m = Metrics(enabled=True, log_path=None)
+    m.incr("errors", reason='said "no"')
+    assert 'starseeker_errors_total{reason="said \\"no\\""} 1\n' in m.render_prometheus()
+
+
+def test_collect_follows_copied_context():
+    m = Metrics(enabled=False, log_path=None)
+    collected = []
+    with m.collect(lambda stage, seconds, labels: collected.append(stage)), ThreadPoolExecutor(1) as executor:
+        executor.submit(contextvars.copy_context().run, m.observe, "copied", 1.0).result()
+        executor.submit(m.observe, "unrelated", 1.0).result()
+    assert collected == ["copied"]
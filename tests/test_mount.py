@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+import mount
+
+
+def _baseline(azimuth, altitude):
+    """Servo commands of the original convert() in astro.py, without calibration."""
+    if 270 < azimuth or azimuth < 90:
+        return (450 - azimuth) % 360, altitude
+    return (450 - (azimuth + 180)) % 360, 180 - altitude
+
+
+@pytest.mark.parametrize("azimuth", [0.0, 45.0, 89.5, 91.5, 135.0, 180.0, 225.0, 268.5, 270.5, 315.0, 359.5])
+def test_servo_angles_keep_green_and_red_areas(azimuth):
+    servo_az, servo_alt, flipped = mount.servo_angles(azimuth, 30.0, mount.Calibration())
+    assert flipped == (90 < azimuth < 270)
+    np.testing.assert_allclose((servo_az, servo_alt), _baseline(azimuth, 30.0), atol=1e-9)
+
+
+def test_fit_recovers_offsets_and_tilt():
+    pytest.importorskip("scipy")
+    truth = mount.Calibration(az_offset=2.0, alt_offset=-1.5, tilt_north=1.2, tilt_east=-0.8,
+                              az_poly=[0.0, 1.02], alt_poly=[0.0, 0.97])
+    # targets away from the flip boundaries, so every command lies within the servo range
+    azimuth, altitude = np.meshgrid(np.r_[10.0:80.0:10.0, 100.0:260.0:20.0, 280.0:360.0:10.0],
+                                    np.arange(10.0, 80.0, 10.0))
+    azimuth, altitude = azimuth.ravel(), altitude.ravel()
+    servo_az, servo_alt, _ = mount.servo_angles(azimuth, altitude, truth)
+
+    fitted, rms = mount.fit(azimuth, altitude, servo_az, servo_alt)
+    assert rms < 1e-6
+    for key in ("az_offset", "alt_offset", "tilt_north", "tilt_east"):
+        assert getattr(fitted, key) == pytest.approx(getattr(truth, key), abs=1e-3)
+    np.testing.assert_allclose(fitted.az_poly, truth.az_poly, atol=1e-4)
+    np.testing.assert_allclose(fitted.alt_poly, truth.alt_poly, atol=1e-4)
@@ -0,0 +1,26 @@
+import pytest
+
+import names
+
+
+@pytest.fixture(scope="module")
+def index():
+    return names.NameIndex.build(with_hd=False)
+
+
+def test_exact_names_and_aliases_resolve(index):
+    assert index.resolve("Wega") == (names.CatalogEntry("Vega", "Star", 91262), 1.0)
+    assert index.resolve("alpha Canis Majoris")[0].name == "Sirius"
+
+
+@pytest.mark.parametrize("name", ["Orion", "Andromeda", "Aldebaren"])
+def test_weak_fuzzy_matches_are_rejected_with_candidates(index, name):
+    with pytest.raises(ValueError, match="did you mean"):
+        index.resolve(name)
+
+
+def test_ties_are_ordered_deterministically(index):
+    # 'alpha orionis', 'beta orionis', ... all score 0.5, the order must not depend on set order
+    matches = index.search("Orion")
+    assert {score for _, score in matches} == {0.5}
+    assert [entry.name for entry, _ in matches] == ["Betelgeuse", "Rigel", "Bellatrix", "Mintaka", "Alnilam"]
@@ -0,0 +1,45 @@
+import pytest
+
+pytest.importorskip("sounddevice")
+
+import recorder
+
+
+def test_probe_prefers_default_samplerate(monkeypatch):
+    checked = []
+
+    def check_input_settings(device=None, channels=1, samplerate=None):
+        checked.append(samplerate)
+
+    monkeypatch.setattr(recorder.sd, "query_devices", lambda device=None, kind=None: {"default_samplerate": 48000.0})
+    monkeypatch.setattr(recorder.sd, "check_input_settings", check_input_settings)
+    assert recorder.probe_samplerate() == 48000
+    assert checked == [48000]
+
+
+def test_probe_skips_default_below_target(monkeypatch):
+    monkeypatch.setattr(recorder.sd, "query_devices", lambda device=None, kind=None: {"default_samplerate": 8000.0})
+    monkeypatch.setattr(recorder.sd, "check_input_settings", lambda **kwargs: None)
+    assert recorder.probe_samplerate() == recorder.TARGET_RATE
+
+
+def test_latency_defaults_to_sounddevice():
+    assert recorder._latency(None) is None
+    assert recorder._latency("low") == "low"
+    assert recorder._latency("0.02") == 0.02
+
+
+def test_cold_start_begins_without_previous_audio(tmp_path, monkeypatch):
+    monkeypatch.setattr(recorder.AudioRecorder, "_open_stream", lambda self: None)
+    rec = recorder.AudioRecorder(str(tmp_path), fs=16000, warm=False, preroll=0.5)
+    block = recorder.np.ones((160, 1), dtype=recorder.np.float32)
+
+    rec.start()
+    rec._audio_callback(block, len(block), None, None)
+    rec.stop()
+    # the stream of the finished recording still delivers a block before it is closed
+    rec._audio_callback(block, len(block), None, None)
+
+    rec.start()
+    assert rec._frames == []
+    rec.stop()
@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("requests")
+pytest.importorskip("sgp4")
+skyfield_api = pytest.importorskip("skyfield.api")
+
+import satellites
+
+# ISS elements from the Skyfield documentation, positions are compared around their epoch
+TLE = (
+    "1 25544U 98067A   14020.93268519  .00009878  00000-0  18200-3 0  5082",
+    "2 25544  51.6498 109.4756 0003572  55.9686 274.8005 15.50036494 34011",
+)
+EPOCH_UNIX = 1390256584.0  # 2014-01-20 22:23:04 UTC
+LOCATION = (52.41, 12.54, 36.0)
+
+
+def test_altaz_matches_skyfield(tmp_path):
+    ts = skyfield_api.load.timescale()
+    sat = skyfield_api.EarthSatellite(*TLE, "ISS (ZARYA)", ts)
+    catalog = satellites.SatelliteCatalog(path=str(tmp_path / "stations.tle"))
+    unix = EPOCH_UNIX + np.arange(0.0, 6 * 3600.0, 60.0)
+
+    azimuth, altitude = catalog.altaz([sat], unix, *LOCATION)
+
+    observer = skyfield_api.wgs84.latlon(*LOCATION[:2], elevation_m=LOCATION[2])
+    t = ts.utc(1970, 1, 1, 0, 0, unix)
+    expected_alt, expected_az, _ = (sat - observer).at(t).altaz()
+    # UTC stands in for UT1 in satellites.py, which moves a low orbit by a few hundredths of a degree
+    np.testing.assert_allclose(altitude[0], expected_alt.degrees, atol=0.1)
+    az_error = (azimuth[0] - expected_az.degrees + 180.0) % 360.0 - 180.0
+    # azimuth is ill-defined close to the zenith
+    assert np.abs(az_error[expected_alt.degrees < 85.0]).max() < 0.1
@@ -0,0 +1,59 @@
+import importlib.util
+import json
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+from types import SimpleNamespace
+
+import pytest
+
+import server
+from scheduler import Scheduler
+
+
+@pytest.fixture
+def base_url(monkeypatch):
+    # bad input has to be rejected before the service is reached
+    def unreachable(*args, **kwargs):
+        raise AssertionError("service called")
+
+    service = SimpleNamespace(plan=unreachable, query=unreachable, point=unreachable)
+    monkeypatch.setattr(server.RequestHandler, "service", service, raising=False)
+    monkeypatch.setattr(server.RequestHandler, "scheduler", Scheduler(threads=2), raising=False)
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), server.RequestHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def status(url: str, body: bytes | None = None) -> tuple[int, dict]:
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, data=body), timeout=5) as resp:
+            return resp.status, json.load(resp)
+    except urllib.error.HTTPError as e:
+        return e.code, json.load(e)
+
+
+@pytest.mark.parametrize("path, body", [
+    # the coalescing key of /plan needs the time buckets of astro.py
+    pytest.param("/plan?object=Vega&type=Star&min_alt=abc", None, marks=pytest.mark.skipif(
+        importlib.util.find_spec("skyfield") is None, reason="skyfield not installed")),
+    ("/text", b"{not json"),
+    ("/text", b"[1, 2]"),
+    ("/text", b"{}"),
+    ("/point", b"{not json"),
+    ("/point", b'{"type": "Star"}'),
+])
+def test_bad_input_is_rejected_with_400(base_url, path, body):
+    code, payload = status(base_url + path, body)
+    assert code == 400
+    assert "error" in payload
+
+
+def test_point_only_reaches_registered_devices():
+    service = server.StarseekerService.__new__(server.StarseekerService)
+    service.registry = SimpleNamespace(devices=[SimpleNamespace(url="http://192.168.48.149/")])
+    with pytest.raises(ValueError, match="Unknown device URL"):
+        service.point("Vega", "Star", url="http://169.254.169.254/latest/meta-data")
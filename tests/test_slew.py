@@ -0,0 +1,24 @@
+import numpy as np
+
+import slew
+
+
+def test_intercept_meets_moving_target_in_time():
+    interval = 0.1
+    # target moving by 1 deg/s in altitude, 60 degrees of azimuth away
+    track = np.column_stack([np.full(64, 150.0), 30.0 + interval * np.arange(64)])
+    index, points = slew.intercept((90.0, 30.0), track, interval)
+
+    assert len(points) == index
+    np.testing.assert_allclose(points[-1], track[index])
+    # no sample before 'index' could have been reached in time
+    assert slew.profile_duration(60.0) <= index * interval < slew.profile_duration(60.0) + interval
+    steps = np.abs(np.diff(np.vstack([(90.0, 30.0), points]), axis=0)).max(axis=1)
+    assert steps.max() <= slew.MAX_RATE * interval + 1e-9
+
+
+def test_intercept_on_track_starts_immediately():
+    track = np.array([[90.0, 30.0], [90.5, 30.5]])
+    index, points = slew.intercept((90.0, 30.0), track, 0.1)
+    assert index == 0
+    np.testing.assert_allclose(points, track[:1])
@@ -0,0 +1,25 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("requests")
+
+from bench.mocks import whisper_server
+from client import Client
+import speculate
+import stt
+
+
+def test_partial_transcripts_keep_their_own_latency(tmp_path):
+    wav = tmp_path / "partial.wav"
+    wav.write_bytes(b"RIFF")
+    with whisper_server(latency=0.01) as whisper:
+        client = Client(url_whisper=whisper.url + "/v1/audio/transcriptions", hedge_whisper=None, hedge_ollama=None)
+        client.transcriber = stt.AutoTranscriber([stt.WhisperServer(client.url_whisper, tracker=client.latency["whisper"])])
+        full = client.latency["whisper"].timeout()
+        partial = speculate.PartialTranscriber(SimpleNamespace(), speculate.Speculator(client))
+        for _ in range(30):
+            assert partial.transcriber.transcribe(str(wav)) == "Zeig mir den Mars"
+    assert len(client.latency["whisper_partial"]._samples) == 30
+    assert not client.latency["whisper"]._samples
+    assert client.latency["whisper"].timeout() == full
@@ -0,0 +1,56 @@
+import threading
+
+import pytest
+
+pytest.importorskip("requests")
+
+import stt
+
+
+class Failing(stt.Transcriber):
+    name = "failing"
+
+    def __init__(self, error: Exception):
+        self.error = error
+
+    def transcribe(self, wav_path: str, cancel: threading.Event | None = None) -> str:
+        raise self.error
+
+
+class Fixed(stt.Transcriber):
+    name = "fixed"
+    prior_latency = 2.0
+
+    def transcribe(self, wav_path: str, cancel: threading.Event | None = None) -> str:
+        return "Zeig mir den Mars"
+
+
+def test_transcriber_is_abstract():
+    with pytest.raises(TypeError):
+        stt.Transcriber()
+
+
+def test_probe_is_cached(monkeypatch):
+    probes = []
+
+    def create_connection(address, timeout):
+        probes.append(address)
+        raise OSError("refused")
+
+    monkeypatch.setattr(stt.socket, "create_connection", create_connection)
+    server = stt.WhisperServer("http://localhost:1/v1/audio/transcriptions")
+    assert not server.available()
+    assert not server.available()
+    assert len(probes) == 1
+
+
+def test_only_connection_errors_mark_a_backend_failed():
+    rejected = Failing(ValueError("bad audio"))
+    auto = stt.AutoTranscriber([rejected, Fixed()])
+    assert auto.transcribe("x.wav") == "Zeig mir den Mars"
+    assert rejected.name not in auto.failed_at
+
+    unreachable = Failing(ConnectionError("refused"))
+    auto = stt.AutoTranscriber([unreachable, Fixed()])
+    assert auto.transcribe("x.wav") == "Zeig mir den Mars"
+    assert unreachable.name in auto.failed_at
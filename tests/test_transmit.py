@@ -0,0 +1,20 @@
+import pytest
+
+pytest.importorskip("requests")
+pytest.importorskip("skyfield")
+
+import astro
+from bench.mocks import arduino_server
+
+
+def test_transmit_path_with_trailing_slash():
+    with arduino_server() as arduino:
+        status = astro.transmit_path(arduino.url + "/", [(90.0, 10.0), (91.5, 12.3)], 0.05, timeout=2.0)
+    assert status == 200
+    assert arduino.last_path == "/path?dt=50&p=90.0:10.0,91.5:12.3"
+
+
+def test_transmit_with_trailing_slash():
+    with arduino_server() as arduino:
+        astro.transmit(arduino.url + "/", 45.0, 90.0, timeout=2.0)
+    assert arduino.last_path == "/alt=45.0&az=90.0"
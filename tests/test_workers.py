@@ -0,0 +1,51 @@
+import os
+import subprocess
+import sys
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# modules that load pandas, the Hipparcos catalog or the ephemeris
+HEAVY = ("pandas", "astro", "client", "devices", "names", "starindex")
+
+
+@pytest.mark.parametrize("module", ["server", "batch"])
+def test_entry_modules_import_light(module):
+    # spawned workers re-import the main module as __mp_main__
+    code = f"import sys, {module}; print(','.join(m for m in {HEAVY!r} if m in sys.modules))"
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == ""
+
+
+def test_worker_does_not_load_pandas():
+    pytest.importorskip("skyfield")
+    pytest.importorskip("pandas")
+    import workers
+
+    pool = workers.WorkerPool(1)
+    try:
+        loaded = pool.executor.submit(eval, "'pandas' in __import__('sys').modules").result(timeout=120)
+    finally:
+        pool.shutdown()
+    assert not loaded
+
+
+def test_attached_catalog_outlives_the_worker():
+    import workers
+
+    data = np.arange(2 * len(workers.CATALOG_COLUMNS), dtype=np.float64)
+    catalog = workers.SharedCatalog(shared_memory.SharedMemory(create=True, size=data.nbytes), 2, owner=True)
+    catalog.array.flat[:] = data
+    try:
+        code = (f"import workers; catalog = workers.SharedCatalog.attach({catalog.name!r}, 2); "
+                f"print(int(catalog.row(6)[0])); catalog.close()")
+        out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+        assert out.stdout.strip() == "6"
+        assert "leaked" not in out.stderr
+        # the worker's resource tracker must not have unlinked the parent's block
+        shared_memory.SharedMemory(name=catalog.name).close()
+    finally:
+        catalog.close()
@@ -1,10 +1,63 @@
-from yapper import Yapper, PiperSpeaker, PiperVoiceGermany
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
 
-deutsch = PiperSpeaker(
-    voice=PiperVoiceGermany.EVA_K
-)
-yapper = Yapper(speaker=deutsch)
+from metrics import timed
 
+# synthesize and play speech in a separate process, so Piper does not compete for the GIL
+SPEECH_PROCESS = os.environ.get("STARSEEKER_TTS_PROCESS", "") not in ("", "0")
+
+# Yapper and the Piper voice are loaded on first use, which takes a few seconds
+_yapper = None
+_yapper_lock = threading.Lock()
+_speech_executor: ProcessPoolExecutor | None = None
+
+
+def voice():
+    """Process wide Yapper with the German Piper voice, created on first use."""
+    global _yapper
+    with _yapper_lock:
+        if _yapper is None:
+            from yapper import Yapper, PiperSpeaker, PiperVoiceGermany
+
+            deutsch = PiperSpeaker(
+                voice=PiperVoiceGermany.EVA_K
+            )
+            _yapper = Yapper(speaker=deutsch)
+        return _yapper
+
+
+def _speak(text: str):
+    voice().yap(text)
+
+
+def _load_voice():
+    voice()
+
+
+def _executor() -> ProcessPoolExecutor:
+    global _speech_executor
+    with _yapper_lock:
+        if _speech_executor is None:
+            # a single process keeps the voice loaded and the messages in order
+            _speech_executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"),
+                                                   initializer=_load_voice)
+        return _speech_executor
+
+
+def warm():
+    """Load the voice now, in the speech process if one is used."""
+    if SPEECH_PROCESS:
+        _executor().submit(_load_voice).result()
+    else:
+        voice()
+
+
+@timed("tts")
 def say(text: str):
     """Basic wrapper function to output TTS messages."""
-    yapper.yap(text)
\ No newline at end of file
+    if SPEECH_PROCESS:
+        _executor().submit(_speak, text).result()
+    else:
+        _speak(text)
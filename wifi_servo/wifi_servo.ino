@@ -15,6 +15,15 @@ const int ALT_PIN = 3;
 const int AZI_PIN = 4;
 const int LASER_PIN = 6;
 
+// Trajectory of the slew planner, stepped through in loop() so the request is answered at once
+const int MAX_PATH_POINTS = 64;
+float pathAz[MAX_PATH_POINTS];
+float pathAlt[MAX_PATH_POINTS];
+int pathLength = 0;
+int pathIndex = 0;
+unsigned long pathInterval = 50;
+unsigned long nextStepAt = 0;
+
 void setup() {
   Serial.begin(9600);
   while (!Serial) { ; }
@@ -51,6 +60,7 @@ void setup() {
 }
 
 void loop() {
+  stepPath();
   WiFiClient client = server.available();
   if (client) {
     Serial.println("new client");
@@ -59,6 +69,7 @@ void loop() {
 
     while (client.connected()) {
       delayMicroseconds(10);
+      stepPath();
       if (client.available()) {
         char c = client.read();
         request += c;
@@ -106,11 +117,19 @@ void handleRequest(const String& request) {
   Serial.print("Path: ");
   Serial.println(path);
 
-  // Strip leading '/'
-  if (path.startsWith("/")) {
+  // Strip leading '/', also doubled ones from a base URL with a trailing slash
+  while (path.startsWith("/")) {
     path = path.substring(1);
   }
 
+  // "path?dt=50&p=az:alt,az:alt,..." is a trajectory of the slew planner
+  if (path.startsWith("path")) {
+    handlePath(path);
+    return;
+  }
+  // a single command replaces a trajectory still running
+  pathLength = 0;
+
   // now path: "?alt=30&azi=120" or "alt=30&azi=120"
   if (path.startsWith("?")) {
     path = path.substring(1);
@@ -159,6 +178,57 @@ void handleRequest(const String& request) {
   }
 }
 
+void handlePath(const String& path) {
+  // dt: milliseconds between points, p: the points, always the last parameter
+  int dtIndex = path.indexOf("dt=");
+  int pIndex = path.indexOf("p=");
+  if (pIndex < 0) return;
+
+  unsigned long interval = 50;
+  if (dtIndex >= 0) {
+    int dtEnd = path.indexOf('&', dtIndex);
+    if (dtEnd < 0) dtEnd = path.length();
+    interval = path.substring(dtIndex + 3, dtEnd).toInt();
+  }
+
+  int length = 0;
+  int start = pIndex + 2;
+  while (start < (int)path.length() && length < MAX_PATH_POINTS) {
+    int end = path.indexOf(',', start);
+    if (end < 0) end = path.length();
+    int sep = path.indexOf(':', start);
+    if (sep < 0 || sep > end) break;
+    pathAz[length] = path.substring(start, sep).toFloat();
+    pathAlt[length] = path.substring(sep + 1, end).toFloat();
+    length++;
+    start = end + 1;
+  }
+
+  Serial.print("Parsed path with ");
+  Serial.print(length);
+  Serial.print(" points every ");
+  Serial.print(interval);
+  Serial.println(" ms");
+
+  pathLength = length;
+  pathIndex = 0;
+  pathInterval = interval;
+  nextStepAt = millis();
+  if (length > 0) {
+    digitalWrite(LASER_PIN, HIGH);
+  }
+}
+
+void stepPath() {
+  if (pathIndex >= pathLength) return;
+  unsigned long now = millis();
+  if ((long)(now - nextStepAt) < 0) return;
+  aziServo.write((int)pathAz[pathIndex]);
+  altServo.write((int)pathAlt[pathIndex]);
+  pathIndex++;
+  nextStepAt += pathInterval;
+}
+
 void printWiFiStatus() {
   Serial.print("SSID: ");
   Serial.println(WiFi.SSID());
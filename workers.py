@@ -0,0 +1,214 @@
+import atexit
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory, util
+
+import numpy as np
+
+import memo
+
+logger = logging.getLogger(__name__)
+
+# number of worker processes for the CPU heavy astronomy stages, 0 keeps them in-process
+WORKERS = int(os.environ.get("STARSEEKER_WORKERS", "0"))
+
+# columns of the shared catalog array, one row per Hipparcos star with a position
+CATALOG_COLUMNS = ("hip", "ra_degrees", "dec_degrees", "ra_mas_per_year", "dec_mas_per_year", "parallax_mas")
+HIPPARCOS_EPOCH = 1991.25
+
+
+class SharedCatalog:
+    """
+    Hipparcos positions in a shared memory block, so worker processes read the catalog
+    arrays of the parent instead of each loading and parsing it with pandas.
+    Rows are sorted by HIP id for lookups with searchsorted.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, rows: int, owner: bool):
+        self.shm = shm
+        self.rows = rows
+        self.owner = owner
+        self.array = np.ndarray((rows, len(CATALOG_COLUMNS)), dtype=np.float64, buffer=shm.buf)
+
+    @classmethod
+    def create(cls, df) -> "SharedCatalog":
+        stars = df[df["ra_degrees"].notnull()].sort_index()
+        data = np.column_stack([stars.index.to_numpy(dtype=np.float64)] + [
+            stars[column].fillna(0.0).to_numpy(dtype=np.float64) for column in CATALOG_COLUMNS[1:]
+        ])
+        shm = shared_memory.SharedMemory(create=True, size=data.nbytes)
+        catalog = cls(shm, len(data), owner=True)
+        catalog.array[:] = data
+        return catalog
+
+    @classmethod
+    def attach(cls, name: str, rows: int) -> "SharedCatalog":
+        # the block belongs to the parent, a worker's resource tracker must not unlink it
+        if sys.version_info >= (3, 13):
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        else:
+            shm = shared_memory.SharedMemory(name=name)
+            if os.name == "posix":
+                resource_tracker.unregister(shm._name, "shared_memory")
+        return cls(shm, rows, owner=False)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def row(self, hip: int) -> np.ndarray:
+        idx = np.searchsorted(self.array[:, 0], hip)
+        if idx >= self.rows or self.array[idx, 0] != hip:
+            raise ValueError(f"Unknown star: HIP {hip}")
+        return self.array[idx]
+
+    def close(self):
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+# state of a worker process, set up once by _init_worker
+
+_catalog: SharedCatalog | None = None
+_eph = None
+_ts = None
+
+
+def _init_worker(catalog_name: str, rows: int):
+    """Attach the shared catalog and load ephemeris and timescale once per worker."""
+    global _catalog, _eph, _ts
+    from skyfield.api import load
+
+    from ephemeris import load_ephemeris
+
+    _catalog = SharedCatalog.attach(catalog_name, rows)
+    # pool workers skip atexit, finalizers with a priority run when the worker exits
+    util.Finalize(None, _catalog.close, exitpriority=10)
+    _eph = load_ephemeris()
+    _ts = load.timescale()
+    # imported here so that the first request of a worker does not pay for it
+    import astropy.coordinates  # noqa: F401
+    import mount
+
+    mount.default_calibration()
+
+
+def _ping():
+    return os.getpid()
+
+
+def _pointing(kind: str, key, lat_deg: float, lon_deg: float, height_m: float) -> dict:
+    """Worker side of seek() followed by convert() for a target key of astro.target_key()."""
+    from astropy import units as u
+    from astropy.coordinates import SkyCoord, EarthLocation, AltAz
+    from astropy.time import Time
+    from skyfield.api import Star, wgs84
+
+    import mount
+
+    t = _ts.now()
+    if kind == "satellite":
+        import satellites
+
+        observer = wgs84.latlon(lat_deg, lon_deg, elevation_m=height_m)
+        apparent = (satellites.catalog().get(key) - observer).at(t)
+    else:
+        if kind == "star":
+            _, ra, dec, pm_ra, pm_dec, parallax = _catalog.row(key)
+            target = Star(ra_hours=ra / 15.0, dec_degrees=dec, ra_mas_per_year=pm_ra,
+                          dec_mas_per_year=pm_dec, parallax_mas=parallax, epoch=_ts.J(HIPPARCOS_EPOCH))
+        else:
+            target = _eph[key]
+        apparent = _eph["earth"].at(t).observe(target).apparent()
+    ra, dec, _ = apparent.radec()
+
+    location = EarthLocation(lat=lat_deg * u.deg, lon=lon_deg * u.deg, height=height_m * u.m)
+    altaz = SkyCoord(ra=ra.hours * u.hour, dec=dec.degrees * u.deg, frame="icrs").transform_to(
+        AltAz(obstime=Time(t.utc_datetime(), scale="utc"), location=location))
+    azimuth, altitude = float(altaz.az.degree), float(altaz.alt.degree)
+    con_az, con_alt, _ = mount.servo_angles(azimuth, altitude)
+    return {
+        "ra_hours": float(ra.hours),
+        "dec_degrees": float(dec.degrees),
+        "azimuth": azimuth,
+        "altitude": altitude,
+        "converted_azimuth": con_az,
+        "converted_altitude": con_alt,
+    }
+
+
+class WorkerPool:
+    """
+    Process pool for the CPU bound astronomy stages (Skyfield observe and Astropy transforms),
+    so they neither hold the GIL of the Tk main loop nor of each other. Names are resolved in
+    the parent, workers only receive plain target keys and return plain numbers.
+    """
+
+    def __init__(self, workers: int = WORKERS):
+        import astro
+
+        self.catalog = SharedCatalog.create(astro.df)
+        # spawn gives the same behaviour on all platforms and avoids forking the Tk process
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.catalog.name, self.catalog.rows),
+        )
+        self.workers = workers
+        # results are memoized in the parent like seek()/convert() on the thread path
+        self.cache = memo.TimeBucketCache("pointing", astro.SKY_BUCKET)
+        logger.info(f"Started {workers} worker processes")
+
+    def warm(self):
+        """Start all workers now, so the first requests do not wait for their initialization."""
+        for future in [self.executor.submit(_ping) for _ in range(self.workers)]:
+            future.result()
+
+    def pointing(self, skyobject: str, objtype: str, lat_deg: float, lon_deg: float,
+                 height_m: float) -> Future:
+        """
+        Future of the RA/Dec, Alt/Az and servo angles of an object for an observer. Results
+        of the current time bucket are answered from the cache without a worker round trip.
+        """
+        import astro
+
+        kind, key = astro.target_key(skyobject, objtype)
+        cache_key = (kind, key, lat_deg, lon_deg, height_m)
+        bucket = astro.SATELLITE_BUCKET if kind == "satellite" else None
+        cached = self.cache.get(cache_key, bucket)
+        if cached is not None:
+            future = Future()
+            future.set_result(dict(cached))
+            return future
+
+        def store(done: Future):
+            if not done.cancelled() and done.exception() is None:
+                self.cache.put(cache_key, done.result(), bucket)
+
+        future = self.executor.submit(_pointing, kind, key, lat_deg, lon_deg, height_m)
+        future.add_done_callback(store)
+        return future
+
+    def shutdown(self):
+        self.executor.shutdown(cancel_futures=True)
+        self.catalog.close()
+
+
+_pool: WorkerPool | None = None
+_pool_lock = threading.Lock()
+
+
+def pool() -> WorkerPool | None:
+    """Process wide WorkerPool, None if STARSEEKER_WORKERS is not set."""
+    global _pool
+    with _pool_lock:
+        if _pool is None and WORKERS > 0:
+            _pool = WorkerPool(WORKERS)
+            atexit.register(_pool.shutdown)
+        return _pool